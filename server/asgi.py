@@ -0,0 +1,304 @@
+# asgi.py — async serving mode
+#
+# Same endpoints as server.py, but uploads and the Gemini describe pipeline run on an
+# event loop, so one process can hold many concurrent generations without a thread each.
+#
+#   cd server && uvicorn asgi:app --host 0.0.0.0 --port 4000
+import os
+import uuid
+import asyncio
+import shutil
+from typing import List, Optional
+
+from fastapi import FastAPI, File, Form, Query, Request, UploadFile
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, RedirectResponse, StreamingResponse
+from werkzeug.utils import secure_filename
+from werkzeug.security import safe_join
+
+from parser.file_parser import parse_file_by_type_async, read_source
+from parser.cancellation import GenerationCancelled
+from parser.doc_model import build_document
+from parser.admission import AdmissionRejected
+from parser.metrics import GENERATIONS, ERRORS, render as render_metrics
+from parser.progress import StageTimer
+from parser.budget import generation_deadline
+from state import (
+    generation_status, generation_tokens, get_token, get_extension, progress_payload, track_progress,
+    render_download, render_merged_pdf, prerender_downloads, write_upload, upload_path_for, find_upload, storage, parse_cache, description_cache, admission, client_id_for, ALLOWED_ORIGINS, EXPOSED_HEADERS, TIMING_ALLOW_ORIGIN, DOC_FOLDER,
+    open_stream, stream_for, section_streamer, finish_stream, write_docs, split_dir_for, log
+)
+
+app = FastAPI()
+app.add_middleware(CORSMiddleware, allow_origins=ALLOWED_ORIGINS, allow_methods=["*"], allow_headers=["*"], expose_headers=EXPOSED_HEADERS)
+
+async def save_upload(file: UploadFile, file_path):
+    """Save an upload and return its ``(data, digest)`` source for parsing."""
+    data = await file.read()
+    await asyncio.to_thread(write_upload, file_path, data)
+    return read_source(file_path, data)
+
+def server_timing(timing):
+    return {"Server-Timing": timing.server_timing(), "Timing-Allow-Origin": TIMING_ALLOW_ORIGIN}
+
+@app.post("/upload")
+async def upload(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    generation_id: Optional[str] = Form(None),
+    batch_size: Optional[int] = Form(None),
+    layout: Optional[str] = Form(None),
+    deadline: Optional[float] = Form(None),
+):
+    # 🚦 Admission control (the multipart body is already spooled by now, but no work has started)
+    try:
+        ticket = admission.admit(client_id_for(request.client.host if request.client else None, request.headers.get("x-forwarded-for")))
+    except AdmissionRejected as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=429, headers={"Retry-After": str(e.retry_after)})
+
+    # 🧯 Until the try below owns them, a failure here must still give back the slot, pin and feed
+    pinned = []
+    feed = None
+    try:
+        documents = []
+        uploads = []
+
+        # 🌟 Unique ID for tracking this generation
+        generation_id = generation_id or str(uuid.uuid4())
+        token = get_token(generation_id)
+        generation_status[generation_id] = "queued"
+        html_path = os.path.join(DOC_FOLDER, f"documentation_{generation_id}.html")
+
+        # 📌 Keep the GC away from everything this generation is still using
+        pinned.append(html_path)
+        storage.pin(html_path)
+
+        feed = open_stream(generation_id)
+        streamer = section_streamer(feed, files, generation_id)
+        progress = track_progress(generation_id, [secure_filename(file.filename) for file in files])
+        # ⏳ Optional time budget for the whole generation, queueing included
+        deadline = generation_deadline(deadline)
+    except BaseException:
+        ticket.release()
+        storage.unpin(*pinned)
+        if feed is not None:
+            feed.close()
+        raise
+
+    try:
+        with progress.stage("queue"):
+            await ticket.wait_for_slot_async(token)
+        generation_status[generation_id] = "processing"
+
+        batch_size = batch_size or 5  # Default to 5 if not sent
+
+        for file in files:
+            token.raise_if_cancelled("parsing")
+
+            filename = secure_filename(file.filename)
+            file_ext = get_extension(filename)
+            file_path = upload_path_for(generation_id, filename)
+            pinned.append(file_path)
+            storage.pin(file_path)
+            progress.file_started(filename)
+            with progress.stage("save"):
+                # 📖 Parsed and cache-keyed from the bytes in hand, not from whatever file_path holds by the time we're done
+                source = await save_upload(file, file_path)
+
+            parsed = await parse_file_by_type_async(
+                file_path,
+                generation_id=generation_id,
+                status=generation_status,
+                token=token,
+                batch_size=batch_size,
+                cache=parse_cache,
+                descriptions=description_cache,
+                listener=streamer,
+                progress=progress,
+                deadline=deadline,
+                source=source
+            )
+            progress.file_done()
+
+            if parsed:
+                # 🧱 Normalized once here, then shared by every renderer
+                documents.append(build_document(filename, parsed, file_ext))
+                uploads.append((file_path, filename))
+                cache_path = parse_cache.path_for(source[1], file_ext)
+                pinned.append(cache_path)
+                storage.pin(cache_path)
+
+        # 🎨 Rendering is CPU work, keep it off the loop
+        with progress.stage("render"):
+            doc_url = await asyncio.to_thread(write_docs, generation_id, documents, html_path, layout, token)
+            await asyncio.to_thread(finish_stream, feed, streamer, html_path, doc_url)
+
+        progress.finished()
+        generation_status[generation_id] = "done"
+        GENERATIONS.inc(outcome="done")
+        prerender_downloads(uploads)
+
+        return JSONResponse({
+            "success": True,
+            "htmlPath": doc_url,
+            "generation_id": generation_id
+        }, headers=server_timing(progress))
+
+    except GenerationCancelled as e:
+        generation_status[generation_id] = "cancelled"
+        GENERATIONS.inc(outcome="cancelled")
+        try:
+            os.remove(html_path)
+        except FileNotFoundError:
+            pass
+        shutil.rmtree(split_dir_for(generation_id), ignore_errors=True)
+        return JSONResponse({"success": False, "error": str(e)}, status_code=500, headers=server_timing(progress))
+
+    except Exception as e:
+        log.exception("🐍 upload failed", generation_id=generation_id)
+        generation_status[generation_id] = "cancelled"
+        GENERATIONS.inc(outcome="failed")
+        ERRORS.inc(stage="upload")
+        return JSONResponse({"success": False, "error": str(e)}, status_code=500, headers=server_timing(progress))
+
+    finally:
+        ticket.release()
+        progress.stop()
+        storage.unpin(*pinned)
+        feed.close()
+        latency = token.mark_released()
+        if latency is not None:
+            log.info("🛑 generation released after cancel", generation_id=generation_id, ms=round(latency * 1000))
+
+@app.get("/generate-id")
+async def generate_id():
+    generation_id = str(uuid.uuid4())
+    generation_status[generation_id] = "starting"
+    get_token(generation_id)
+    # Registered now, so a reader can open the stream before the upload lands
+    open_stream(generation_id)
+    return {"generation_id": generation_id, "streamPath": f"/docs/stream/{generation_id}"}
+
+@app.get("/generation-progress/{generation_id}")
+async def generation_progress(generation_id: str):
+    return progress_payload(generation_id)
+
+@app.post("/cancel-generation")
+async def cancel_generation(request: Request):
+    body = await request.json()
+    generation_id = body.get("generation_id")
+
+    token = generation_tokens.get(generation_id)
+    if token:
+        token.cancel()
+        generation_status[generation_id] = "cancelled"
+        return {"success": True}
+
+    return JSONResponse({"success": False, "error": "Generation ID not found"}, status_code=404)
+
+@app.get("/docs/{filename}")
+async def docs(filename: str):
+    html_path = os.path.join(DOC_FOLDER, secure_filename(filename))
+    log.sampled("📦 docs fetch", path=html_path)
+
+    if os.path.exists(html_path):
+        storage.touch(html_path)
+        return FileResponse(html_path)
+    return PlainTextResponse("No documentation generated yet.", status_code=404)
+
+@app.get("/docs/stream/{generation_id}")
+async def docs_stream(generation_id: str):
+    feed = stream_for(generation_id)
+    if feed is None:
+        if os.path.isdir(split_dir_for(secure_filename(generation_id))):
+            return RedirectResponse(f"/docs/split/{secure_filename(generation_id)}/index.html")
+        return await docs(f"documentation_{generation_id}.html")
+
+    return StreamingResponse(
+        feed.iter_async(),
+        media_type="text/html",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/docs/split/{generation_id}/{name:path}")
+async def docs_split(generation_id: str, name: str):
+    path = safe_join(split_dir_for(secure_filename(generation_id)), name)
+
+    if path and os.path.isfile(path):
+        storage.touch(path)
+        return FileResponse(path)
+    return PlainTextResponse("No documentation generated yet.", status_code=404)
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/storage-stats")
+async def storage_stats():
+    return storage.stats()
+
+@app.get("/download-html")
+async def download_html(filename: str, generation_id: Optional[str] = None):
+    # 🪪 Looked up under the generation that uploaded it, never just by name
+    filename = secure_filename(filename)
+    file_path = find_upload(generation_id, filename)
+
+    if file_path is None:
+        return PlainTextResponse("File not found", status_code=404)
+
+    timing = StageTimer()
+    output_path = await asyncio.to_thread(render_download, file_path, filename, "html", timing)
+    if output_path is None:
+        return PlainTextResponse("Could not parse the file", status_code=400)
+
+    return FileResponse(output_path, filename="documentation.html", headers=server_timing(timing))
+
+@app.get("/download-pdf")
+async def download_pdf(filename: List[str] = Query(default=[]), generation_id: Optional[str] = None):
+    try:
+        if not filename:
+            return JSONResponse({"success": False, "error": "No filename provided"}, status_code=400)
+
+        if len(filename) > 1:
+            return await download_merged_pdf(generation_id, filename)
+
+        filename = secure_filename(filename[0])
+        file_path = find_upload(generation_id, filename)
+        if file_path is None:
+            return JSONResponse({"success": False, "error": "File not found"}, status_code=404)
+
+        timing = StageTimer()
+        output_path = await asyncio.to_thread(render_download, file_path, filename, "pdf", timing)
+        if output_path is None:
+            return JSONResponse({"success": False, "error": "Unsupported or empty file"}, status_code=400)
+
+        return FileResponse(output_path, media_type="application/pdf", filename="documentation.pdf", headers=server_timing(timing))
+
+    except Exception as e:
+        log.exception("🐍 pdf download failed")
+        ERRORS.inc(stage="download")
+        return JSONResponse({"success": False, "error": str(e)}, status_code=500)
+
+async def download_merged_pdf(generation_id, filenames):
+    # 📚 ?filename=a.py&filename=b.js → one PDF with a part per file, sent from memory
+    uploads = []
+    for filename in map(secure_filename, filenames):
+        file_path = find_upload(generation_id, filename)
+        if file_path is None:
+            return JSONResponse({"success": False, "error": f"File not found: {filename}"}, status_code=404)
+        uploads.append((file_path, filename))
+
+    timing = StageTimer()
+    buffer = await asyncio.to_thread(render_merged_pdf, uploads, timing)
+    if buffer is None:
+        return JSONResponse({"success": False, "error": "Unsupported or empty files"}, status_code=400)
+
+    return StreamingResponse(
+        iter(lambda: buffer.read(64 * 1024), b""),
+        media_type="application/pdf",
+        headers={"Content-Disposition": 'attachment; filename="documentation.pdf"', **server_timing(timing)}
+    )
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", 4000)))
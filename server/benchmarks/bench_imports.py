@@ -0,0 +1,95 @@
+# benchmarks/bench_imports.py — cold-start import time of the server entry points
+#
+#   cd server && python -m benchmarks.bench_imports
+#   cd server && python -m benchmarks.bench_imports --module asgi --repeat 10 --max-ms 600
+#
+# Each run imports the module in a fresh interpreter under ``python -X importtime``
+# and reports the median total plus the heaviest direct imports. Modules that
+# should only load on first use (the Gemini SDK, BeautifulSoup, reportlab) fail
+# the run if they show up at startup.
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed once a request actually describes, parses HTML or renders a PDF
+LAZY_MODULES = ["google.generativeai", "bs4", "reportlab", "pypdf", "parser.languages.python", "parser.pdf_generator"]
+
+
+def import_times(module):
+    """``[(depth, name, self_us, cumulative_us)]`` for one cold import of ``module``, in import order."""
+    env = dict(os.environ, CODESCROLL_STORAGE_GC="0", PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SERVER_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+def summarize(rows, module):
+    index = next(i for i, (_, name, _, _) in enumerate(rows) if name == module)
+    base, _, _, total = rows[index]
+
+    # importtime lists a module's imports right before it, one level deeper
+    direct = []
+    for depth, name, _, cumulative in reversed(rows[:index]):
+        if depth <= base:
+            break
+        if depth == base + 1:
+            direct.append((name, cumulative))
+    loaded = {name for _, name, _, _ in rows}
+    return total, direct, loaded
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Measure cold-start import time of a server module.")
+    arg_parser.add_argument("--module", default="server", help="module to import (server, asgi, state, ...)")
+    arg_parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters to run; the median is reported")
+    arg_parser.add_argument("--top", type=int, default=10, help="heaviest direct imports to list")
+    arg_parser.add_argument("--max-ms", type=float, help="exit non-zero if the median import takes longer than this")
+    arg_parser.add_argument("--allow", nargs="*", default=[], help="lazy modules that may load at startup for this module")
+    args = arg_parser.parse_args()
+
+    totals = []
+    direct_runs = {}
+    loaded = set()
+    for _ in range(args.repeat):
+        total, direct, run_loaded = summarize(import_times(args.module), args.module)
+        totals.append(total)
+        loaded |= run_loaded
+        for name, cumulative in direct:
+            direct_runs.setdefault(name, []).append(cumulative)
+
+    median_ms = statistics.median(totals) / 1000
+    print(f"⏱️ import {args.module}: median {median_ms:.1f}ms over {args.repeat} runs "
+          f"(min {min(totals) / 1000:.1f}ms, max {max(totals) / 1000:.1f}ms)")
+    print(f"{'direct import':<40} {'median ms':>10}")
+    heaviest = sorted(direct_runs.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    for name, runs in heaviest[:args.top]:
+        print(f"{name:<40} {statistics.median(runs) / 1000:>10.1f}")
+
+    failed = False
+    eager = [name for name in LAZY_MODULES if name in loaded and name not in args.allow]
+    if eager:
+        print(f"💥 loaded at startup but should wait for first use: {', '.join(eager)}")
+        failed = True
+    if args.max_ms is not None and median_ms > args.max_ms:
+        print(f"💥 median {median_ms:.1f}ms is over the {args.max_ms:.0f}ms budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
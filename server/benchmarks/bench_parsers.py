@@ -0,0 +1,397 @@
+# benchmarks/bench_parsers.py — parse time, peak memory and scaling for every supported language
+#
+#   cd server && python -m benchmarks.bench_parsers
+#   cd server && python -m benchmarks.bench_parsers --lang .py .js --sizes 1K 1M 50M
+#   cd server && python -m benchmarks.bench_parsers --save-baseline
+#
+# Each language gets synthetic sources in a few shapes (ordinary code plus pathological
+# ones: deep nesting, very long lines, one huge switch) at each size. Files go through
+# parse_file_by_type with describe_snippet stubbed out, so only our own code is timed.
+#
+# The scaling exponent is the slope of log(time) over log(size): ~1 is linear, ~2 means
+# something in the parser is quadratic. Results are compared with parser_baseline.json.
+import os
+import sys
+import json
+import math
+import time
+import logging
+import argparse
+import tempfile
+import tracemalloc
+
+import parser.file_parser as file_parser
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "parser_baseline.json")
+DEFAULT_SIZES = ["1K", "16K", "256K", "1M"]
+
+
+# 🧪 Synthetic sources ---------------------------------------------------------
+
+def repeat_until(size, unit, header="", footer=""):
+    """``header`` + ``unit(0)`` + ``unit(1)`` + ... + ``footer``, stopping once it reaches ``size`` bytes."""
+    parts = [header]
+    length = len(header) + len(footer)
+    i = 0
+    while length < size:
+        part = unit(i)
+        parts.append(part)
+        length += len(part)
+        i += 1
+    parts.append(footer)
+    return "".join(parts)
+
+def one_line(source):
+    return " ".join(line.strip() for line in source.splitlines() if line.strip())
+
+NESTING_DEPTH = 40
+
+# Python
+
+def py_typical(i):
+    return (
+        f"class Model{i}:\n"
+        f"    def save(self, path):\n"
+        f"        if path:\n"
+        f"            return path\n"
+        f"        return None\n\n"
+        f"def handler_{i}(request, user_id):\n"
+        f"    for item in request.items:\n"
+        f"        if item.user_id == user_id:\n"
+        f"            return item\n"
+        f"    while request.pending:\n"
+        f"        request.pop()\n"
+        f"    try:\n"
+        f"        return request.default\n"
+        f"    except KeyError as e:\n"
+        f"        return None\n\n"
+    )
+
+def py_deep(i):
+    lines = [f"def deep_{i}(x):"]
+    for depth in range(NESTING_DEPTH):
+        lines.append("    " * (depth + 1) + f"if x > {depth}:")
+    lines.append("    " * (NESTING_DEPTH + 1) + "return x")
+    lines.append("    return 0\n\n")
+    return "\n".join(lines)
+
+def py_long_lines(i):
+    values = ", ".join(f"a + {j}" for j in range(200))
+    checks = " and ".join(f"a != {j}" for j in range(200))
+    return f"def wide_{i}(a, b):\n    if {checks}:\n        return b\n    return [{values}]\n\n"
+
+def py_huge_switch(size):
+    return repeat_until(
+        size,
+        lambda i: f"        case {i}:\n            return 'value_{i}'\n",
+        header="def dispatch(code):\n    match code:\n",
+        footer="        case _:\n            return None\n",
+    )
+
+# JavaScript
+
+def js_typical(i):
+    return (
+        f"class Widget{i} {{\n"
+        f"  render(props) {{\n"
+        f"    return props.value;\n"
+        f"  }}\n"
+        f"}}\n"
+        f"function handler{i}(request, userId) {{\n"
+        f"  for (let j = 0; j < request.items.length; j++) {{\n"
+        f"    if (request.items[j].userId === userId) {{ return request.items[j]; }}\n"
+        f"  }}\n"
+        f"  while (request.pending()) {{ request.pop(); }}\n"
+        f"  try {{ return request.fallback(); }} catch (err) {{ return null; }}\n"
+        f"}}\n"
+    )
+
+def c_like_deep(signature):
+    def unit(i):
+        opening = "".join(f"if (x > {depth}) {{ " for depth in range(NESTING_DEPTH))
+        return f"{signature(i)} {{\n  {opening}return x; {'} ' * NESTING_DEPTH}\n  return 0;\n}}\n"
+    return unit
+
+def c_like_switch(header, footer, value):
+    def build(size):
+        return repeat_until(
+            size,
+            lambda i: f"    case {i}: return {value(i)};\n",
+            header=header + "  switch (code) {\n",
+            footer="    default: return 0;\n  }\n" + footer,
+        )
+    return build
+
+# Java
+
+def java_typical(i):
+    return (
+        f"class Service{i} {{\n"
+        f"    public int handle(int userId) {{\n"
+        f"        for (int j = 0; j < userId; j++) {{\n"
+        f"            if (j == {i}) {{ return j; }}\n"
+        f"        }}\n"
+        f"        while (userId > 0) {{ userId--; }}\n"
+        f"        try {{ return compute(userId); }} catch (Exception e) {{ return -1; }}\n"
+        f"    }}\n"
+        f"}}\n"
+    )
+
+# C++
+
+def cpp_typical(i):
+    return (
+        f"class Service{i} {{\n"
+        f"public:\n"
+        f"    int handle(int userId) {{\n"
+        f"        return userId;\n"
+        f"    }}\n"
+        f"}};\n"
+        f"int handler{i}(int userId) {{\n"
+        f"    for (int j = 0; j < userId; j++) {{\n"
+        f"        if (j == {i}) {{ return j; }}\n"
+        f"    }}\n"
+        f"    while (userId > 0) {{ userId--; }}\n"
+        f"    try {{ return compute(userId); }} catch (const std::exception& e) {{ return -1; }}\n"
+        f"}}\n"
+    )
+
+# HTML
+
+HTML_HEADER = "<!DOCTYPE html>\n<html>\n<head>\n<link rel=\"stylesheet\" href=\"style.css\">\n</head>\n<body>\n"
+HTML_FOOTER = "<script src=\"app.js\"></script>\n</body>\n</html>\n"
+
+def html_typical(i):
+    return (
+        f"<section id=\"s{i}\" class=\"block\">\n"
+        f"  <div class=\"card\" data-index=\"{i}\">\n"
+        f"    <p>Item {i}</p>\n"
+        f"    <a href=\"/item/{i}\">open</a>\n"
+        f"    <ul><li>one</li><li>two</li></ul>\n"
+        f"    <img src=\"/img/{i}.png\" alt=\"item {i}\">\n"
+        f"  </div>\n"
+        f"</section>\n"
+    )
+
+def html_deep(i):
+    return "".join(f"<div class=\"level-{depth}\">" for depth in range(NESTING_DEPTH)) + \
+        f"<p>Leaf {i}</p>" + "</div>" * NESTING_DEPTH + "\n"
+
+# CSS
+
+def css_typical(i):
+    rules = (
+        f".card-{i} {{\n  color: #333;\n  padding: 4px;\n}}\n"
+        f"#panel-{i} {{\n  margin: 0 auto;\n}}\n"
+        f"section > p {{\n  line-height: 1.4;\n}}\n"
+    )
+    if i % 10 == 0:
+        rules += f"@media (max-width: {600 + i}px) {{\n  .card-{i} {{ padding: 2px; }}\n}}\n"
+    return rules
+
+def css_many_media(i):
+    inner = "".join(f"  .col-{i}-{j} {{ width: {j * 10}%; }}\n" for j in range(5))
+    return f"@media (min-width: {300 + i}px) {{\n{inner}}}\n"
+
+
+def shapes_for(size):
+    """``{ext: {shape: source}}`` for one target size in bytes."""
+    return {
+        ".py": {
+            "typical": lambda: repeat_until(size, py_typical),
+            "deep_nesting": lambda: repeat_until(size, py_deep),
+            "long_lines": lambda: repeat_until(size, py_long_lines),
+            "huge_switch": lambda: py_huge_switch(size),
+        },
+        ".js": {
+            "typical": lambda: repeat_until(size, js_typical),
+            "deep_nesting": lambda: repeat_until(size, c_like_deep(lambda i: f"function deep{i}(x)")),
+            "long_lines": lambda: one_line(repeat_until(size, js_typical)),
+            "huge_switch": lambda: c_like_switch("function dispatch(code) {\n", "}\n", lambda i: f"'value_{i}'")(size),
+        },
+        ".java": {
+            "typical": lambda: repeat_until(size, java_typical),
+            "deep_nesting": lambda: repeat_until(size, lambda i: f"class Deep{i} {{\n" + c_like_deep(lambda _: "int deep(int x)")(i) + "}\n"),
+            "long_lines": lambda: one_line(repeat_until(size, java_typical)),
+            "huge_switch": lambda: c_like_switch("class Dispatcher {\n int dispatch(int code) {\n", "}\n}\n", lambda i: i)(size),
+        },
+        ".cpp": {
+            "typical": lambda: repeat_until(size, cpp_typical),
+            "deep_nesting": lambda: repeat_until(size, c_like_deep(lambda i: f"int deep{i}(int x)")),
+            "long_lines": lambda: one_line(repeat_until(size, cpp_typical)),
+            "huge_switch": lambda: c_like_switch("int dispatch(int code) {\n", "}\n", lambda i: i)(size),
+        },
+        ".html": {
+            "typical": lambda: repeat_until(size, html_typical, HTML_HEADER, HTML_FOOTER),
+            "deep_nesting": lambda: repeat_until(size, html_deep, HTML_HEADER, HTML_FOOTER),
+            "long_lines": lambda: one_line(repeat_until(size, html_typical, HTML_HEADER, HTML_FOOTER)),
+        },
+        ".css": {
+            "typical": lambda: repeat_until(size, css_typical),
+            "long_lines": lambda: one_line(repeat_until(size, css_typical)),
+            "many_media": lambda: repeat_until(size, css_many_media),
+        },
+    }
+
+
+# ⏱️ Measuring -----------------------------------------------------------------
+
+described = 0
+
+def stub_describe(snippets, types, generation_id=None, status=None, token=None, timeout=None):
+    global described
+    described += len(snippets)
+    return ["stub description"] * len(snippets)
+
+def parse_once(path):
+    """Parse ``path``; returns how many snippets were sent to (the stubbed) describe."""
+    global described
+    described = 0
+    file_parser.parse_file_by_type(path, batch_size=5)
+    return described
+
+def time_parse(path, repeat):
+    """Best-of-``repeat`` seconds plus the target count; slow runs (over a second) aren't repeated."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        targets = parse_once(path)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+        if elapsed > 1.0:
+            break
+    return best, targets
+
+def peak_memory(path):
+    tracemalloc.start()
+    try:
+        parse_once(path)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def scaling_exponent(points, min_seconds=0.01):
+    """Least-squares slope of log(seconds) over log(bytes); None with fewer than two usable points.
+
+    Runs under ``min_seconds`` are mostly fixed overhead and would flatten the slope, so they're left out.
+    """
+    points = [(size, seconds) for size, seconds in points if seconds >= min_seconds]
+    if len(points) < 2:
+        return None
+    xs = [math.log(size) for size, _ in points]
+    ys = [math.log(seconds) for _, seconds in points]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    spread = sum((x - mean_x) ** 2 for x in xs)
+    if not spread:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread
+
+def parse_size(text):
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    text = text.strip().upper().rstrip("B")
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+def format_size(size):
+    for unit, factor in (("M", 1024 ** 2), ("K", 1024)):
+        if size >= factor:
+            return f"{size / factor:.1f}{unit}"
+    return str(size)
+
+def load_baseline(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark the language parsers on synthetic sources.")
+    arg_parser.add_argument("--lang", nargs="+", default=list(file_parser.EXTRACTORS), help="extensions, e.g. .py .js")
+    arg_parser.add_argument("--shape", nargs="+", help="only these shapes (typical, deep_nesting, long_lines, ...)")
+    arg_parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES, help="source sizes, e.g. 1K 256K 50M")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="best of N runs")
+    arg_parser.add_argument("--budget", type=float, default=30.0,
+                        help="skip the larger sizes of a shape once one run takes longer than this many seconds")
+    arg_parser.add_argument("--no-memory", action="store_true", help="skip the (slower) tracemalloc pass")
+    arg_parser.add_argument("--baseline", default=BASELINE_PATH)
+    arg_parser.add_argument("--save-baseline", action="store_true", help="write these results as the new baseline")
+    arg_parser.add_argument("--max-slowdown", type=float,
+                        help="exit non-zero if any run is this many times slower than the baseline")
+    args = arg_parser.parse_args()
+
+    # Only the parsers are measured: no Gemini, no cooldown, no per-stage log lines
+    file_parser.describe_snippet = stub_describe
+    file_parser.DESCRIBE_COOLDOWN = 0
+    logging.getLogger("codescroll").setLevel(logging.WARNING)
+
+    sizes = sorted(parse_size(size) for size in args.sizes)
+    baseline = load_baseline(args.baseline)
+    results = {}
+    slowest_ratio = 0.0
+
+    print(f"{'lang':<6} {'shape':<13} {'size':>6} {'time':>10} {'peak MB':>8} {'targets':>8} {'vs base':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for ext in args.lang:
+            # Parsers are imported on first use; do that now so it isn't timed as part of a parse
+            file_parser.EXTRACTORS.get(ext)
+            shape_names = list(shapes_for(0).get(ext, {}))
+            for shape in shape_names:
+                if args.shape and shape not in args.shape:
+                    continue
+
+                key = f"{ext}/{shape}"
+                runs = {}
+                over_budget = False
+                for size in sizes:
+                    if over_budget:
+                        print(f"{ext:<6} {shape:<13} {format_size(size):>6} {'skipped':>10}")
+                        continue
+
+                    source = shapes_for(size)[ext][shape]()
+                    path = os.path.join(tmp, f"bench{ext}")
+                    with open(path, "w", encoding="utf-8") as f:
+                        f.write(source)
+
+                    seconds, targets = time_parse(path, args.repeat)
+                    peak = None if args.no_memory else peak_memory(path)
+                    runs[len(source)] = {"seconds": round(seconds, 6), "peak_bytes": peak, "targets": targets}
+
+                    base = baseline.get(key, {}).get("runs", {}).get(str(len(source)))
+                    ratio = seconds / base["seconds"] if base and base.get("seconds") else None
+                    if ratio:
+                        slowest_ratio = max(slowest_ratio, ratio)
+                    print(
+                        f"{ext:<6} {shape:<13} {format_size(len(source)):>6} {seconds * 1000:>8.1f}ms "
+                        f"{'-' if peak is None else f'{peak / 1024 ** 2:.1f}':>8} {targets:>8} "
+                        f"{'-' if ratio is None else f'{ratio:.2f}x':>8}",
+                        flush=True
+                    )
+                    over_budget = seconds > args.budget
+
+                exponent = scaling_exponent([(size, run["seconds"]) for size, run in runs.items()])
+                base_exponent = baseline.get(key, {}).get("exponent")
+                if exponent is not None:
+                    note = "" if base_exponent is None else f" (baseline {base_exponent:.2f})"
+                    print(f"{'':<6} {shape:<13} scaling exponent {exponent:.2f}{note}")
+                results[key] = {
+                    "exponent": None if exponent is None else round(exponent, 3),
+                    "runs": {str(size): run for size, run in runs.items()},
+                }
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"💾 Baseline written to {args.baseline}")
+
+    if args.max_slowdown and slowest_ratio > args.max_slowdown:
+        print(f"🐌 Slowest run is {slowest_ratio:.2f}x the baseline (limit {args.max_slowdown:.2f}x)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/bench_pdf.py — how long PDF generation takes for documents of different sizes
+#
+#   cd server && python -m benchmarks.bench_pdf --rows 100 1000 5000
+#
+# "single" is the normal one-pass build, "page numbers" the multi-pass build used when
+# the TOC needs page numbers. "two builds" lays the document out twice, which is
+# what generate_pdf used to do to collect TOC entries it then didn't use.
+import os
+import time
+import argparse
+import tempfile
+
+from parser.doc_model import build_document
+from parser.pdf_generator import convert_to_pdf_format, generate_pdf
+
+
+def synthetic_parse(rows):
+    """A parse result shaped like extract_python's, with ``rows`` entries spread over the tabs."""
+    per_tab = max(1, rows // 4)
+    return {
+        "classes": [
+            {"name": f"Model{i}", "docstring": f"Holds state for model {i}.",
+             "methods": [{"name": "save", "params": ["self"], "docstring": None, "returns": "None"}]}
+            for i in range(per_tab)
+        ],
+        "functions": [
+            {"name": f"handler_{i}", "params": ["request", "user_id"], "docstring": f"Handles request number {i} for the user.", "returns": "dict"}
+            for i in range(per_tab)
+        ],
+        "control_flows": {
+            "if": [{"condition": f"user_id > {i}", "lineno": i, "description": "Checks whether the user is allowed in."} for i in range(per_tab)],
+            "for": [{"condition": f"item in batch_{i}", "lineno": i, "description": "Walks every item in the batch."} for i in range(per_tab)],
+        },
+    }
+
+
+def time_build(data, repeat, builds=1, **kwargs):
+    """Best-of-``repeat`` seconds for ``builds`` back-to-back generate_pdf calls."""
+    best = None
+    for _ in range(repeat):
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+            path = f.name
+        try:
+            started = time.perf_counter()
+            for _ in range(builds):
+                generate_pdf(data, path, "bench.py", **kwargs)
+            elapsed = time.perf_counter() - started
+        finally:
+            os.remove(path)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time PDF generation for synthetic documents.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs")
+    args = parser.parse_args()
+
+    print(f"{'rows':>7} {'single':>9} {'two builds':>11} {'page numbers':>13} {'saving':>7}")
+    for rows in args.rows:
+        doc = build_document("bench.py", synthetic_parse(rows), ".py")
+        data = convert_to_pdf_format([doc])
+
+        single = time_build(data, args.repeat)
+        two_builds = time_build(data, args.repeat, builds=2)
+        numbered = time_build(data, args.repeat, toc_page_numbers=True)
+        print(f"{rows:>7} {single:>8.2f}s {two_builds:>10.2f}s {numbered:>12.2f}s {1 - single / two_builds:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
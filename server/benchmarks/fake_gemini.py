@@ -0,0 +1,236 @@
+# benchmarks/fake_gemini.py — local stand-in for the Gemini generateContent endpoint
+#
+#   cd server && python -m benchmarks.fake_gemini --port 8090 --latency lognormal:800,0.5 --rate-limit-rate 0.05
+#   GEMINI_API_ENDPOINT=http://localhost:8090 python server.py
+#
+# Answers the REST call gemini_client makes with one made-up description per numbered
+# snippet in the prompt. Latency, 5xx errors and 429s are drawn at random, so load
+# tests can reproduce a slow or throttled model without the real API.
+#
+# --record FILE forwards every request to the real API (GEMINI_API_KEY) and appends
+# prompt + response to FILE; --replay FILE answers prompts seen in FILE with the
+# recorded response.
+import os
+import re
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from dotenv import load_dotenv
+
+UPSTREAM = "https://generativelanguage.googleapis.com"
+_SNIPPET = re.compile(r"^\d+\. Type: (.*)$", re.MULTILINE)
+
+
+def latency_sampler(spec):
+    """Seconds-returning sampler from ``fixed:MS``, ``uniform:LO,HI`` or ``lognormal:MEDIAN,SIGMA`` (ms)."""
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v]
+    if kind == "fixed":
+        return lambda: values[0] / 1000
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1]) / 1000
+    if kind == "lognormal":
+        median, sigma = values
+        return lambda: random.lognormvariate(0, sigma) * median / 1000
+    raise ValueError(f"Unknown latency distribution {spec!r}")
+
+def prompt_of(body):
+    return "\n".join(
+        part.get("text", "")
+        for content in body.get("contents", [])
+        for part in content.get("parts", [])
+    )
+
+def prompt_key(prompt):
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+def fake_descriptions(prompt):
+    kinds = _SNIPPET.findall(prompt) or ["snippet"]
+    return [f"Handles the {kind.strip()} logic for item {i}." for i, kind in enumerate(kinds, 1)]
+
+def response_body(text):
+    return {
+        "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP", "index": 0}],
+        "usageMetadata": {"promptTokenCount": 0, "candidatesTokenCount": 0, "totalTokenCount": 0},
+    }
+
+def error_body(code, status, message):
+    return {"error": {"code": code, "message": message, "status": status}}
+
+
+class Recording:
+    """Prompt-hash → response pairs in a JSON-lines file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.responses = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.responses[entry["key"]] = entry["response"]
+        except FileNotFoundError:
+            pass
+        return self
+
+    def add(self, prompt, response):
+        key = prompt_key(prompt)
+        with self._lock:
+            self.responses[key] = response
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "prompt": prompt, "response": response}, ensure_ascii=False) + "\n")
+
+
+class FakeGemini:
+    def __init__(self, latency, error_rate=0.0, rate_limit_rate=0.0, replay=None, record=None, api_key=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.replay = replay
+        self.record = record
+        self.api_key = api_key
+        self.stats = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0, "replayed": 0, "recorded": 0}
+        self._lock = threading.Lock()
+
+    def count(self, field):
+        with self._lock:
+            self.stats[field] += 1
+
+    def handle(self, path, body):
+        """(status, response dict) for one generateContent call."""
+        self.count("requests")
+        prompt = prompt_of(body)
+
+        if self.record:
+            status, response = self.forward(path, body)
+            if status == 200:
+                self.record.add(prompt, response)
+                self.count("recorded")
+            return status, response
+
+        time.sleep(self.latency())
+        roll = random.random()
+        if roll < self.rate_limit_rate:
+            self.count("rate_limited")
+            return 429, error_body(429, "RESOURCE_EXHAUSTED", "Resource has been exhausted (e.g. check quota).")
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.count("errors")
+            return 500, error_body(500, "INTERNAL", "An internal error has occurred.")
+
+        self.count("ok")
+        if self.replay and prompt_key(prompt) in self.replay.responses:
+            self.count("replayed")
+            return 200, self.replay.responses[prompt_key(prompt)]
+        return 200, response_body(json.dumps(fake_descriptions(prompt)))
+
+    def forward(self, path, body):
+        request = urllib.request.Request(
+            UPSTREAM + path,
+            data=json.dumps(body).encode("utf-8"),
+            headers={"Content-Type": "application/json", "x-goog-api-key": self.api_key or ""},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=120) as upstream:
+                return upstream.status, json.loads(upstream.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read() or b"{}")
+
+
+def make_handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                return self.reply(400, error_body(400, "INVALID_ARGUMENT", "Request body is not JSON."))
+            if not self.path.split("?")[0].endswith(":generateContent"):
+                return self.reply(404, error_body(404, "NOT_FOUND", f"No fake for {self.path}"))
+            self.reply(*fake.handle(self.path.split("?")[0], body))
+
+        def do_GET(self):
+            if self.path == "/stats":
+                with fake._lock:
+                    return self.reply(200, dict(fake.stats))
+            self.reply(404, error_body(404, "NOT_FOUND", f"No fake for {self.path}"))
+
+        def reply(self, status, payload):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=UTF-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass  # One line per request would drown out everything else during a load test
+
+    return Handler
+
+def serve(fake, host="127.0.0.1", port=8090):
+    """Start the fake in a background thread; returns the server (call ``shutdown()`` to stop it)."""
+    server = ThreadingHTTPServer((host, port), make_handler(fake))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-gemini", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake Gemini generateContent endpoint.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", default="lognormal:800,0.5",
+                        help="fixed:MS, uniform:LO,HI or lognormal:MEDIAN,SIGMA (milliseconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with a 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of requests answered with a 429")
+    parser.add_argument("--seed", type=int)
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--record", help="forward to the real API and append responses to this file")
+    group.add_argument("--replay", help="answer prompts recorded in this file with their recorded response")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    api_key = None
+    if args.record:
+        load_dotenv()
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            sys.exit("💥 --record needs GEMINI_API_KEY to reach the real API")
+
+    fake = FakeGemini(
+        latency_sampler(args.latency),
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        replay=Recording(args.replay).load() if args.replay else None,
+        record=Recording(args.record) if args.record else None,
+        api_key=api_key,
+    )
+    server = serve(fake, args.host, args.port)
+    print(f"🤖 Fake Gemini on http://{args.host}:{args.port} (latency {args.latency}, "
+          f"{args.error_rate:.0%} errors, {args.rate_limit_rate:.0%} 429s)", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+# benchmarks/load_test.py — end-to-end load generator for a running server
+#
+#   cd server && python -m benchmarks.fake_gemini --latency lognormal:800,0.5 &
+#   cd server && GEMINI_API_ENDPOINT=http://localhost:8090 CODESCROLL_ADMISSION_CLIENT_BURST=100 python server.py &
+#   cd server && python -m benchmarks.load_test --base-url http://localhost:4000 --concurrency 8 --sessions 40
+#
+# Every simulated user does what the page does: /generate-id, /upload while polling
+# /generation-progress, then /download-html and /download-pdf for each file. Latency
+# percentiles are reported per endpoint; 429s from admission control are counted
+# separately from errors.
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.bench_parsers import shapes_for, parse_size
+
+# A per-session comment keeps every upload out of the parse cache
+SESSION_COMMENT = {
+    ".py": "# load test session {}\n",
+    ".html": "<!-- load test session {} -->\n",
+    ".css": "/* load test session {} */\n",
+}
+ENDPOINTS = ["generate-id", "upload", "generation-progress", "download-html", "download-pdf"]
+
+
+class Results:
+    """Latencies and outcomes per endpoint, shared by all users."""
+
+    def __init__(self):
+        self.latencies = {name: [] for name in ENDPOINTS}
+        self.outcomes = {name: {"ok": 0, "errors": 0, "rate_limited": 0} for name in ENDPOINTS}
+        self._lock = threading.Lock()
+
+    def add(self, endpoint, seconds, status):
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            if status == 429:
+                self.outcomes[endpoint]["rate_limited"] += 1
+            elif status is None or status >= 400:
+                self.outcomes[endpoint]["errors"] += 1
+            else:
+                self.outcomes[endpoint]["ok"] += 1
+
+    def summary(self):
+        with self._lock:
+            return {
+                name: {
+                    "count": len(self.latencies[name]),
+                    **self.outcomes[name],
+                    "p50": percentile(self.latencies[name], 50),
+                    "p95": percentile(self.latencies[name], 95),
+                    "p99": percentile(self.latencies[name], 99),
+                    "max": max(self.latencies[name], default=None),
+                }
+                for name in ENDPOINTS
+            }
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile, ``None`` for no samples."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+def multipart(fields, files):
+    """Body and content type for a multipart/form-data POST (``files``: name, filename, bytes)."""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8")
+        )
+    for name, filename, data in files:
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n".encode("utf-8") + data + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+class Client:
+    def __init__(self, base_url, results, timeout):
+        self.base_url = base_url.rstrip("/")
+        self.results = results
+        self.timeout = timeout
+
+    def request(self, endpoint, path, data=None, headers=None):
+        """(status, body bytes) for one call, timed under ``endpoint``; status is None if no response came back."""
+        request = urllib.request.Request(self.base_url + path, data=data, headers=headers or {})
+        started = time.perf_counter()
+        status, body = None, b""
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                status, body = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, body = e.code, e.read()
+        except (urllib.error.URLError, OSError):
+            pass
+        self.results.add(endpoint, time.perf_counter() - started, status)
+        return status, body
+
+
+def session_files(corpus, session, cacheable):
+    """Per-session names, so concurrent users don't overwrite each other's uploads."""
+    files = []
+    for name, data in corpus:
+        if not cacheable:
+            comment = SESSION_COMMENT.get(os.path.splitext(name)[1], "// load test session {}\n")
+            data = comment.format(session).encode("utf-8") + data
+        files.append((f"load_{session}_{name}", data))
+    return files
+
+def run_session(client, corpus, session, poll_interval, batch_size, cacheable=False):
+    """One simulated user; returns True if the generation finished."""
+    status, body = client.request("generate-id", "/generate-id")
+    if status != 200:
+        return False
+    generation_id = json.loads(body)["generation_id"]
+
+    # 🔁 Poll progress while the upload runs, like the page does
+    uploaded = threading.Event()
+
+    def poll():
+        while True:
+            client.request("generation-progress", f"/generation-progress/{generation_id}")
+            if uploaded.wait(poll_interval):
+                return
+
+    poller = threading.Thread(target=poll, daemon=True)
+    poller.start()
+
+    files = session_files(corpus, session, cacheable)
+    body, content_type = multipart(
+        {"generation_id": generation_id, "batch_size": batch_size},
+        [("files", filename, data) for filename, data in files],
+    )
+    try:
+        status, _ = client.request("upload", "/upload", data=body, headers={"Content-Type": content_type})
+    finally:
+        uploaded.set()
+        poller.join()
+    if status != 200:
+        return False
+
+    for filename, _ in files:
+        query = urllib.parse.urlencode({"filename": filename, "generation_id": generation_id})
+        client.request("download-html", f"/download-html?{query}")
+        client.request("download-pdf", f"/download-pdf?{query}")
+    return True
+
+def synthetic_corpus(langs, size):
+    shapes = shapes_for(size)
+    return [(f"sample{ext}", shapes[ext]["typical"]().encode("utf-8")) for ext in langs]
+
+def file_corpus(paths):
+    corpus = []
+    for path in paths:
+        with open(path, "rb") as f:
+            corpus.append((os.path.basename(path), f.read()))
+    return corpus
+
+
+def format_ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}"
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Drive a running server with concurrent simulated users.")
+    arg_parser.add_argument("--base-url", default="http://localhost:4000")
+    arg_parser.add_argument("--concurrency", type=int, default=4, help="users running at the same time")
+    group = arg_parser.add_mutually_exclusive_group()
+    group.add_argument("--sessions", type=int, help="total users to run (default 20)")
+    group.add_argument("--duration", type=float, help="keep starting users for this many seconds")
+    arg_parser.add_argument("--files", nargs="+", help="upload these files instead of synthetic sources")
+    arg_parser.add_argument("--lang", nargs="+", default=[".py", ".js"], help="synthetic source extensions")
+    arg_parser.add_argument("--size", default="4K", help="synthetic source size, e.g. 4K or 256K")
+    arg_parser.add_argument("--cacheable", action="store_true",
+                            help="upload identical sources every session, so repeats hit the parse cache")
+    arg_parser.add_argument("--batch-size", type=int, default=5)
+    arg_parser.add_argument("--poll-interval", type=float, default=0.5, help="seconds between progress polls")
+    arg_parser.add_argument("--timeout", type=float, default=600.0, help="per-request timeout in seconds")
+    arg_parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = arg_parser.parse_args()
+
+    corpus = file_corpus(args.files) if args.files else synthetic_corpus(args.lang, parse_size(args.size))
+    results = Results()
+    client = Client(args.base_url, results, args.timeout)
+    finished = []
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        if args.duration:
+            # Keep ``concurrency`` users in flight until the time is up
+            deadline = started + args.duration
+            session = 0
+            lock = threading.Lock()
+
+            def user(worker):
+                nonlocal session
+                while time.perf_counter() < deadline:
+                    with lock:
+                        session += 1
+                        current = session
+                    finished.append(run_session(client, corpus, current, args.poll_interval, args.batch_size, args.cacheable))
+
+            list(pool.map(user, range(args.concurrency)))
+        else:
+            sessions = args.sessions or 20
+            finished.extend(pool.map(
+                lambda session: run_session(client, corpus, session, args.poll_interval, args.batch_size, args.cacheable),
+                range(sessions),
+            ))
+    elapsed = time.perf_counter() - started
+
+    summary = results.summary()
+    completed = sum(finished)
+    if args.json:
+        print(json.dumps({"sessions": len(finished), "completed": completed, "seconds": elapsed, "endpoints": summary}, indent=2))
+    else:
+        print(f"🏁 {completed}/{len(finished)} sessions completed in {elapsed:.1f}s "
+              f"({completed / elapsed:.2f}/s) at concurrency {args.concurrency}")
+        print(f"{'endpoint':<20} {'count':>6} {'errors':>6} {'429s':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        for name, row in summary.items():
+            print(f"{name:<20} {row['count']:>6} {row['errors']:>6} {row['rate_limited']:>6} "
+                  f"{format_ms(row['p50']):>8} {format_ms(row['p95']):>8} {format_ms(row['p99']):>8} {format_ms(row['max']):>8}")
+
+    sys.exit(0 if completed == len(finished) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+# cli.py — document a whole source tree from the command line
+#
+#   cd server && python cli.py ../src -o ../docs-out
+#   cd server && python cli.py project.zip -o out --formats html json --workers 8 --rpm 30
+#
+# Walks a directory (or a .zip / .tar.gz archive) and runs parse_file_by_type on every
+# supported file across a process pool. All workers share one SQLite description cache
+# and one rate limiter for Gemini. Each file gets a JSON result and optionally a PDF, and
+# the HTML output is a project site with a page per file plus a search index.
+#
+# Progress goes to <out>/manifest.jsonl as files finish. Re-running with the same output
+# directory skips files that haven't changed since they were last documented, and
+# snippets described before an interrupted run come from the cache.
+#
+# With --watch it then keeps polling the directory: an edited file is extracted again,
+# only the snippets whose text changed go to Gemini, and only that file's outputs, its
+# page and the search index are rewritten.
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import zipfile
+import tarfile
+import argparse
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from parser import file_parser
+from parser.file_parser import parse_file_by_type, read_source, EXTRACTORS
+from parser.gemini_client import describe_snippet, GEMINI_API_ENDPOINT
+from parser.description_cache import DescriptionCache
+from parser.budget import Deadline, count_pending
+from parser.render_cache import file_digest, atomic_write
+from parser.doc_model import build_document
+
+FORMATS = ("html", "pdf", "json")
+SKIP_DIRS = {".git", ".hg", ".svn", "node_modules", "__pycache__", "venv", ".venv", "env", "dist", "build", ".tox"}
+
+
+class RateLimiter:
+    """At most ``per_minute`` Gemini requests across every worker process, spaced evenly."""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next = multiprocessing.Value("d", 0.0)
+
+    def wait(self):
+        if not self.interval:
+            return
+        # Reserve the next free slot under the shared lock, then sleep until it comes round
+        with self._next.get_lock():
+            now = time.time()
+            slot = max(now, self._next.value)
+            self._next.value = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# 🏭 Worker process state, set once by init_worker
+_worker = {}
+
+def init_worker(cache_path, limiter, batch_size, log_level):
+    logging.getLogger("codescroll").setLevel(log_level)
+    # The shared rate limiter does the pacing, so no per-file cooldown on top of it
+    file_parser.DESCRIBE_COOLDOWN = 0
+    _worker.update(descriptions=DescriptionCache(cache_path), limiter=limiter, batch_size=batch_size)
+
+def describe_limited(snippets, types, **kwargs):
+    _worker["limiter"].wait()
+    return describe_snippet(snippets, types, **kwargs)
+
+def output_path(out_dir, fmt, rel):
+    return os.path.join(out_dir, fmt, rel + "." + fmt)
+
+def document_file(path, rel, out_dir, formats, deadline=0):
+    """Parse, describe and write one file's outputs; returns its manifest record.
+
+    ``deadline`` (seconds, 0 for none) caps the time spent describing; what's left gets pending placeholders.
+    """
+    started = time.perf_counter()
+    descriptions = _worker["descriptions"]
+    hits, misses, failures = descriptions.hits, descriptions.misses, descriptions.failures
+    record = {"path": rel, "digest": None, "outputs": []}
+
+    try:
+        # One read, so the recorded digest is of the bytes that were documented
+        source = read_source(path)
+        record["digest"] = source[1]
+        parsed = parse_file_by_type(path, batch_size=_worker["batch_size"], describe=describe_limited,
+                                    descriptions=descriptions, deadline=Deadline(deadline), source=source)
+        if not parsed:
+            record["status"] = "skipped"
+        else:
+            record["pending_descriptions"] = count_pending(parsed)
+            ext = os.path.splitext(rel)[1].lower()
+            write_json(output_path(out_dir, "json", rel), {"filename": rel, "ext": ext, "parsed": parsed})
+            record["outputs"].append("json")
+            if "pdf" in formats:
+                from parser.pdf_generator import render_pdf_part
+
+                pdf_path = output_path(out_dir, "pdf", rel)
+                os.makedirs(os.path.dirname(pdf_path), exist_ok=True)
+                atomic_write(pdf_path, lambda tmp_path: render_pdf_part(rel, parsed, ext, tmp_path))
+                record["outputs"].append("pdf")
+            record["status"] = "done"
+    except Exception as e:
+        record.update(status="failed", error=f"{type(e).__name__}: {e}")
+
+    record["seconds"] = round(time.perf_counter() - started, 3)
+    record["cache_hits"] = descriptions.hits - hits
+    record["cache_misses"] = descriptions.misses - misses
+    # Snippets Gemini couldn't describe; the next run retries the file (described ones come from the cache)
+    record["failed_descriptions"] = descriptions.failures - failures
+    return record
+
+def write_json(path, payload):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def write(tmp_path):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"), ensure_ascii=False)
+
+    atomic_write(path, write)
+
+
+# 📂 Sources ------------------------------------------------------------------
+
+def extract_archive(path, dest):
+    """Unpack a zip or tar archive into ``dest``, refusing members that would land outside it."""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for member in archive.namelist():
+                target = os.path.realpath(os.path.join(dest, member))
+                if not target.startswith(os.path.realpath(dest) + os.sep):
+                    raise ValueError(f"Archive member escapes the target directory: {member}")
+            archive.extractall(dest)
+    elif tarfile.is_tarfile(path):
+        with tarfile.open(path) as archive:
+            archive.extractall(dest, filter="data")
+    else:
+        raise ValueError(f"Not a directory, zip or tar archive: {path}")
+
+def find_sources(root, include_hidden=False):
+    """``(path, path relative to root)`` for every file a parser is registered for, in a stable order."""
+    sources = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(
+            d for d in dirnames if d not in SKIP_DIRS and (include_hidden or not d.startswith("."))
+        )
+        for name in sorted(filenames):
+            if not include_hidden and name.startswith("."):
+                continue
+            if os.path.splitext(name)[1].lower() in EXTRACTORS:
+                path = os.path.join(dirpath, name)
+                sources.append((path, os.path.relpath(path, root).replace(os.sep, "/")))
+    return sources
+
+
+# 📒 Manifest -----------------------------------------------------------------
+
+def load_manifest(path):
+    """Latest record per file from a previous run's manifest."""
+    records = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    records[record["path"]] = record
+    except FileNotFoundError:
+        pass
+    return records
+
+def is_current(record, digest, out_dir, formats):
+    """Whether a previous run already documented this exact content in every requested format."""
+    if not record or record.get("status") != "done" or record.get("digest") != digest:
+        return False
+    # Descriptions that failed or ran out of time get another go
+    if record.get("failed_descriptions") or record.get("pending_descriptions"):
+        return False
+    wanted = {"json"} | ({"pdf"} & set(formats))
+    return wanted <= set(record.get("outputs", [])) and all(
+        os.path.exists(output_path(out_dir, fmt, record["path"])) for fmt in wanted
+    )
+
+
+def load_document(out_dir, rel):
+    with open(output_path(out_dir, "json", rel), "r", encoding="utf-8") as f:
+        payload = json.load(f)
+    return build_document(payload["filename"], payload["parsed"], payload["ext"])
+
+def build_site(out_dir, documents, pages=None):
+    """Project HTML site (a page per file + search index); ``pages`` rewrites only those files' pages."""
+    from parser.project_docs import generate_project_docs
+
+    site_dir = os.path.join(out_dir, "html")
+    if pages is None:
+        shutil.rmtree(site_dir, ignore_errors=True)
+    generate_project_docs(documents, site_dir, pages=pages)
+    return os.path.join(site_dir, "index.html")
+
+
+# 👀 Watch mode ---------------------------------------------------------------
+
+def snapshot(root, include_hidden=False):
+    """``{rel: (path, mtime_ns, size)}`` for every supported file under ``root``."""
+    state = {}
+    for path, rel in find_sources(root, include_hidden):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        state[rel] = (path, stat.st_mtime_ns, stat.st_size)
+    return state
+
+def remove_outputs(out_dir, rel):
+    for fmt in ("json", "pdf"):
+        try:
+            os.remove(output_path(out_dir, fmt, rel))
+        except FileNotFoundError:
+            pass
+
+def watch(root, out_dir, done, args, manifest_path, cache_path, log_level):
+    """Re-document files under ``root`` as they change, until interrupted; ``done`` are the files on the site now."""
+    # Runs in this process: one edit at a time, and no pool start-up per change
+    init_worker(cache_path, RateLimiter(args.rpm), args.batch_size, log_level)
+    seen = snapshot(root, args.include_hidden)
+    documents = {rel: load_document(out_dir, rel) for rel in done}
+    print(f"👀 Watching {root} for changes (Ctrl+C to stop)", flush=True)
+
+    while True:
+        time.sleep(args.interval)
+        current = snapshot(root, args.include_hidden)
+        changed = sorted(rel for rel, (_, mtime, size) in current.items() if seen.get(rel, (None,))[1:] != (mtime, size))
+        removed = sorted(set(seen) - set(current))
+        seen = current
+        if not changed and not removed:
+            continue
+
+        started = time.perf_counter()
+        files_before = set(documents)
+        rewritten = set()
+        with open(manifest_path, "a", encoding="utf-8") as manifest:
+            for rel in changed:
+                record = document_file(current[rel][0], rel, out_dir, args.formats, args.deadline)
+                manifest.write(json.dumps(record, ensure_ascii=False) + "\n")
+                if record["status"] == "done":
+                    documents[rel] = load_document(out_dir, rel)
+                    rewritten.add(rel)
+                elif record["status"] == "skipped":
+                    documents.pop(rel, None)
+                # A failed parse (often a half-saved edit) keeps the last good docs until the next save
+
+                symbols = record["cache_hits"] + record["cache_misses"]
+                mark = {"done": "✏️", "skipped": "⏭️", "failed": "💥"}[record["status"]]
+                print(f"{mark} {rel}: {record['cache_misses']} of {symbols} snippets changed ({record['seconds'] * 1000:.0f}ms)"
+                      + (f" {record['error']}" if "error" in record else ""), flush=True)
+            for rel in removed:
+                remove_outputs(out_dir, rel)
+                documents.pop(rel, None)
+                print(f"🗑️ {rel}", flush=True)
+
+        if "html" in args.formats and (rewritten or set(documents) != files_before):
+            # Page slugs are numbered by position, so adding or removing a file means rewriting every page
+            pages = rewritten if set(documents) == files_before else None
+            build_site(out_dir, [documents[rel] for rel in sorted(documents)], pages=pages)
+        print(f"🔁 Updated in {(time.perf_counter() - started) * 1000:.0f}ms", flush=True)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Generate documentation for a source tree or archive.")
+    arg_parser.add_argument("source", help="directory, .zip or .tar(.gz) archive")
+    arg_parser.add_argument("-o", "--out", default="codescroll-docs", help="output directory")
+    arg_parser.add_argument("--formats", nargs="+", choices=FORMATS, default=["html", "json"])
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="parser processes")
+    arg_parser.add_argument("--rpm", type=float, default=15, help="Gemini requests per minute across all workers (0: no limit)")
+    arg_parser.add_argument("--batch-size", type=int, default=5, help="snippets per Gemini request")
+    arg_parser.add_argument("--deadline", type=float, default=0, help="seconds of describing per file; the rest is marked pending (0: no limit)")
+    arg_parser.add_argument("--cache", help="description cache file (default <out>/descriptions.sqlite)")
+    arg_parser.add_argument("--restart", action="store_true", help="ignore the manifest and redo every file")
+    arg_parser.add_argument("--include-hidden", action="store_true", help="also walk dot-files and dot-directories")
+    arg_parser.add_argument("--verbose", action="store_true", help="show the pipeline's own log lines")
+    arg_parser.add_argument("--watch", action="store_true", help="keep running and re-document files as they change")
+    arg_parser.add_argument("--interval", type=float, default=1.0, help="seconds between checks for changes in --watch mode")
+    args = arg_parser.parse_args()
+
+    if not (os.getenv("GEMINI_API_KEY") or GEMINI_API_ENDPOINT):
+        sys.exit("💥 Set GEMINI_API_KEY (or GEMINI_API_ENDPOINT for a local stand-in) to describe snippets")
+    if args.watch and not os.path.isdir(args.source):
+        sys.exit("💥 --watch needs a directory, not an archive")
+
+    out_dir = os.path.abspath(args.out)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, "manifest.jsonl")
+    cache_path = args.cache or os.path.join(out_dir, "descriptions.sqlite")
+    log_level = logging.INFO if args.verbose else logging.WARNING
+    logging.getLogger("codescroll").setLevel(log_level)
+
+    with tempfile.TemporaryDirectory(prefix="codescroll-") as tmp:
+        root = args.source
+        if not os.path.isdir(root):
+            root = os.path.join(tmp, "src")
+            extract_archive(args.source, root)
+
+        sources = find_sources(root, args.include_hidden)
+        if args.restart and os.path.exists(manifest_path):
+            os.remove(manifest_path)
+        previous = load_manifest(manifest_path)
+
+        pending = [(path, rel) for path, rel in sources if not is_current(previous.get(rel), file_digest(path), out_dir, args.formats)]
+        pending_rels = {rel for _, rel in pending}
+        done = [rel for _, rel in sources if rel not in pending_rels]
+        print(f"📂 {len(sources)} files, {len(done)} already documented, {len(pending)} to go "
+              f"({args.workers} workers, {args.rpm:g} requests/min)", flush=True)
+
+        failed = []
+        hits = misses = undescribed = unfinished = 0
+        started = time.perf_counter()
+        limiter = RateLimiter(args.rpm)
+        pool = ProcessPoolExecutor(
+            max_workers=max(1, min(args.workers, len(pending) or 1)),
+            initializer=init_worker,
+            initargs=(cache_path, limiter, args.batch_size, log_level),
+        )
+        try:
+            futures = {pool.submit(document_file, path, rel, out_dir, args.formats, args.deadline): rel for path, rel in pending}
+            with open(manifest_path, "a", encoding="utf-8") as manifest:
+                for finished, future in enumerate(as_completed(futures), 1):
+                    try:
+                        record = future.result()
+                    except Exception as e:
+                        # The worker itself died (out of memory, killed); the file goes down as failed
+                        record = {"path": futures[future], "status": "failed", "error": f"{type(e).__name__}: {e}",
+                                  "outputs": [], "seconds": 0.0, "cache_hits": 0, "cache_misses": 0, "failed_descriptions": 0}
+                    manifest.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    manifest.flush()
+
+                    hits += record["cache_hits"]
+                    misses += record["cache_misses"]
+                    undescribed += record["failed_descriptions"]
+                    unfinished += record.get("pending_descriptions", 0)
+                    if record["status"] == "done":
+                        done.append(record["path"])
+                    elif record["status"] == "failed":
+                        failed.append(record)
+                    mark = {"done": "✅", "skipped": "⏭️", "failed": "💥"}[record["status"]]
+                    print(f"[{finished}/{len(pending)}] {mark} {record['path']} ({record['seconds']:.1f}s)"
+                          + (f" {record['error']}" if "error" in record else ""), flush=True)
+        except KeyboardInterrupt:
+            pool.shutdown(wait=False, cancel_futures=True)
+            print(f"🛑 Interrupted; run the same command again to pick up where this left off ({manifest_path})")
+            sys.exit(130)
+        pool.shutdown()
+
+    # Sorted so the site lists files in tree order whatever order they finished in
+    done = sorted(set(done))
+    if "html" in args.formats and done:
+        index = build_site(out_dir, [load_document(out_dir, rel) for rel in done])
+        print(f"🌐 {index}")
+
+    elapsed = time.perf_counter() - started
+    print(f"🏁 {len(done)} documented, {len(failed)} failed in {elapsed:.1f}s; "
+          f"descriptions: {hits} cached, {misses} from Gemini"
+          + (f", {undescribed} failed (re-run to retry them)" if undescribed else "")
+          + (f", {unfinished} pending after the deadline (re-run to describe them)" if unfinished else ""))
+
+    if args.watch:
+        try:
+            watch(os.path.abspath(args.source), out_dir, done, args, manifest_path, cache_path, log_level)
+        except KeyboardInterrupt:
+            print("🛑 Stopped watching")
+        sys.exit(0)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+# parser/admission.py
+import os
+import math
+import asyncio
+import time
+import threading
+from collections import deque
+
+
+class TokenBucket:
+    def __init__(self, rate_per_second, capacity):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        # ``now`` may predate the bucket (admit reads the clock first); that's no time passed, not negative time
+        self.tokens = min(self.capacity, self.tokens + max(now - self.updated, 0) * self.rate)
+        self.updated = max(now, self.updated)
+
+    def try_take(self, now):
+        """Take one token; returns 0 on success or the seconds until one will be available."""
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else math.inf
+
+    def give_back(self):
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class Ticket:
+    def __init__(self, controller, client_id):
+        self.controller = controller
+        self.client_id = client_id
+        self.active = False
+        self.released = False
+        self.started = None
+        # Set while an async waiter is parked on this ticket; called to wake it
+        self.waker = None
+
+    def wait_for_slot(self, token=None):
+        self.controller.wait_for_slot(self, token)
+
+    async def wait_for_slot_async(self, token=None):
+        await self.controller.wait_for_slot_async(self, token)
+
+    def release(self):
+        self.controller.release(self)
+
+
+class AdmissionController:
+    """Token-bucket rate limits (per client and global) in front of a bounded generation queue.
+
+    At most ``max_active`` generations run at once; up to ``max_pending`` more
+    wait for a slot and get one in the order they were admitted. Anything beyond
+    that is rejected with a Retry-After estimated from how fast the queue has
+    been draining.
+    """
+
+    DRAIN_WINDOW_SECONDS = 300
+
+    def __init__(self, client_rate, client_burst, global_rate, global_burst, max_active, max_pending):
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.max_active = max_active
+        self.max_pending = max_pending
+
+        self._cond = threading.Condition()
+        self._client_buckets = {}
+        self._completions = deque()
+        self._durations = deque(maxlen=50)
+        self._waiting = deque()
+        self.active = 0
+        self.pending = 0
+        self.rejected_total = 0
+
+    # 📈 Queue drain estimate ----------------------------------------------
+
+    def drain_rate(self, now=None):
+        """Generations finished per second, measured over the recent window."""
+        now = now or time.monotonic()
+        while self._completions and now - self._completions[0] > self.DRAIN_WINDOW_SECONDS:
+            self._completions.popleft()
+        if len(self._completions) >= 2:
+            span = max(now - self._completions[0], 1.0)
+            return len(self._completions) / span
+        if self._durations:
+            # Nothing recent to measure yet: assume every slot finishes at the average pace
+            return self.max_active / (sum(self._durations) / len(self._durations))
+        return 0.0
+
+    def queue_wait_estimate(self, now=None):
+        """Seconds until a newcomer would reach the front of the queue at the current drain rate."""
+        rate = self.drain_rate(now)
+        if rate <= 0:
+            return 30.0
+        return (self.pending + 1) / rate
+
+    # 🚪 Admission ---------------------------------------------------------
+
+    def admit(self, client_id):
+        """Reserve a place in the queue for this client, or raise AdmissionRejected."""
+        now = time.monotonic()
+        with self._cond:
+            if self.active + self.pending >= self.max_active + self.max_pending:
+                self.rejected_total += 1
+                raise AdmissionRejected("Server is busy, too many generations queued", self.queue_wait_estimate(now))
+
+            bucket = self._client_buckets.get(client_id)
+            if bucket is None:
+                bucket = self._client_buckets[client_id] = TokenBucket(self.client_rate, self.client_burst)
+                self._forget_idle_clients(now)
+
+            wait = bucket.try_take(now)
+            if wait:
+                self.rejected_total += 1
+                raise AdmissionRejected("Too many generations started from this client", wait)
+
+            wait = self.global_bucket.try_take(now)
+            if wait:
+                bucket.give_back()
+                self.rejected_total += 1
+                raise AdmissionRejected("Server is at its generation rate limit", wait)
+
+            self.pending += 1
+            ticket = Ticket(self, client_id)
+            self._waiting.append(ticket)
+            return ticket
+
+    def _forget_idle_clients(self, now):
+        # Full buckets carry no state worth keeping
+        if len(self._client_buckets) < 10000:
+            return
+        for client_id, bucket in list(self._client_buckets.items()):
+            bucket._refill(now)
+            if bucket.tokens >= bucket.capacity:
+                del self._client_buckets[client_id]
+
+    def _notify(self):
+        # Call with _cond held: wake thread waiters and event-loop waiters alike
+        self._cond.notify_all()
+        for ticket in self._waiting:
+            if ticket.waker:
+                ticket.waker()
+
+    def _wake(self):
+        with self._cond:
+            self._notify()
+
+    def _try_activate(self, ticket):
+        with self._cond:
+            if ticket.active:
+                return True
+            # 🧍 First come, first served: only the head of the queue may take a free slot
+            if self.active < self.max_active and self._waiting and self._waiting[0] is ticket:
+                self._waiting.popleft()
+                self.pending -= 1
+                self.active += 1
+                ticket.active = True
+                ticket.started = time.monotonic()
+                # The next in line may fit too
+                self._notify()
+                return True
+            return False
+
+    def wait_for_slot(self, ticket, token=None):
+        if token:
+            token.add_callback(self._wake)
+        try:
+            with self._cond:
+                while not self._try_activate(ticket):
+                    if token:
+                        token.raise_if_cancelled("queue wait")
+                    self._cond.wait()
+        finally:
+            if token:
+                token.remove_callback(self._wake)
+
+    async def wait_for_slot_async(self, ticket, token=None):
+        loop = asyncio.get_running_loop()
+        woke = asyncio.Event()
+        wake = lambda: loop.call_soon_threadsafe(woke.set)
+        ticket.waker = wake
+        if token:
+            token.add_callback(wake)
+        try:
+            while not self._try_activate(ticket):
+                if token:
+                    token.raise_if_cancelled("queue wait")
+                await woke.wait()
+                woke.clear()
+        finally:
+            ticket.waker = None
+            if token:
+                token.remove_callback(wake)
+
+    def release(self, ticket):
+        with self._cond:
+            if ticket.released:
+                return
+            ticket.released = True
+            if ticket.active:
+                now = time.monotonic()
+                self.active -= 1
+                self._completions.append(now)
+                self._durations.append(max(now - ticket.started, 0.001))
+            else:
+                self.pending -= 1
+                self._waiting.remove(ticket)
+            self._notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "active": self.active,
+                "pending": self.pending,
+                "max_active": self.max_active,
+                "max_pending": self.max_pending,
+                "rejected_total": self.rejected_total,
+                "drain_rate_per_second": round(self.drain_rate(), 4),
+            }
+
+
+def controller_from_env():
+    """Build an AdmissionController from CODESCROLL_ADMISSION_* environment settings (rates are per minute)."""
+    return AdmissionController(
+        client_rate=float(os.getenv("CODESCROLL_ADMISSION_CLIENT_PER_MIN", "6")) / 60,
+        client_burst=int(os.getenv("CODESCROLL_ADMISSION_CLIENT_BURST", "3")),
+        global_rate=float(os.getenv("CODESCROLL_ADMISSION_GLOBAL_PER_MIN", "60")) / 60,
+        global_burst=int(os.getenv("CODESCROLL_ADMISSION_GLOBAL_BURST", "20")),
+        max_active=int(os.getenv("CODESCROLL_ADMISSION_MAX_ACTIVE", "8")),
+        max_pending=int(os.getenv("CODESCROLL_ADMISSION_MAX_PENDING", "16")),
+    )
@@ -0,0 +1,120 @@
+# parser/budget.py
+import os
+import re
+import math
+import time
+
+# ⏳ Best-effort generation under a deadline
+#
+# A generation can be given a time budget. Its describe targets are then ranked
+# so public classes and functions go to Gemini first and small control-flow
+# blocks last, and whatever is still undescribed when the budget runs out gets a
+# description built from the code's own structure instead, marked as pending.
+# Pending descriptions are never cached, so the next run describes them properly.
+
+# Seconds per generation; 0 means no deadline
+DEFAULT_BUDGET = float(os.getenv("CODESCROLL_GENERATION_BUDGET", "0"))
+
+PENDING_NOTE = "(Description pending.)"
+
+# Base importance per snippet type; anything not listed ranks with control flow
+TYPE_WEIGHTS = {
+    "class": 100,
+    "function": 80,
+    "CSS media query": 40,
+    "CSS rule": 30,
+    "HTML tag": 30,
+    "try block": 20,
+    "while loop": 15,
+    "for loop": 15,
+    "if statement": 10,
+}
+PRIVATE_PENALTY = 30
+# Control flow shorter than this is usually a guard clause or a one-line loop
+TRIVIAL_CHARS = 80
+TRIVIAL_PENALTY = 5
+
+_TAG_NAME = re.compile(r"<\s*([\w-]+)")
+
+
+class Deadline:
+    """A point in time a generation should be done by; ``Deadline(0)`` never expires."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds or 0
+        self.at = time.monotonic() + self.seconds if self.seconds > 0 else None
+
+    def __bool__(self):
+        return self.at is not None
+
+    def remaining(self):
+        return max(self.at - time.monotonic(), 0.0) if self.at is not None else math.inf
+
+    def expired(self):
+        return self.at is not None and time.monotonic() >= self.at
+
+
+def generation_deadline(seconds=None):
+    """The deadline for a generation asking for ``seconds`` (None: CODESCROLL_GENERATION_BUDGET)."""
+    return Deadline(DEFAULT_BUDGET if seconds is None else seconds)
+
+
+def is_private(name):
+    return bool(name) and name.startswith("_") and not (name.startswith("__") and name.endswith("__"))
+
+def importance(target):
+    """Higher goes to Gemini sooner: public API first, bigger before smaller, trivial control flow last."""
+    snippet, typ, entry, _ = target
+    score = TYPE_WEIGHTS.get(typ, TYPE_WEIGHTS["if statement"])
+    if is_private(entry.get("name")):
+        score -= PRIVATE_PENALTY
+    if typ not in ("class", "function") and len(snippet) < TRIVIAL_CHARS:
+        score -= TRIVIAL_PENALTY
+    # Size only breaks ties within a type: log2 of a 10 kB class is ~13
+    return score + math.log2(len(snippet) + 1)
+
+def rank(targets):
+    """Targets most important first; equal scores keep their original order."""
+    return sorted(targets, key=importance, reverse=True)
+
+
+def placeholder(snippet, typ, entry):
+    """A description built from the extracted structure alone, for when Gemini didn't get to it."""
+    name = entry.get("name")
+    if typ == "class":
+        methods = [m.get("name") for m in entry.get("methods") or [] if m.get("name")]
+        text = f"Class `{name}`" + (f" with methods {', '.join(f'`{m}`' for m in methods[:5])}" if methods else "")
+        text += ", and more." if len(methods) > 5 else "."
+    elif typ == "function":
+        text = f"Function `{name}({', '.join(entry.get('params') or [])})`"
+        returns = entry.get("returns")
+        text += f" returning `{returns}`." if returns not in (None, "None", "Unknown") else "."
+    elif typ == "HTML tag":
+        tag = _TAG_NAME.match(snippet)
+        text = f"`<{tag.group(1)}>` element." if tag else "HTML element."
+    elif typ.startswith("CSS"):
+        text = f"{typ} for `{entry.get('selector')}`."
+    elif entry.get("condition"):
+        text = f"{typ[0].upper()}{typ[1:]} on `{entry['condition']}`."
+    else:
+        text = f"{typ[0].upper()}{typ[1:]}."
+    return f"{text} {PENDING_NOTE}"
+
+def is_pending(description):
+    return isinstance(description, str) and description.endswith(PENDING_NOTE)
+
+def fill_pending(targets):
+    """Give every target a placeholder description; returns how many there were."""
+    count = 0
+    for snippet, typ, entry, key in targets:
+        entry[key] = placeholder(snippet, typ, entry)
+        count += 1
+    return count
+
+def count_pending(parsed):
+    """Pending descriptions anywhere in a parse result."""
+    if isinstance(parsed, dict):
+        return sum(count_pending(value) for value in parsed.values())
+    if isinstance(parsed, list):
+        return sum(count_pending(value) for value in parsed)
+    return 1 if is_pending(parsed) else 0
@@ -0,0 +1,157 @@
+# parser/cancellation.py
+import os
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from parser.log import get_logger
+from parser.metrics import CallbackMetric
+
+log = get_logger("cancellation")
+
+# 🧵 Blocking Gemini SDK calls run here so the request worker can walk away from them.
+# A call walked away from keeps its thread until it returns or times out (GEMINI_CALL_TIMEOUT),
+# so the pool is sized on its own, with room for those on top of the calls still wanted.
+# (REST calls don't come through here: gemini_client aborts those by closing the socket.)
+CALL_THREADS = int(os.getenv("CODESCROLL_CALL_THREADS", "64"))
+_call_pool = ThreadPoolExecutor(max_workers=CALL_THREADS, thread_name_prefix="gemini-call")
+
+# 🪦 Calls abandoned on cancel that are still holding a pool thread
+_abandoned = 0
+_abandoned_lock = threading.Lock()
+
+def _abandon(future):
+    global _abandoned
+    with _abandoned_lock:
+        _abandoned += 1
+    future.add_done_callback(_settled)
+
+def _settled(_):
+    global _abandoned
+    with _abandoned_lock:
+        _abandoned -= 1
+
+CallbackMetric("gauge", "codescroll_abandoned_calls", "Gemini calls abandoned on cancel that still hold a pool thread.",
+               lambda: {(): _abandoned})
+
+
+class GenerationCancelled(Exception):
+    """Raised inside a generation once its token has been cancelled."""
+
+
+class CancellationToken:
+    """Cooperative cancel signal shared by parse, describe and render for one generation."""
+
+    def __init__(self, generation_id=None):
+        self.generation_id = generation_id
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self.cancelled_at = None
+        self.released_at = None
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.cancelled_at = time.monotonic()
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+
+        # 🔔 Wake everything that is waiting on this generation
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                log.warning("💥 cancel callback failed", generation_id=self.generation_id, error=str(e))
+        return True
+
+    def add_callback(self, callback):
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def raise_if_cancelled(self, where="generation"):
+        if self._event.is_set():
+            raise GenerationCancelled(f"Generation cancelled by user during {where}")
+
+    def sleep(self, seconds):
+        """time.sleep replacement that wakes up (and raises) as soon as the token is cancelled."""
+        if self._event.wait(seconds):
+            raise GenerationCancelled("Generation cancelled by user while waiting for rate limit")
+
+    def call(self, fn, *args, **kwargs):
+        """Run a blocking call on the shared pool, abandoning it the moment the token is cancelled."""
+        self.raise_if_cancelled("describe")
+
+        finished = threading.Event()
+        future = _call_pool.submit(fn, *args, **kwargs)
+        future.add_done_callback(lambda _: finished.set())
+        self.add_callback(finished.set)
+        try:
+            finished.wait()
+        finally:
+            self.remove_callback(finished.set)
+
+        if not future.done():
+            # 🪦 The call keeps its own timeout; we just stop waiting for it
+            if not future.cancel():
+                _abandon(future)
+            raise GenerationCancelled("Generation cancelled by user during describe")
+        return future.result()
+
+    async def sleep_async(self, seconds):
+        """asyncio.sleep replacement that wakes up (and raises) as soon as the token is cancelled."""
+        loop = asyncio.get_running_loop()
+        woke = asyncio.Event()
+        wake = lambda: loop.call_soon_threadsafe(woke.set)
+        self.add_callback(wake)
+        try:
+            await asyncio.wait_for(woke.wait(), seconds)
+        except asyncio.TimeoutError:
+            return
+        finally:
+            self.remove_callback(wake)
+        raise GenerationCancelled("Generation cancelled by user while waiting for rate limit")
+
+    async def call_async(self, coro):
+        """Await a coroutine as a task that gets cancelled the moment the token is cancelled."""
+        if self._event.is_set():
+            coro.close()
+            self.raise_if_cancelled("describe")
+
+        loop = asyncio.get_running_loop()
+        task = asyncio.ensure_future(coro)
+        abort = lambda: loop.call_soon_threadsafe(task.cancel)
+        self.add_callback(abort)
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if not self._event.is_set():
+                raise
+            raise GenerationCancelled("Generation cancelled by user during describe")
+        finally:
+            self.remove_callback(abort)
+
+    def mark_released(self):
+        """Record that the worker let go of this generation; returns cancel→release seconds if cancelled."""
+        self.released_at = time.monotonic()
+        return self.release_latency
+
+    @property
+    def release_latency(self):
+        if self.cancelled_at is None or self.released_at is None:
+            return None
+        return max(0.0, self.released_at - self.cancelled_at)
@@ -0,0 +1,118 @@
+# parser/description_cache.py
+import os
+import sqlite3
+import hashlib
+import threading
+import time
+
+from parser.render_cache import file_digest
+from parser.budget import is_pending
+
+# 🗄️ Gemini descriptions keyed by snippet type + snippet text
+#
+# One SQLite file can be shared by every worker process of a batch run and by
+# later runs, so only snippets nobody has described yet go to Gemini. WAL mode
+# lets readers and a writer work at the same time.
+
+DESCRIPTION_CACHE_VERSION = 1
+
+# Answers describe_snippet gives when it couldn't get a description; never cached
+FAILED_PREFIXES = ("Error:", "Failed to generate description")
+
+_prompt_version = None
+
+def prompt_version():
+    """Changes whenever gemini_client.py does (prompt, model), so old descriptions aren't reused."""
+    global _prompt_version
+    if _prompt_version is None:
+        path = os.path.join(os.path.dirname(__file__), "gemini_client.py")
+        _prompt_version = f"{DESCRIPTION_CACHE_VERSION}:{file_digest(path)[:16]}"
+    return _prompt_version
+
+def is_failed(description):
+    return not isinstance(description, str) or description.startswith(FAILED_PREFIXES)
+
+def count_unfinished(parsed):
+    """Failed or pending (see parser/budget.py) descriptions anywhere in a parse result."""
+    if isinstance(parsed, dict):
+        return sum(count_unfinished(value) for value in parsed.values())
+    if isinstance(parsed, list):
+        return sum(count_unfinished(value) for value in parsed)
+    return 1 if isinstance(parsed, str) and (is_failed(parsed) or is_pending(parsed)) else 0
+
+def snippet_key(snippet, typ):
+    return hashlib.sha256(f"{prompt_version()}\0{typ}\0{snippet}".encode("utf-8")).hexdigest()
+
+
+class DescriptionCache:
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _conn(self):
+        # sqlite3 connections stay on the thread that opened them
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS descriptions (key TEXT PRIMARY KEY, description TEXT NOT NULL, created REAL NOT NULL)"
+            )
+        return conn
+
+    def get_many(self, keys):
+        """``{key: description}`` for the keys that are cached."""
+        found = {}
+        keys = list(dict.fromkeys(keys))
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            rows = self._conn().execute(
+                f"SELECT key, description FROM descriptions WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            found.update(rows)
+        return found
+
+    def put_many(self, items):
+        """Store ``(key, description)`` pairs, skipping failed and pending descriptions."""
+        rows = [(key, desc, time.time()) for key, desc in items if not is_failed(desc) and not is_pending(desc)]
+        if not rows:
+            return
+        conn = self._conn()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO descriptions (key, description, created) VALUES (?, ?, ?)", rows)
+
+    def fill(self, targets):
+        """Write cached descriptions into ``(snippet, type, entry, key)`` targets; returns the ones still to describe."""
+        keys = [snippet_key(snippet, typ) for snippet, typ, _, _ in targets]
+        cached = self.get_many(keys)
+        missing = []
+        for target, key in zip(targets, keys):
+            if key in cached:
+                _, _, entry, entry_key = target
+                entry[entry_key] = cached[key]
+            else:
+                missing.append(target)
+        with self._lock:
+            self.hits += len(targets) - len(missing)
+            self.misses += len(missing)
+        return missing
+
+    def store(self, targets):
+        """Cache the descriptions describe_targets wrote into a batch of targets."""
+        described = [(snippet_key(snippet, typ), entry[key]) for snippet, typ, entry, key in targets]
+        with self._lock:
+            self.failures += sum(1 for _, desc in described if is_failed(desc))
+        self.put_many(described)
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,194 @@
+# parser/doc_model.py
+import re
+
+# 🧱 Typed document model
+#
+# Parsing (and the parse cache) produce plain nested dicts. Right after parsing
+# they are turned into a Document once: slotted records, CSS comments stripped,
+# skipped sections dropped, and the column layout of every table decided. The
+# HTML, PDF and search-index renderers then only read from it.
+
+_BLOCK_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+
+def strip_block_comments(value):
+    if isinstance(value, str):
+        return _BLOCK_COMMENT.sub("", value).strip()
+    return value
+
+def clean_declarations(values):
+    # A declaration that was only a comment leaves a bare ";" behind
+    return tuple(v for v in (strip_block_comments(v) for v in values or ()) if v and v.strip("; "))
+
+
+class Record:
+    __slots__ = ()
+
+    @classmethod
+    def from_dict(cls, entry):
+        record = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(record, name, entry.get(name))
+        return record
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class Function(Record):
+    __slots__ = ("name", "params", "docstring", "returns")
+
+
+class Class(Record):
+    __slots__ = ("name", "docstring", "methods")
+
+    @classmethod
+    def from_dict(cls, entry):
+        record = super().from_dict(entry)
+        record.methods = tuple(Function.from_dict(m) for m in entry.get("methods") or ())
+        return record
+
+
+class Case(Record):
+    __slots__ = ("pattern", "statements")
+
+
+class Statement(Record):
+    __slots__ = ("condition", "lineno", "description", "cases")
+
+    @classmethod
+    def from_dict(cls, entry):
+        record = super().from_dict(entry)
+        if record.cases is not None:
+            record.cases = tuple(Case.from_dict(case) for case in record.cases)
+        return record
+
+
+class Tag(Record):
+    # "class" can't be written as an attribute name, but the template reads it as el.class
+    __slots__ = ("lineno", "id", "class", "attrs", "description")
+
+
+class CssRule(Record):
+    __slots__ = ("selector", "lineno", "name", "description", "elements")
+
+    @classmethod
+    def from_dict(cls, entry):
+        record = super().from_dict(entry)
+        record.selector = strip_block_comments(record.selector)
+        record.name = strip_block_comments(record.name)
+        record.description = strip_block_comments(record.description)
+        record.elements = clean_declarations(record.elements)
+        return record
+
+
+class MediaBlock(Record):
+    __slots__ = ("selector", "properties")
+
+    @classmethod
+    def from_dict(cls, entry):
+        record = super().from_dict(entry)
+        record.selector = strip_block_comments(record.selector)
+        record.properties = clean_declarations(record.properties)
+        return record
+
+
+class MediaRule(Record):
+    __slots__ = ("selector", "lineno", "name", "description", "size", "elements")
+
+    @classmethod
+    def from_dict(cls, entry):
+        record = super().from_dict(entry)
+        record.selector = strip_block_comments(record.selector)
+        record.name = strip_block_comments(record.name)
+        record.description = strip_block_comments(record.description)
+        record.size = strip_block_comments(record.size)
+        record.elements = tuple(MediaBlock.from_dict(el) for el in record.elements or () if isinstance(el, dict))
+        return record
+
+
+class Section:
+    """One table of a document: ``kind`` is classes/functions/statements/tags/css, ``key`` the keyword, tag or tab."""
+
+    __slots__ = ("kind", "key", "title", "columns", "records")
+
+    def __init__(self, kind, key, title, columns, records):
+        self.kind = kind
+        self.key = key
+        self.title = title
+        self.columns = columns  # ((field, header), ...) in display order
+        self.records = records
+
+
+class Document:
+    """A parsed file, normalized once and shared read-only by every renderer."""
+
+    __slots__ = ("filename", "ext", "mode", "sections")
+
+    def __init__(self, filename, ext, mode, sections):
+        self.filename = filename
+        self.ext = ext
+        self.mode = mode  # "code", "html" or "css"
+        self.sections = sections
+
+    def sections_of(self, kind):
+        return [section for section in self.sections if section.kind == kind]
+
+    def row_count(self):
+        return sum(len(section.records) for section in self.sections)
+
+
+CLASS_COLUMNS = (("name", "Name"), ("methods", "Methods"), ("docstring", "Description"))
+FUNCTION_COLUMNS = (("name", "Name"), ("params", "Params"), ("returns", "Returns"), ("docstring", "Description"))
+CSS_RULE_COLUMNS = (("lineno", "Line No."), ("name", "Name"), ("description", "Description"), ("elements", "Elements"))
+MEDIA_RULE_COLUMNS = (
+    ("lineno", "Line No."), ("name", "Name"), ("description", "Description"), ("size", "Size"), ("elements", "Elements")
+)
+
+def statement_columns(keyword):
+    columns = [("lineno", "Line No."), ("condition", "Caught error name" if keyword == "try" else "Condition")]
+    if keyword == "switch":
+        columns.append(("cases", "Cases"))
+    columns.append(("description", "Description"))
+    return tuple(columns)
+
+def tag_columns(tag):
+    if tag in ("script", "link"):
+        return (("lineno", "Line No."), ("attrs", "Attributes"), ("description", "Description"))
+    return (("lineno", "Line No."), ("id", "Id"), ("class", "Class"), ("attrs", "Attributes"), ("description", "Description"))
+
+def section_sources(data):
+    """``(mode, [(kind, key, entries), ...])`` for one parse result: the raw entries behind each Section, in page order."""
+    if "html_tags" in data:
+        return "html", [("tags", tag, entries) for tag, entries in data["html_tags"].items()]
+
+    if all(key in data for key in ("classes", "ids", "media")):
+        # Plain tag selectors aren't documented anywhere, so they're left out here
+        return "css", [("css", "Classes", data["classes"]), ("css", "IDs", data["ids"]), ("css", "Media Queries", data["media"])]
+
+    sources = [("classes", "classes", data.get("classes", [])), ("functions", "functions", data.get("functions", []))]
+    for keyword, entries in data.get("control_flows", {}).items():
+        if keyword in ["with",]:
+            continue
+        sources.append(("statements", keyword, entries))
+    return "code", sources
+
+def build_section(kind, key, entries, ext):
+    """One Section from its raw entries (see section_sources)."""
+    if kind == "tags":
+        return Section(kind, key, f"{key.capitalize()} Tags", tag_columns(key), tuple(Tag.from_dict(e) for e in entries))
+    if kind == "css":
+        if key == "Media Queries":
+            return Section(kind, key, "Media", MEDIA_RULE_COLUMNS, tuple(MediaRule.from_dict(e) for e in entries))
+        return Section(kind, key, key.capitalize(), CSS_RULE_COLUMNS, tuple(CssRule.from_dict(e) for e in entries))
+    if kind == "classes":
+        return Section(kind, key, "Classes", CLASS_COLUMNS, tuple(Class.from_dict(e) for e in entries))
+    if kind == "functions":
+        return Section(kind, key, "Functions", FUNCTION_COLUMNS, tuple(Function.from_dict(e) for e in entries))
+    title = "Match Statements" if key == "switch" and ext == ".py" else f"{key.capitalize()} Statements"
+    return Section(kind, key, title, statement_columns(key), tuple(Statement.from_dict(e) for e in entries))
+
+def build_document(filename, data, ext):
+    """Normalize one parse result (as returned by parse_file_by_type) into a Document."""
+    mode, sources = section_sources(data)
+    return Document(filename, ext, mode, [build_section(kind, key, entries, ext) for kind, key, entries in sources])
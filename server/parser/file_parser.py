@@ -1,1098 +1,550 @@
-import ast
+import asyncio
+import io
 import json
 import os
-from jinja2 import Template, Environment, FileSystemLoader
-import re
 from collections import defaultdict
-from bs4 import BeautifulSoup
-import google.generativeai as genai
-from parser.gemini_client import describe_snippet, model
-import json
+from parser.gemini_client import describe_snippet, describe_snippet_async
+from parser.cancellation import CancellationToken, GenerationCancelled
+from parser.render_cache import atomic_write, content_digest
+from parser.languages import LANGUAGES
+from parser.pipeline import TargetStream, PIPELINE_DEPTH
+from parser.budget import rank, fill_pending
+from parser.description_cache import is_failed
+from parser.doc_model import section_sources
+from parser.log import get_logger
+from parser.metrics import PARSE_SECONDS, SNIPPETS_DESCRIBED, ERRORS
 import time  # 🕰️ For spacing requests
+from contextlib import nullcontext
+from itertools import chain, islice
+
+# 💤 Seconds between Gemini batches
+DESCRIBE_COOLDOWN = 5
+
+log = get_logger("parser")
+
+# 🗺️ Extension → extractor (see parser/languages); each parser module is imported the first time a file needs it
+EXTRACTORS = LANGUAGES
+
+# 🧽 Markup languages get a friendlier message when Gemini chokes on a snippet
+INVALID_SYNTAX_FALLBACKS = {
+    ".html": "Could not generate a valid description for this tag.",
+    ".htm": "Could not generate a valid description for this tag.",
+    ".css": "Could not generate a valid description.",
+}
+
+def apply_descriptions(batch, batch_result, invalid_fallback=None):
+    for (_, _, entry, key), desc in zip(batch, batch_result):
+        # Fix potential "invalid syntax" junk responses
+        if invalid_fallback and isinstance(desc, str) and "invalid syntax" in desc.lower():
+            desc = invalid_fallback
+        entry[key] = desc
+
+def report_progress(status, generation_id, completed, total):
+    """``generating:<percent>``, or ``generating:extracting`` while ``total`` isn't known yet."""
+    if status is not None and generation_id is not None:
+        status[generation_id] = "generating:extracting" if total is None else f"generating:{int((completed / total) * 100)}"
+
+def known_total(targets):
+    # A TargetStream only knows how many targets there are once extraction is done
+    return targets.total if isinstance(targets, TargetStream) else len(targets)
+
+def timed(progress, stage):
+    """Time ``stage`` into a GenerationProgress, if the caller is tracking one."""
+    return progress.stage(stage) if progress else nullcontext()
+
+def iter_batches(targets, batch_size):
+    """Consecutive batches from a list of targets or a TargetStream that's still being filled."""
+    targets = iter(targets)
+    while batch := list(islice(targets, batch_size)):
+        yield batch
+
+def describe_targets(targets, generation_id=None, status=None, token=None, batch_size=5, invalid_fallback=None, on_batch=None, progress=None, describe=None, deadline=None):
+    """Describe ``(snippet, type, entry, key)`` targets in spaced-out batches, writing each result into ``entry[key]``.
+
+    ``targets`` can be a TargetStream, in which case batches go out while extraction is still running.
+    ``describe`` stands in for describe_snippet (same signature), e.g. to put a limiter in front of it.
+    Targets still waiting when ``deadline`` (a budget.Deadline) expires, or cut short by it mid-request,
+    get pending placeholders; returns how many did.
+    """
+    describe = describe or describe_snippet
+    token = token or CancellationToken(generation_id)
+    completed = 0
+    pending = 0
+    last_batch = time.perf_counter()
+
+    batches = iter_batches(targets, batch_size)
+    batch = next(batches, None)
+    while batch:
+        if deadline and deadline.expired():
+            return pending + give_up(list(chain(batch, *batches)), generation_id, status, on_batch, progress)
+
+        batch_snippets = [snippet for snippet, _, _, _ in batch]
+        batch_types = [typ for _, typ, _, _ in batch]
+        # ⏳ A request can't run past the deadline either
+        limit = {"timeout": deadline.remaining()} if deadline else {}
+
+        try:
+            with timed(progress, "gemini"):
+                batch_result = describe(batch_snippets, batch_types, generation_id=generation_id, status=status, token=token, **limit)
+        except GenerationCancelled:
+            raise
+        except Exception as e:
+            log.warning("💥 describe batch failed", generation_id=generation_id, batch=completed // batch_size, error=str(e))
+            ERRORS.inc(stage="describe")
+            batch_result = ["Failed to generate description"] * len(batch)
+
+        apply_descriptions(batch, batch_result, invalid_fallback)
+        cut = cut_off(batch, progress) if deadline and deadline.expired() else 0
+        pending += cut
+        SNIPPETS_DESCRIBED.inc(len(batch) - cut)
+        if on_batch:
+            on_batch(batch)
+        if progress:
+            # Measured from the end of the previous batch, so the cooldown counts against throughput
+            now = time.perf_counter()
+            progress.snippets_described(len(batch) - cut, now - last_batch)
+            last_batch = now
+
+        # 🌸 Update progress (no percentage while a stream is still being extracted)
+        completed += len(batch)
+        report_progress(status, generation_id, completed, known_total(targets))
+
+        # 💤 Respect Gemini's cooldown, but wake up right away on cancel
+        batch = next(batches, None)
+        if batch:
+            with timed(progress, "cooldown"):
+                token.sleep(min(DESCRIBE_COOLDOWN, deadline.remaining()) if deadline else DESCRIBE_COOLDOWN)
+
+    # A stream is only known to be exhausted once the last batch is done
+    if completed:
+        report_progress(status, generation_id, completed, known_total(targets))
+    return pending
+
+def count_failed(batch):
+    """Targets in a described batch that came back as Gemini errors rather than descriptions."""
+    return sum(1 for _, _, entry, key in batch if is_failed(entry[key]))
+
+def cut_off(batch, progress):
+    """⏳ A request the deadline timed out: its failed targets get placeholders too; returns how many."""
+    cut = fill_pending([(snippet, typ, entry, key) for snippet, typ, entry, key in batch if is_failed(entry[key])])
+    if cut and progress:
+        progress.snippets_pending(cut)
+    return cut
+
+def give_up(targets, generation_id, status, on_batch, progress):
+    """⏳ Out of budget: the remaining targets get placeholders that a later run can replace."""
+    pending = fill_pending(targets)
+    log.info("⏳ deadline reached", generation_id=generation_id, pending=pending)
+    if on_batch:
+        on_batch(targets)
+    if progress:
+        progress.snippets_pending(pending)
+    report_progress(status, generation_id, 1, 1)
+    return pending
+
+async def describe_targets_async(targets, generation_id=None, status=None, token=None, batch_size=5, invalid_fallback=None, on_batch=None, progress=None, deadline=None):
+    """Same batching (and deadline) as describe_targets, but waits on the event loop instead of a thread."""
+    token = token or CancellationToken(generation_id)
+    total = len(targets)
+    pending = 0
+    last_batch = time.perf_counter()
+
+    for i in range(0, total, batch_size):
+        if deadline and deadline.expired():
+            return pending + give_up(targets[i:], generation_id, status, on_batch, progress)
+
+        batch = targets[i:i + batch_size]
+        batch_snippets = [snippet for snippet, _, _, _ in batch]
+        batch_types = [typ for _, typ, _, _ in batch]
+
+        try:
+            with timed(progress, "gemini"):
+                batch_result = await describe_snippet_async(batch_snippets, batch_types, generation_id=generation_id, status=status, token=token,
+                                                            timeout=deadline.remaining() if deadline else None)
+        except GenerationCancelled:
+            raise
+        except Exception as e:
+            log.warning("💥 describe batch failed", generation_id=generation_id, batch=i // batch_size, error=str(e))
+            ERRORS.inc(stage="describe")
+            batch_result = ["Failed to generate description"] * len(batch)
+
+        apply_descriptions(batch, batch_result, invalid_fallback)
+        cut = cut_off(batch, progress) if deadline and deadline.expired() else 0
+        pending += cut
+        SNIPPETS_DESCRIBED.inc(len(batch) - cut)
+        if on_batch:
+            on_batch(batch)
+        if progress:
+            # Measured from the end of the previous batch, so the cooldown counts against throughput
+            now = time.perf_counter()
+            progress.snippets_described(len(batch) - cut, now - last_batch)
+            last_batch = now
+
+        completed = min(i + batch_size, total)
+        report_progress(status, generation_id, completed, total)
+
+        if completed < total:
+            with timed(progress, "cooldown"):
+                await token.sleep_async(min(DESCRIBE_COOLDOWN, deadline.remaining()) if deadline else DESCRIBE_COOLDOWN)
+
+    return pending
+
+def read_source(file_path, data=None):
+    """``(data, digest)``: a file's bytes from a single read (or the bytes the caller already has) and their sha256.
+
+    Passed on as ``source``, it makes the parse and its cache key come from the
+    same bytes, even if ``file_path`` has been replaced since.
+    """
+    if data is None:
+        with open(file_path, "rb") as f:
+            data = f.read()
+    return data, content_digest(data)
+
+def extract_file(file_path, extractor, generation_id=None, emit=None, source=None):
+    """Run an extractor over a file; returns (result, targets) without calling Gemini.
+
+    ``source`` is the file's ``(data, digest)`` from read_source, if the caller read it already.
+    With ``emit``, each target goes to it as soon as it's found and ``targets`` comes back empty.
+    """
+    name = os.path.basename(file_path)
+    with log.span("read", generation_id=generation_id, file=name) as span:
+        data, _ = source or read_source(file_path)
+        # Same decoding (and newline handling) as open(file_path, encoding="utf-8")
+        content = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8").read()
+        span["chars"] = len(content)
+
+    targets = []
+    found = 0
+
+    def collect(snippet, typ, entry, key):
+        nonlocal found
+        found += 1
+        if emit:
+            emit(snippet, typ, entry, key)
+        else:
+            targets.append((snippet, typ, entry, key))
+
+    language = os.path.splitext(name)[1].lower().lstrip(".")
+    with log.span("parse", generation_id=generation_id, file=name) as span, PARSE_SECONDS.time(language=language):
+        result = extractor(content, collect)
+        span["targets"] = found
+    return result, targets
+
+def stream_targets(file_path, extractor, generation_id=None, batch_size=5, progress=None, descriptions=None, source=None):
+    """Start extracting ``file_path`` on a producer thread; returns the TargetStream to describe from."""
+
+    def extract(emit):
+        with timed(progress, "parse"):
+            return extract_file(file_path, extractor, generation_id, emit=emit, source=source)[0]
+
+    return TargetStream(
+        extract,
+        keep=descriptions.fill if descriptions else None,
+        chunk_size=batch_size,
+        on_done=progress.file_targets if progress else None,
+    )
+
+def parse_file_by_type(file_path, generation_id=None, status=None, token=None, batch_size=5, cache=None, listener=None, progress=None, describe=None, descriptions=None, deadline=None, source=None, partial_ok=False):
+    """Extract and describe one file.
+
+    ``descriptions`` (a DescriptionCache) fills in snippets described before, so
+    only new or changed ones go to ``describe`` (describe_snippet by default).
+    Without a listener or deadline, describing starts while extraction is still
+    running (see parser/pipeline.py). With a ``deadline`` (budget.Deadline) the
+    most important snippets are described first and the rest may come back
+    pending (see parser/budget.py). Results with failed or pending descriptions
+    are cached as partial: only callers passing ``partial_ok`` get them back
+    (for a while, see ParseCache.get), everyone else parses again.
+
+    ``source`` is the file's ``(data, digest)`` from read_source; without it the
+    file is read here. Either way the parse cache is keyed on the digest of the
+    bytes that were parsed, never on a second look at ``file_path``.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    extractor = EXTRACTORS.get(ext)
+    if extractor is None:
+        return None
 
-# 🐍 Python parser
-def parse_python_file(path, generation_id=None, status=None, flags=None, batch_size=5):
-    with open(path, "r", encoding="utf-8") as f:
-        content = f.read()
-        tree = ast.parse(content)
-    attach_parents(tree)
-
-    result = {
-        "classes": [],
-        "functions": [],
-        "control_flows": {
-            "if": [], "for": [], "while": [], "try": [], "switch": [], "with": []
-        }
-    }
-
-    snippets_to_describe = []
-    types_to_describe = []
-    description_targets = []
-    placeholders = []
-
-    for node in ast.walk(tree):
-        if isinstance(node, ast.ClassDef):
-            doc = ast.get_docstring(node)
-            if not doc:
-                snippets_to_describe.append(ast.unparse(node))
-                types_to_describe.append("class")
-                doc = None
-            entry = {"name": node.name, "docstring": doc, "methods": []}
-            placeholders.append(("class", entry))
-            result["classes"].append(entry)
-
-        elif isinstance(node, ast.FunctionDef):
-            doc = ast.get_docstring(node)
-            if not doc:
-                snippets_to_describe.append(ast.unparse(node))
-                types_to_describe.append("function")
-                doc = None
-            func_info = {
-                "name": node.name,
-                "params": [arg.arg for arg in node.args.args],
-                "docstring": doc,
-                "returns": getattr(node.returns, 'id', 'Unknown') if node.returns else "None"
-            }
-            if isinstance(node.parent, ast.ClassDef):
-                for cls in result["classes"]:
-                    if cls["name"] == node.parent.name:
-                        cls["methods"].append(func_info)
-                        break
-            else:
-                placeholders.append(("function", func_info))
-                result["functions"].append(func_info)
-
-        elif isinstance(node, ast.If):
-            snippets_to_describe.append(ast.unparse(node))
-            types_to_describe.append("if statement")
-            result["control_flows"]["if"].append({
-                "condition": ast.unparse(node.test),
-                "lineno": node.lineno,
-                "description": None
-            })
-            description_targets.append(("if", len(result["control_flows"]["if"]) - 1))
-
-        elif isinstance(node, ast.For):
-            snippets_to_describe.append(ast.unparse(node))
-            types_to_describe.append("for loop")
-            result["control_flows"]["for"].append({
-                "condition": f"{ast.unparse(node.target)} in {ast.unparse(node.iter)}",
-                "lineno": node.lineno,
-                "description": None
-            })
-            description_targets.append(("for", len(result["control_flows"]["for"]) - 1))
-
-        elif isinstance(node, ast.While):
-            snippets_to_describe.append(ast.unparse(node))
-            types_to_describe.append("while loop")
-            result["control_flows"]["while"].append({
-                "condition": ast.unparse(node.test),
-                "lineno": node.lineno,
-                "description": None
-            })
-            description_targets.append(("while", len(result["control_flows"]["while"]) - 1))
-
-        elif isinstance(node, ast.Match):
-            case_entries = []
-            for case in node.cases:
-                pattern = "default" if isinstance(case.pattern, ast.MatchAs) and case.pattern.pattern is None else ast.unparse(case.pattern)
-                body = "\n".join(ast.unparse(stmt) for stmt in case.body)
-                case_entries.append({
-                    "pattern": pattern,
-                    "statements": body
-                })
-            result["control_flows"]["switch"].append({
-                "condition": ast.unparse(node.subject),
-                "lineno": node.lineno,
-                "description": f"Match statement with {len(node.cases)} case(s)",
-                "cases": case_entries
-            })
-
-        elif isinstance(node, ast.Try):
-            snippets_to_describe.append(ast.unparse(node))
-            types_to_describe.append("try block")
-            handlers = [h.name or "Exception" for h in node.handlers]
-            result["control_flows"]["try"].append({
-                "condition": ", ".join(handlers),
-                "lineno": node.lineno,
-                "description": None
-            })
-            description_targets.append(("try", len(result["control_flows"]["try"]) - 1))
-
-    # 🌟 Describe in safe spaced-out batches
-    if snippets_to_describe:
-        descriptions = []
-        cooldown = 5
-        total = len(snippets_to_describe)
-
-        for i in range(0, total, batch_size):
-            batch_snippets = snippets_to_describe[i:i + batch_size]
-            batch_types = types_to_describe[i:i + batch_size]
-
-            try:
-                batch_result = describe_snippet(batch_snippets, batch_types, generation_id=generation_id, status=status, flags=flags)
-            except Exception as e:
-                print(f"💥 Gemini failed on batch {i}: {e}")
-                batch_result = ["Failed to generate description"] * len(batch_snippets)
-
-            descriptions.extend(batch_result)
-
-            # 🌸 Update progress
-            completed = min(i + batch_size, total)
-            progress = int((completed / total) * 100)
-            status[generation_id] = f"generating:{progress}"
-            
-            # 🛑 Check for cancellation right here!
-            if flags and flags.get(generation_id) == "cancelled":
-                status[generation_id] = "cancelled"
-                print(f"🛑 Generation {generation_id} was cancelled.")
-                return {"cancelled": True}
-
-            if completed < total:
-                time.sleep(cooldown)
-
-        # 🌼 Slice and fill
-        placeholder_len = len(placeholders)
-        placeholder_descriptions = descriptions[:placeholder_len]
-        control_descriptions = descriptions[placeholder_len:]
-
-        for (_, entry), desc in zip(placeholders, placeholder_descriptions):
-            entry["docstring"] = desc
-
-        for (section, index), desc in zip(description_targets, control_descriptions):
-            result["control_flows"][section][index]["description"] = desc
-
-    cache_path = path + ".docjson"
-    with open(cache_path, "w", encoding="utf-8") as f:
-        json.dump(result, f, indent=2)
-
-    return result
-
-def attach_parents(node, parent=None):
-    for child in ast.iter_child_nodes(node):
-        child.parent = parent
-        attach_parents(child, child)
-
-def js_parser(path, generation_id=None, status=None, flags=None, batch_size=5):
-    with open(path, "r", encoding="utf-8") as f:
-        content = f.read()
-
-    # 🧠 Collect AI targets
-    snippets_to_describe = []
-    types_to_describe = []
-    placeholders = []
-
-    # 📦 Classes
-    class_matches = re.findall(r'class\s+(\w+)\s*{(.*?)}', content, re.DOTALL)
-    classes = []
-    for cls_name, cls_body in class_matches:
-        method_matches = re.findall(r'(\w+)\s*\(([^)]*)\)\s*{', cls_body)
-        methods = []
-        for method_name, params in method_matches:
-            param_list = [p.strip() for p in params.split(",") if p.strip()]
-            methods.append({
-                "name": method_name,
-                "params": param_list,
-                "docstring": None,
-                "returns": "Unknown"
-            })
-        class_entry = {
-            "name": cls_name,
-            "docstring": None,
-            "methods": methods
-        }
-        classes.append(class_entry)
-        snippets_to_describe.append(f"class {cls_name} {{\n{cls_body}\n}}")
-        types_to_describe.append("class")
-        placeholders.append(("class", class_entry))
-
-    # 🌐 Global functions
-    functions = re.findall(r'function\s+(\w+)\s*\(([^)]*)\)', content)
-    function_list = []
-    seen_names = set()
-    for name, params in functions:
-        if name in seen_names:
-            continue
-        param_list = [p.strip() for p in params.split(",") if p.strip()]
-        fn_entry = {
-            "name": name,
-            "params": param_list,
-            "docstring": None,
-            "returns": "Unknown"
-        }
-        function_list.append(fn_entry)
-        seen_names.add(name)
-
-        snippets_to_describe.append(f"function {name}({params}) {{ ... }}")
-        types_to_describe.append("function")
-        placeholders.append(("function", fn_entry))
-
-    # 🔄 Control Flow Statements
-    control_flows = { "if": [], "for": [], "while": [], "switch": [], "try": [] }
-    description_targets = []
-
-    for match in re.finditer(r'\bif\s*\(', content):
-        start = match.end() - 1
-        condition = extract_condition_block(content, start)
-        lineno = content[:match.start()].count('\n') + 1
-        control_flows["if"].append({
-            "condition": condition,
-            "lineno": lineno,
-            "description": None
-        })
-        snippets_to_describe.append(f"if ({condition}) {{ ... }}")
-        types_to_describe.append("if statement")
-        description_targets.append(("if", len(control_flows["if"]) - 1))
-
-    for match in re.finditer(r'\bfor\s*\(', content):
-        start = match.end() - 1
-        condition = extract_condition_block(content, start)
-        lineno = content[:match.start()].count('\n') + 1
-        control_flows["for"].append({
-            "condition": condition,
-            "lineno": lineno,
-            "description": None
-        })
-        snippets_to_describe.append("for(" + condition + ")")
-        types_to_describe.append("for loop")
-        description_targets.append(("for", len(control_flows["for"]) - 1))
-
-    for match in re.finditer(r'\bwhile\s*\(', content):
-        start = match.end() - 1
-        condition = extract_condition_block(content, start)
-        lineno = content[:match.start()].count('\n') + 1
-        control_flows["while"].append({
-            "condition": condition,
-            "lineno": lineno,
-            "description": None
-        })
-        snippets_to_describe.append("while(" + condition + ")")
-        types_to_describe.append("while loop")
-        description_targets.append(("while", len(control_flows["while"]) - 1))
-
-    switch_pattern = re.compile(r'\bswitch\s*\((.*?)\)\s*{(.*?)}', re.DOTALL)
-    for match in switch_pattern.finditer(content):
-        condition = match.group(1).strip()
-        body = match.group(2)
-        case_entries = []
-        case_pattern = re.compile(r'(case\s+.*?:|default\s*:)(.*?)(?=case\s+|default\s*:|$)', re.DOTALL)
-        for case_match in case_pattern.finditer(body):
-            case_label = case_match.group(1).strip().rstrip(":")
-            case_body = case_match.group(2).strip()
-            case_entries.append({
-                "pattern": case_label,
-                "statements": case_body
-            })
-
-        lineno = content[:match.start()].count('\n') + 1
-        control_flows["switch"].append({
-            "condition": condition,
-            "lineno": lineno,
-            "description": f"Switch statement with {len(case_entries)} case(s)",
-            "cases": case_entries
-        })
-
-    for match in re.finditer(r'\btry\s*{', content):
-        lineno = content[:match.start()].count('\n') + 1
-        catch_match = re.search(r'catch\s*\(\s*(\w+)\s*\)', content[match.end():])
-        caught_error = catch_match.group(1) if catch_match else "Unknown"
-        control_flows["try"].append({
-            "condition": caught_error,
-            "lineno": lineno,
-            "description": None
-        })
-        snippets_to_describe.append("try { ... } catch(" + caught_error + ")")
-        types_to_describe.append("try block")
-        description_targets.append(("try", len(control_flows["try"]) - 1))
-
-    # ✨ Ask Gemini in batches with cooldown and progress
-    if snippets_to_describe:
-        descriptions = []
-        cooldown = 5
-        total = len(snippets_to_describe)
-
-        for i in range(0, total, batch_size):
-            batch_snippets = snippets_to_describe[i:i + batch_size]
-            batch_types = types_to_describe[i:i + batch_size]
-
-            try:
-                batch_result = describe_snippet(batch_snippets, batch_types, generation_id=generation_id, status=status, flags=flags)
-            except Exception as e:
-                print(f"💥 Gemini failed on batch {i}: {e}")
-                batch_result = ["Failed to generate description"] * len(batch_snippets)
-
-            descriptions.extend(batch_result)
-
-            completed = min(i + batch_size, total)
-            progress = int((completed / total) * 100)
-            status[generation_id] = f"generating:{progress}"
-            
-            # 🛑 Check for cancellation right here!
-            if flags and flags.get(generation_id) == "cancelled":
-                status[generation_id] = "cancelled"
-                print(f"🛑 Generation {generation_id} was cancelled.")
-                return {"cancelled": True}
-
-            if completed < total:
-                time.sleep(cooldown)
-
-        # 🌟 Slice responses
-        placeholder_len = len(placeholders)
-        placeholder_descriptions = descriptions[:placeholder_len]
-        control_descriptions = descriptions[placeholder_len:]
-
-        # 📚 Fill docstrings for functions and classes
-        for (_, entry), desc in zip(placeholders, placeholder_descriptions):
-            entry["docstring"] = desc
-
-        # 🔮 Fill control flow descriptions
-        for (section, index), desc in zip(description_targets, control_descriptions):
-            control_flows[section][index]["description"] = desc
-
-    # 🗂️ Cache output
-    result = {
-        "classes": classes,
-        "functions": function_list,
-        "control_flows": control_flows
-    }
-
-    with open(path + ".docjson", "w", encoding="utf-8") as f:
-        json.dump(result, f, indent=2)
-
-    return result
-    
-def extract_condition_block(content, start_index):
-    parens = 0
-    condition = ""
-    for i in range(start_index, len(content)):
-        char = content[i]
-        if char == '(':
-            parens += 1
-        elif char == ')':
-            parens -= 1
-        condition += char
-        if parens == 0:
-            break
-    return condition.strip('()')
-
-def java_parser(path, generation_id=None, status=None, flags=None, batch_size=5):
-    with open(path, "r", encoding="utf-8") as f:
-        content = f.read()
-
-    snippets_to_describe = []
-    types_to_describe = []
-    placeholders = []
-    description_targets = []
-
-    # 📦 Classes
-    class_matches = re.findall(r'\bclass\s+(\w+)\s*{(.*?)}', content, re.DOTALL)
-    classes = []
-    for cls_name, cls_body in class_matches:
-        method_matches = re.findall(r'(?:public|private|protected)?\s*(?:static\s+)?(?:[\w<>\[\]]+\s+)+(\w+)\s*\(([^)]*)\)\s*{', cls_body)
-        methods = []
-        for method_name, params in method_matches:
-            param_list = [p.strip() for p in params.split(",") if p.strip()]
-            methods.append({
-                "name": method_name,
-                "params": param_list,
-                "docstring": None,
-                "returns": "Unknown"
-            })
-
-        entry = {
-            "name": cls_name,
-            "docstring": None,
-            "methods": methods
-        }
-        classes.append(entry)
-        snippets_to_describe.append(f"class {cls_name} {{ {cls_body} }}")
-        types_to_describe.append("class")
-        placeholders.append(("class", entry))
-
-    # 🌐 Global functions – Java typically doesn't have them
-    function_list = []
-
-    # 🔄 Control Flow Statements
-    control_flows = {
-        "if": [], "for": [], "while": [], "switch": [], "try": []
-    }
-
-    # If
-    for match in re.finditer(r'\bif\s*\(', content):
-        start = match.end() - 1
-        condition = extract_condition_block(content, start)
-        lineno = content[:match.start()].count('\n') + 1
-        control_flows["if"].append({
-            "condition": condition,
-            "lineno": lineno,
-            "description": None
-        })
-        snippets_to_describe.append("if(" + condition + ") { ... }")
-        types_to_describe.append("if statement")
-        description_targets.append(("if", len(control_flows["if"]) - 1))
-
-    # For
-    for match in re.finditer(r'\bfor\s*\(', content):
-        start = match.end() - 1
-        condition = extract_condition_block(content, start)
-        lineno = content[:match.start()].count('\n') + 1
-        control_flows["for"].append({
-            "condition": condition,
-            "lineno": lineno,
-            "description": None
-        })
-        snippets_to_describe.append("for(" + condition + ") { ... }")
-        types_to_describe.append("for loop")
-        description_targets.append(("for", len(control_flows["for"]) - 1))
-
-    # While
-    for match in re.finditer(r'\bwhile\s*\(', content):
-        start = match.end() - 1
-        condition = extract_condition_block(content, start)
-        lineno = content[:match.start()].count('\n') + 1
-        control_flows["while"].append({
-            "condition": condition,
-            "lineno": lineno,
-            "description": None
-        })
-        snippets_to_describe.append("while(" + condition + ") { ... }")
-        types_to_describe.append("while loop")
-        description_targets.append(("while", len(control_flows["while"]) - 1))
-
-    # Switch
-    switch_pattern = re.compile(r'\bswitch\s*\((.*?)\)\s*{(.*?)}', re.DOTALL)
-    for match in switch_pattern.finditer(content):
-        condition = match.group(1).strip()
-        body = match.group(2)
-
-        case_entries = []
-        case_pattern = re.compile(r'(case\s+.*?:|default\s*:)(.*?)(?=case\s+|default\s*:|$)', re.DOTALL)
-        for case_match in case_pattern.finditer(body):
-            case_label = case_match.group(1).strip().rstrip(":")
-            case_body = case_match.group(2).strip()
-            case_entries.append({
-                "pattern": case_label,
-                "statements": case_body
-            })
-
-        lineno = content[:match.start()].count('\n') + 1
-        control_flows["switch"].append({
-            "condition": condition,
-            "lineno": lineno,
-            "description": f"Switch statement with {len(case_entries)} case(s)",
-            "cases": case_entries
-        })
-
-    # Try-Catch
-    for match in re.finditer(r'\btry\s*{', content):
-        lineno = content[:match.start()].count('\n') + 1
-        catch_match = re.search(r'catch\s*\(\s*\w+\s+(\w+)\s*\)', content[match.end():])
-        caught_error = catch_match.group(1) if catch_match else "Unknown"
-        control_flows["try"].append({
-            "condition": caught_error,
-            "lineno": lineno,
-            "description": None
-        })
-        snippets_to_describe.append("try { ... } catch(" + caught_error + ")")
-        types_to_describe.append("try block")
-        description_targets.append(("try", len(control_flows["try"]) - 1))
-
-    # ✨ Ask Gemini in batches with progress
-    if snippets_to_describe:
-        descriptions = []
-        cooldown = 5
-        total = len(snippets_to_describe)
-
-        for i in range(0, total, batch_size):
-            batch_snippets = snippets_to_describe[i:i + batch_size]
-            batch_types = types_to_describe[i:i + batch_size]
-
-            try:
-                batch_result = describe_snippet(batch_snippets, batch_types, generation_id=generation_id, status=status, flags=flags)
-            except Exception as e:
-                print(f"💥 Gemini failed on batch {i}: {e}")
-                batch_result = ["Failed to generate description"] * len(batch_snippets)
-
-            descriptions.extend(batch_result)
-
-            completed = min(i + batch_size, total)
-            progress = int((completed / total) * 100)
-            status[generation_id] = f"generating:{progress}"
-            
-            # 🛑 Check for cancellation right here!
-            if flags and flags.get(generation_id) == "cancelled":
-                status[generation_id] = "cancelled"
-                print(f"🛑 Generation {generation_id} was cancelled.")
-                return {"cancelled": True}
-
-            if completed < total:
-                time.sleep(cooldown)
-
-        # 🧠 Split responses for placeholders and control flow
-        placeholder_len = len(placeholders)
-        placeholder_descriptions = descriptions[:placeholder_len]
-        control_descriptions = descriptions[placeholder_len:]
-
-        # 🪄 Assign docstrings to classes
-        for (_, entry), desc in zip(placeholders, placeholder_descriptions):
-            entry["docstring"] = desc
-
-        # 🔮 Assign descriptions to control flows
-        for (section, index), desc in zip(description_targets, control_descriptions):
-            control_flows[section][index]["description"] = desc
-
-    result = {
-        "classes": classes,
-        "functions": function_list,
-        "control_flows": control_flows
-    }
-
-    with open(path + ".docjson", "w", encoding="utf-8") as f:
-        json.dump(result, f, indent=2)
-
-    return result
-    
-def extract_condition_block(text, start_pos):
-    """Extracts a condition from a starting '(' position, handling nested parentheses."""
-    count = 0
-    end_pos = start_pos
-    for i in range(start_pos, len(text)):
-        if text[i] == '(':
-            count += 1
-        elif text[i] == ')':
-            count -= 1
-            if count == 0:
-                end_pos = i
-                break
-    return text[start_pos + 1:end_pos].strip()
-
-def extract_brace_block(text, start_index):
-    """Extracts text within matching braces from start_index (which should be '{')"""
-    if text[start_index] != '{':
-        return None, -1
-    stack = 1
-    i = start_index + 1
-    while i < len(text) and stack > 0:
-        if text[i] == '{':
-            stack += 1
-        elif text[i] == '}':
-            stack -= 1
-        i += 1
-    return text[start_index:i], i  # block text, next index
-    
-def cpp_parser(path, generation_id=None, status=None, flags=None, batch_size=5):
-    with open(path, "r", encoding="utf-8") as f:
-        content = f.read()
-
-    snippets_to_describe = []
-    types_to_describe = []
-    description_targets = []
-    placeholders = []
-
-    # 📦 Classes
-    class_matches = re.findall(r'\bclass\s+(\w+)\s*{(.*?)};', content, re.DOTALL)
-    classes = []
-    for cls_name, cls_body in class_matches:
-        method_matches = re.findall(
-            r'(?:public|private|protected)?\s*(?:static\s+)?(?:[\w:<>\[\]]+\s+)+(\w+)\s*\(([^)]*)\)\s*{', cls_body)
-        methods = []
-        for method_name, params in method_matches:
-            param_list = [p.strip() for p in params.split(",") if p.strip()]
-            methods.append({
-                "name": method_name,
-                "params": param_list,
-                "docstring": None,
-                "returns": "Unknown"
-            })
-
-        entry = {
-            "name": cls_name,
-            "docstring": None,
-            "methods": methods
-        }
-        classes.append(entry)
-        snippets_to_describe.append(f"class {cls_name} {{ {cls_body} }}")
-        types_to_describe.append("class")
-        placeholders.append(("class", entry))
-
-    # 🌐 Global Functions
-    function_list = []
-    seen_names = set()
-    func_matches = re.finditer(r'(?:[\w:<>\[\]]+\s+)+(\w+)\s*\(([^)]*)\)\s*{', content)
-
-    for match in func_matches:
-        name = match.group(1)
-        params = match.group(2)
-
-        if name in seen_names:
-            continue
-
-        param_list = [p.strip() for p in params.split(",") if p.strip()]
-        entry = {
-            "name": name,
-            "params": param_list,
-            "docstring": None,
-            "returns": "Unknown"
-        }
-
-        function_list.append(entry)
-        snippets_to_describe.append(f"{name}({', '.join(param_list)}) {{ ... }}")
-        types_to_describe.append("function")
-        placeholders.append(("function", entry))
-        seen_names.add(name)
-
-    # 🔄 Control Flows
-    control_flows = {
-        "if": [],
-        "for": [],
-        "while": [],
-        "switch": [],
-        "try": []
-    }
-
-    def extract_condition_block(content, start_index):
-        open_parens = 0
-        condition = ""
-        i = start_index
-        while i < len(content):
-            ch = content[i]
-            condition += ch
-            if ch == '(':
-                open_parens += 1
-            elif ch == ')':
-                open_parens -= 1
-                if open_parens == 0:
-                    break
-            i += 1
-        return condition.strip("()")
-
-    for match in re.finditer(r'\bif\s*\(', content):
-        start = match.end() - 1
-        condition = extract_condition_block(content, start)
-        lineno = content[:match.start()].count('\n') + 1
-        control_flows["if"].append({
-            "condition": condition,
-            "lineno": lineno,
-            "description": None
-        })
-        snippets_to_describe.append(f"if ({condition}) {{ ... }}")
-        types_to_describe.append("if statement")
-        description_targets.append(("if", len(control_flows["if"]) - 1))
-
-    for match in re.finditer(r'\bfor\s*\((.*?)\)', content):
-        condition = match.group(1)
-        lineno = content[:match.start()].count('\n') + 1
-        control_flows["for"].append({
-            "condition": condition,
-            "lineno": lineno,
-            "description": None
-        })
-        snippets_to_describe.append(f"for ({condition}) {{ ... }}")
-        types_to_describe.append("for loop")
-        description_targets.append(("for", len(control_flows["for"]) - 1))
-
-    for match in re.finditer(r'\bwhile\s*\(', content):
-        start = match.end() - 1
-        condition = extract_condition_block(content, start)
-        lineno = content[:match.start()].count('\n') + 1
-        control_flows["while"].append({
-            "condition": condition,
-            "lineno": lineno,
-            "description": None
-        })
-        snippets_to_describe.append(f"while ({condition}) {{ ... }}")
-        types_to_describe.append("while loop")
-        description_targets.append(("while", len(control_flows["while"]) - 1))
-
-    # Switch
-    switch_pattern = re.compile(r'\bswitch\s*\((.*?)\)\s*{(.*?)}', re.DOTALL)
-    for match in switch_pattern.finditer(content):
-        condition = match.group(1).strip()
-        body = match.group(2)
-
-        case_entries = []
-        case_pattern = re.compile(r'(case\s+.*?:|default\s*:)(.*?)(?=case\s+.*?:|default\s*:|$)', re.DOTALL)
-        for case_match in case_pattern.finditer(body):
-            case_label = case_match.group(1).strip().rstrip(":")
-            case_body = case_match.group(2).strip()
-            case_entries.append({
-                "pattern": case_label,
-                "statements": case_body
-            })
-
-        lineno = content[:match.start()].count('\n') + 1
-        control_flows["switch"].append({
-            "condition": condition,
-            "lineno": lineno,
-            "description": f"Switch statement with {len(case_entries)} case(s)",
-            "cases": case_entries
-        })
-
-    # Try-Catch
-    for match in re.finditer(r'\btry\s*{', content):
-        try_start = match.end() - 1
-        lineno = content[:match.start()].count('\n') + 1
-
-        def extract_brace_block(content, start_index):
-            open_braces = 0
-            i = start_index
-            while i < len(content):
-                if content[i] == '{':
-                    open_braces += 1
-                elif content[i] == '}':
-                    open_braces -= 1
-                    if open_braces == 0:
-                        break
-                i += 1
-            return content[start_index:i+1], i+1
-
-        _, next_index = extract_brace_block(content, try_start)
-
-        catch_match = re.search(
-            r'catch\s*\(\s*(?:const\s+)?[\w:<>]+(?:\s*&)?\s+(\w+)\s*\)',
-            content[next_index:]
-        )
-
-        caught_error = catch_match.group(1) if catch_match else "Unknown"
-        control_flows["try"].append({
-            "condition": caught_error,
-            "lineno": lineno,
-            "description": None
-        })
-        snippets_to_describe.append(f"try {{ ... }} catch({caught_error}) {{ ... }}")
-        types_to_describe.append("try block")
-        description_targets.append(("try", len(control_flows["try"]) - 1))
-
-    # 🔮 Fetch descriptions in spaced-out batches
-    if snippets_to_describe:
-        descriptions = []
-        cooldown = 5
-        total = len(snippets_to_describe)
-
-        for i in range(0, total, batch_size):
-            batch_snippets = snippets_to_describe[i:i + batch_size]
-            batch_types = types_to_describe[i:i + batch_size]
-
-            try:
-                batch_result = describe_snippet(batch_snippets, batch_types, generation_id=generation_id, status=status, flags=flags)
-            except Exception as e:
-                print(f"💥 Gemini failed on batch {i}: {e}")
-                batch_result = ["Failed to generate description"] * len(batch_snippets)
-
-            descriptions.extend(batch_result)
-
-            # 🌟 Update progress
-            completed = min(i + batch_size, total)
-            progress = int((completed / total) * 100)
-            status[generation_id] = f"generating:{progress}"
-
-            # 🛑 Check for cancellation right here!
-            if flags and flags.get(generation_id) == "cancelled":
-                status[generation_id] = "cancelled"
-                print(f"🛑 Generation {generation_id} was cancelled.")
-                return {"cancelled": True}
-
-            if completed < total:
-                time.sleep(cooldown)
-
-        # 🌟 Split AI responses
-        placeholder_len = len(placeholders)
-        placeholder_descriptions = descriptions[:placeholder_len]
-        control_descriptions = descriptions[placeholder_len:]
-
-        # 🧠 Apply descriptions to placeholders
-        for (_, entry), desc in zip(placeholders, placeholder_descriptions):
-            entry["docstring"] = desc
-
-        # 🌩️ Apply control flow descriptions
-        for (section, index), desc in zip(description_targets, control_descriptions):
-            control_flows[section][index]["description"] = desc
-
-    result = {
-        "classes": classes,
-        "functions": function_list,
-        "control_flows": control_flows
-    }
-
-    with open(path + ".docjson", "w", encoding="utf-8") as f:
-        json.dump(result, f, indent=2)
-
-    return result
-
-def html_parser(path, generation_id=None, status=None, flags=None, batch_size=5):
-    with open(path, "r", encoding="utf-8") as f:
-        content = f.read()
-
-    soup = BeautifulSoup(content, "html.parser")
-    tag_data = defaultdict(list)
-    target_tags = ["div", "p", "a", "ul", "li", "img", "section", "script", "link"]
-
-    snippets_to_describe = []
-    types_to_describe = []
-    description_targets = []
-
-    for tag in soup.find_all(target_tags):
-        tag_str = str(tag)
-        tag_name = tag.name
-        lineno = content[:content.find(tag_str)].count('\n') + 1
-
-        tag_id = tag.get("id", "")
-        tag_class = " ".join(tag.get("class", []))
-
-        other_attrs = []
-        for attr, val in tag.attrs.items():
-            if attr not in ["id", "class"]:
-                val_str = val if isinstance(val, str) else " ".join(val)
-                other_attrs.append(f'{attr}="{val_str}"')
-
-        attr_string = " ".join(other_attrs) if other_attrs else "—"
-
-        tag_data[tag_name].append({
-            "lineno": lineno,
-            "id": tag_id,
-            "class": tag_class,
-            "attrs": attr_string,
-            "description": None
-        })
-
-        snippets_to_describe.append(tag_str)
-        types_to_describe.append("HTML tag")
-        description_targets.append((tag_name, len(tag_data[tag_name]) - 1))
+    token = token or CancellationToken(generation_id)
+    source = source or read_source(file_path)
+    digest = source[1]
+
+    # ♻️ Same content + same parser version → no need to ask Gemini again
+    if cache:
+        with timed(progress, "cache"):
+            cached = cache.get(digest, ext, partial_ok)
+        if cached is not None:
+            if listener:
+                listener.start(cached, [])
+            if progress:
+                progress.file_cached()
+            return cached
+
+    failed = 0
+
+    def on_batch(batch):
+        nonlocal failed
+        failed += count_failed(batch)
+        if descriptions:
+            descriptions.store(batch)
+        if listener:
+            listener.batch_done(batch)
+
+    # 🚰 Describe from a bounded queue the extractor fills (a streaming listener or a ranking needs every target up front)
+    if listener is None and not deadline and PIPELINE_DEPTH > 0:
+        stream = stream_targets(file_path, extractor, generation_id, batch_size, progress, descriptions, source)
+        try:
+            with log.span("describe", generation_id=generation_id, file=os.path.basename(file_path)) as span:
+                describe_targets(
+                    stream,
+                    generation_id=generation_id,
+                    status=status,
+                    token=token,
+                    batch_size=batch_size,
+                    invalid_fallback=INVALID_SYNTAX_FALLBACKS.get(ext),
+                    on_batch=on_batch,
+                    progress=progress,
+                    describe=describe
+                )
+                span["targets"] = len(stream)
+        finally:
+            stream.close()
+        result = stream.result()
+
+        if cache:
+            with timed(progress, "cache"):
+                cache.put(digest, ext, result, partial=bool(failed))
+        return result
+
+    with timed(progress, "parse"):
+        result, targets = extract_file(file_path, extractor, generation_id, source=source)
+    token.raise_if_cancelled("parsing")
+
+    # 🧬 Snippets whose exact text was described before keep their description
+    if descriptions:
+        targets = descriptions.fill(targets)
+
+    # 🌊 Let a streaming listener send the page shell now and pick the describe order
+    if listener:
+        targets = listener.start(result, targets)
+    # ⏳ Against a deadline, what matters most goes first
+    if deadline:
+        targets = rank(targets)
+    if progress:
+        progress.file_targets(len(targets))
 
     # 🌟 Describe in safe spaced-out batches
-    if snippets_to_describe:
-        descriptions = []
-        cooldown = 5
-        total = len(snippets_to_describe)
-
-        for i in range(0, len(snippets_to_describe), batch_size):
-            batch_snippets = snippets_to_describe[i:i + batch_size]
-            batch_types = types_to_describe[i:i + batch_size]
-
-            try:
-                batch_result = describe_snippet(batch_snippets, batch_types, generation_id=generation_id, status=status, flags=flags)
-            except Exception as e:
-                print(f"💥 Gemini failed on batch {i}: {e}")
-                batch_result = ["Failed to generate description"] * len(batch_snippets)
-
-            # Fix potential "invalid syntax" junk responses
-            for j, desc in enumerate(batch_result):
-                if isinstance(desc, str) and "invalid syntax" in desc.lower():
-                    batch_result[j] = "Could not generate a valid description for this tag."
-
-            descriptions.extend(batch_result)
-            
-            # After batch_result:
-            completed = min(i + batch_size, total)
-            progress = int((completed / total) * 100)
-            status[generation_id] = f"generating:{progress}"
-            
-            # 🛑 Check for cancellation right here!
-            if flags and flags.get(generation_id) == "cancelled":
-                status[generation_id] = "cancelled"
-                print(f"🛑 Generation {generation_id} was cancelled.")
-                return {"cancelled": True}
-
-            # 💤 Respect Gemini's cooldown if needed
-            if i + batch_size < len(snippets_to_describe):
-                time.sleep(cooldown)
-
-        for (tag_name, index), desc in zip(description_targets, descriptions):
-            tag_data[tag_name][index]["description"] = desc
-
-    result = {
-        "html_tags": tag_data
-    }
-
-    with open(path + ".docjson", "w", encoding="utf-8") as f:
-        json.dump(result, f, indent=2)
-
-    return result
-
-def css_parser(path, generation_id=None, status=None, flags=None, batch_size=5):
-    with open(path, "r", encoding="utf-8") as f:
-        content = f.read()
-
-    class_rules = []
-    id_rules = []
-    tag_rules = []
-    media_rules = []
-
-    snippets_to_describe = []
-    types_to_describe = []
-    description_targets = []
-    all_rules_flat = []
-
-    media_pattern = re.compile(r'@media\s*([^{]+)\{([\s\S]+?\})\s*\}', re.MULTILINE)
-    rule_pattern = re.compile(r'([^{]+)\s*{([^}]*)}', re.MULTILINE)
-
-    # 🌀 Parse @media queries
-    for match in media_pattern.finditer(content):
-        full_match = match.group(0)
-        condition = match.group(1).strip()
-        body = match.group(2).strip()
-        lineno = content[:match.start()].count('\n') + 1
-
-        nested_elements = []
-        for sel, props in rule_pattern.findall(body):
-            sel = sel.strip()
-            props = props.strip()
-            prop_lines = [line.strip() + ";" for line in props.split(";") if line.strip()]
-            nested_elements.append({
-                "selector": sel,
-                "properties": prop_lines
-            })
-
-        rule = {
-            "selector": f"@media {condition}",
-            "lineno": lineno,
-            "name": None,
-            "description": None,
-            "size": condition,
-            "elements": nested_elements  # A list of dicts
-        }
-
-        media_rules.append(rule)
-        snippets_to_describe.append(full_match)
-        types_to_describe.append("CSS media query")
-        description_targets.append(len(all_rules_flat))
-        all_rules_flat.append(rule)
-
-    # 🌟 Parse non-media CSS rules
-    non_media_content = media_pattern.sub('', content)
-    for match in rule_pattern.finditer(non_media_content):
-        selector = match.group(1).strip()
-        body = match.group(2).strip()
-        lineno = content[:match.start()].count('\n') + 1
-
-        elements = [line.strip() + ";" for line in body.split(";") if line.strip()]
-
-        rule = {
-            "selector": selector,
-            "lineno": lineno,
-            "name": selector[1:] if selector.startswith((".", "#")) else selector,
-            "description": None,
-            "elements": elements
-        }
-
-        if selector.startswith("."):
-            class_rules.append(rule)
-        elif selector.startswith("#"):
-            id_rules.append(rule)
-        else:
-            tag_rules.append(rule)
-
-        snippets_to_describe.append(f"{selector} {{ {body} }}")
-        types_to_describe.append("CSS rule")
-        description_targets.append(len(all_rules_flat))
-        all_rules_flat.append(rule)
-
-    # ✨ Describe in batches
-    if snippets_to_describe:
-        descriptions = []
-        cooldown = 5
-        total = len(snippets_to_describe)
-
-        for i in range(0, total, batch_size):
-            batch_snippets = snippets_to_describe[i:i + batch_size]
-            batch_types = types_to_describe[i:i + batch_size]
-
-            try:
-                batch_result = describe_snippet(batch_snippets, batch_types, generation_id=generation_id, status=status, flags=flags)
-            except Exception as e:
-                print(f"💥 Gemini failed on batch {i}: {e}")
-                batch_result = ["Failed to generate description"] * len(batch_snippets)
-
-            for j, desc in enumerate(batch_result):
-                if isinstance(desc, str) and "invalid syntax" in desc.lower():
-                    batch_result[j] = "Could not generate a valid description."
-
-            descriptions.extend(batch_result)
-
-            completed = min(i + batch_size, total)
-            if status is not None and generation_id is not None:
-                status[generation_id] = f"generating:{int((completed / total) * 100)}"
-                
-            # 🛑 Check for cancellation right here!
-            if flags and flags.get(generation_id) == "cancelled":
-                status[generation_id] = "cancelled"
-                print(f"🛑 Generation {generation_id} was cancelled.")
-                return {"cancelled": True}
-
-            if i + batch_size < total:
-                time.sleep(cooldown)
-
-        for index, desc in zip(description_targets, descriptions):
-            all_rules_flat[index]["description"] = desc
-
-    # 🎁 Final grouped result
-    result = {
-        "classes": class_rules,
-        "ids": id_rules,
-        "tags": tag_rules,
-        "media": media_rules
-    }
-
-    with open(path + ".docjson", "w", encoding="utf-8") as f:
-        json.dump(result, f, indent=2)
+    pending = 0
+    if targets:
+        with log.span("describe", generation_id=generation_id, file=os.path.basename(file_path), targets=len(targets)) as span:
+            pending = span["pending"] = describe_targets(
+                targets,
+                generation_id=generation_id,
+                status=status,
+                token=token,
+                batch_size=batch_size,
+                invalid_fallback=INVALID_SYNTAX_FALLBACKS.get(ext),
+                on_batch=on_batch,
+                progress=progress,
+                describe=describe,
+                deadline=deadline
+            )
+
+    # 🗂️ Cache output; with failed or pending descriptions only as partial, so a later upload gets another go at them
+    if cache:
+        with timed(progress, "cache"):
+            cache.put(digest, ext, result, partial=bool(pending or failed))
 
     return result
 
-def parse_file_by_type(file_path, generation_id=None, status=None, flags=None, batch_size=5):
+async def parse_file_by_type_async(file_path, generation_id=None, status=None, token=None, batch_size=5, cache=None, listener=None, progress=None, deadline=None, source=None, descriptions=None, partial_ok=False):
+    """Async parse: extraction runs briefly off-loop, all Gemini waiting happens on the event loop."""
     ext = os.path.splitext(file_path)[1].lower()
-
-    if ext == ".py":
-        return parse_python_file(file_path, generation_id=generation_id, status=status, flags=flags, batch_size=batch_size)
-    elif ext == ".java":
-        return java_parser(file_path, generation_id=generation_id, status=status, flags=flags, batch_size=batch_size)
-    elif ext == ".cpp":
-        return cpp_parser(file_path, generation_id=generation_id, status=status, flags=flags, batch_size=batch_size)
-    elif ext == ".js":
-        return js_parser(file_path, generation_id=generation_id, status=status, flags=flags, batch_size=batch_size)
-    elif ext in [".html", ".htm"]:
-        return html_parser(file_path, generation_id=generation_id, status=status, flags=flags, batch_size=batch_size)
-    elif ext == ".css":
-        return css_parser(file_path, generation_id=generation_id, status=status, flags=flags, batch_size=batch_size)
-    else:
+    extractor = EXTRACTORS.get(ext)
+    if extractor is None:
         return None
 
-def remove_comments(text):
-    if not isinstance(text, str):
-        return text
-
-    # Remove all block comments
-    cleaned = re.sub(r'/\*.*?\*/', '', text, flags=re.DOTALL)
-
-    # Split into parts if it's a list of statements (e.g., CSS properties)
-    parts = [p.strip() for p in cleaned.split(';') if p.strip()]  # removes empty parts
+    token = token or CancellationToken(generation_id)
+    source = source or await asyncio.to_thread(read_source, file_path)
+    digest = source[1]
+
+    if cache:
+        with timed(progress, "cache"):
+            cached = await asyncio.to_thread(cache.get, digest, ext, partial_ok)
+        if cached is not None:
+            if listener:
+                listener.start(cached, [])
+            if progress:
+                progress.file_cached()
+            return cached
+
+    with timed(progress, "parse"):
+        result, targets = await asyncio.to_thread(extract_file, file_path, extractor, generation_id, None, source)
+    token.raise_if_cancelled("parsing")
+
+    if descriptions:
+        targets = await asyncio.to_thread(descriptions.fill, targets)
+    if listener:
+        targets = listener.start(result, targets)
+    if deadline:
+        targets = rank(targets)
+    if progress:
+        progress.file_targets(len(targets))
+
+    failed = 0
+
+    def on_batch(batch):
+        nonlocal failed
+        failed += count_failed(batch)
+        if descriptions:
+            descriptions.store(batch)
+        if listener:
+            listener.batch_done(batch)
+
+    pending = 0
+    if targets:
+        with log.span("describe", generation_id=generation_id, file=os.path.basename(file_path), targets=len(targets)) as span:
+            pending = span["pending"] = await describe_targets_async(
+                targets,
+                generation_id=generation_id,
+                status=status,
+                token=token,
+                batch_size=batch_size,
+                invalid_fallback=INVALID_SYNTAX_FALLBACKS.get(ext),
+                on_batch=on_batch,
+                progress=progress,
+                deadline=deadline
+            )
+
+    if cache:
+        with timed(progress, "cache"):
+            await asyncio.to_thread(cache.put, digest, ext, result, bool(pending or failed))
 
-    # Rejoin only the valid non-empty parts with semicolons
-    return '; '.join(parts)
+    return result
 
-def generate_html(parsed_data, output_path, hide_buttons=False):
-    template_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "templates"))
-    env = Environment(loader=FileSystemLoader(template_path))
-    template = env.get_template("doc_template.html")
+TEMPLATE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "templates"))
+
+def build_template_env():
+    from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
+
+    # 💾 Optional on-disk bytecode cache so fresh processes skip compiling the template too
+    bytecode_cache = None
+    bytecode_dir = os.getenv("CODESCROLL_TEMPLATE_BYTECODE_CACHE")
+    if bytecode_dir:
+        os.makedirs(bytecode_dir, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(bytecode_dir)
+
+    return Environment(loader=FileSystemLoader(TEMPLATE_DIR), bytecode_cache=bytecode_cache, auto_reload=False)
+
+# 🧱 Compiled once per process on the first render, then shared by every render after it
+_template_env = None
+
+def template_env():
+    global _template_env
+    if _template_env is None:
+        _template_env = build_template_env()
+    return _template_env
+
+def doc_template():
+    # The environment keeps compiled templates, so after the first call this is a dict lookup
+    return template_env().get_template("doc_template.html")
+
+def generate_html(documents, output_path, hide_buttons=False, token=None, project_home=None, generation_id=None):
+    if token:
+        token.raise_if_cancelled("rendering")
+
+    def write(tmp_path):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for i, chunk in enumerate(render_html_chunks(documents, hide_buttons, project_home, generation_id)):
+                f.write(chunk)
+                # 🛑 Don't finish a doc for a generation that was cancelled mid-render
+                if token and i % 1000 == 0:
+                    token.raise_if_cancelled("rendering")
+
+    atomic_write(output_path, write)
+
+def generate_split_html(documents, output_dir, hide_buttons=False, token=None, project_home=None, generation_id=None):
+    """Write a small page shell (``index.html``) plus one JSON fragment of table rows per tab.
+
+    The shell fetches a tab's fragment the first time it is opened and only
+    keeps the rows near the viewport in the DOM.
+    """
+    context = build_template_context(documents, hide_buttons)
+    os.makedirs(output_dir, exist_ok=True)
+
+    for dom_id, _, block_vars, row_block, row_var, items in page_sections(context):
+        if token:
+            token.raise_if_cancelled("rendering")
+        row_context = {**context, **block_vars}
+        rows = [render_block(row_block, {**row_context, row_var: item}).strip() for item in items]
+
+        def write(tmp_path):
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"rows": rows}, f, separators=(",", ":"), ensure_ascii=False)
+
+        atomic_write(os.path.join(output_dir, f"{dom_id}.json"), write)
+
+    # 🐚 Shell last, so it never points at fragments that aren't there yet
+    def write_shell(tmp_path):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for chunk in doc_template().generate(**context, split_mode=True, project_home=project_home, generation_id=generation_id):
+                f.write(chunk)
+
+    atomic_write(os.path.join(output_dir, "index.html"), write_shell)
+
+def page_sections(context):
+    """Every tab of a page as ``(dom_id, block, block_vars, row_block, row_var, items)``."""
+    if context["html_mode"]:
+        return [
+            (f"tag-{tag}", "tag_section", {"tag": tag, "elements": elements}, "tag_row", "el", elements)
+            for tag, elements in context["tag_data"].items()
+        ]
+
+    if context["css_mode"]:
+        return [
+            ("tab-" + tab.lower().replace(" ", "_"), "css_section", {"tab": tab}, "css_row", "rule", context["grouped_data"][tab])
+            for tab in context["tabs"]
+        ]
+
+    data = context["data"]
+    plan = [
+        ("classes", "classes_section", {}, "class_row", "cls", data["classes"]),
+        ("functions", "functions_section", {}, "function_row", "fn", data["functions"]),
+    ]
+    for keyword, statements in data["control_flows"].items():
+        plan.append((keyword, "control_section", {"keyword": keyword, "statements": statements}, "control_row", "stmt", statements))
+    return plan
+
+def render_html_chunks(documents, hide_buttons=False, project_home=None, generation_id=None):
+    """Stream the documentation page piece by piece instead of building one big string.
+
+    ``generation_id`` is the upload the page's download buttons fetch from.
+    """
+    return doc_template().generate(
+        **build_template_context(documents, hide_buttons), project_home=project_home, generation_id=generation_id
+    )
+
+def build_template_context(documents, hide_buttons=False):
+    """Template variables for a page over one or more Documents (see parser/doc_model.py)."""
 
     # Check if we're dealing with HTML tags only
-    is_html = any("html_tags" in data for _, data, _ in parsed_data)
-    # Check if we're dealing with HTML tags only
-    is_css = all("classes" in data and "ids" in data and "media" in data for _, data, _ in parsed_data)
+    is_html = any(doc.mode == "html" for doc in documents)
+    # Check if we're dealing with CSS only
+    is_css = all(doc.mode == "css" for doc in documents)
+
+    filename = documents[0].filename if documents else ""
+    ext = documents[0].ext if documents else ""  # 💡 Ensure ext is safely set
 
     if is_html:
         # 🧚 Handle HTML-specific rendering
         tag_data = defaultdict(list)
-        for filename, data, ext in parsed_data:
-            for tag, entries in data.get("html_tags", {}).items():
-                tag_data[tag].extend(entries)
+        for doc in documents:
+            for section in doc.sections_of("tags"):
+                tag_data[section.key].extend(section.records)
 
         tabs = sorted(tag_data.keys())  # Tab names are tag names like div, p, etc.
-        # Just take the first file for now since you're assuming single upload
-        filename = parsed_data[0][0] if parsed_data else ""
-        ext = parsed_data[0][2] if parsed_data else ""
-
         clean_ext = ext.lstrip(".").upper()
-        rendered = template.render(html_mode=True, css_mode=False, tag_data=tag_data, tabs=tabs, filename=filename, ext=clean_ext)
+        return dict(html_mode=True, css_mode=False, tag_data=tag_data, tabs=tabs, filename=filename, ext=clean_ext, hide_buttons=hide_buttons)
 
     elif is_css:
         grouped_data = {
@@ -1101,41 +553,15 @@ def generate_html(parsed_data, output_path, hide_buttons=False):
             "Media Queries": []
         }
 
-        for filename, data, ext in parsed_data:
-            grouped_data["Classes"].extend(data.get("classes", []))
-            grouped_data["IDs"].extend(data.get("ids", []))
-            grouped_data["Media Queries"].extend(data.get("media", []))
-            
-        for group_name, group in grouped_data.items():
-            for item in group:
-                if "selector" in item:
-                    item["selector"] = remove_comments(item["selector"])
-                if "name" in item and item["name"]:
-                    item["name"] = remove_comments(item["name"])
-                if "description" in item:
-                    item["description"] = remove_comments(item["description"])
-                if "elements" in item:
-                    # Media Queries have nested element dictionaries
-                    if group_name == "Media Queries" and isinstance(item["elements"], list):
-                        for sub_item in item["elements"]:
-                            if isinstance(sub_item, dict) and "properties" in sub_item:
-                                sub_item["properties"] = [
-                                    p_cleaned for p_cleaned in (remove_comments(p) for p in sub_item["properties"])
-                                    if p_cleaned and p_cleaned.strip()
-                                ]
-                    else:
-                        if isinstance(item["elements"], list):
-                            item["elements"] = [
-                                el_cleaned for el_cleaned in (remove_comments(el) for el in item["elements"])
-                                if el_cleaned and el_cleaned.strip()
-                        ]
+        # Comments were already stripped when the documents were built
+        for doc in documents:
+            for section in doc.sections_of("css"):
+                grouped_data[section.key].extend(section.records)
 
         tabs = list(grouped_data.keys())  # "Classes", "IDs", "Media Queries"
-        filename = parsed_data[0][0] if parsed_data else ""
-        ext = parsed_data[0][2] if parsed_data else ""
         extFullForm = ext.lstrip(".").upper()
 
-        rendered = template.render(
+        return dict(
             css_mode=True,
             grouped_data=grouped_data,
             tabs=tabs,
@@ -1148,35 +574,21 @@ def generate_html(parsed_data, output_path, hide_buttons=False):
     
     else:
         # 🧑‍💻 Handle regular code parsing
-        control_keywords = []
-        control_flows = {}
-
-        for filename, data, ext in parsed_data:
-            if "control_flows" in data:
-                for keyword, entries in data["control_flows"].items():
-                    if keyword in ["with",]:
-                        continue
-                    if keyword not in control_flows:
-                        control_flows[keyword] = []
-                    control_flows[keyword].extend(entries)
-
-        if control_flows:
-            control_keywords = sorted(control_flows.keys())
-        
-        filename = parsed_data[0][0] if parsed_data else ""    
-        ext = parsed_data[0][2] if parsed_data else ""  # 💡 Ensure ext is safely set
-
-        all_tabs = ["Classes", "Functions"] + [kw.capitalize() for kw in control_keywords]
-
         all_data = {
             "classes": [],
             "functions": [],
-            "control_flows": control_flows
+            "control_flows": {}
         }
 
-        for filename, data, ext in parsed_data:
-            all_data["classes"].extend(data.get("classes", []))
-            all_data["functions"].extend(data.get("functions", []))
+        for doc in documents:
+            for section in doc.sections:
+                if section.kind == "statements":
+                    all_data["control_flows"].setdefault(section.key, []).extend(section.records)
+                elif section.kind in ("classes", "functions"):
+                    all_data[section.kind].extend(section.records)
+
+        control_keywords = sorted(all_data["control_flows"].keys())
+        all_tabs = ["Classes", "Functions"] + [kw.capitalize() for kw in control_keywords]
 
         ext_map = {
             ".html": "HTML",
@@ -1187,7 +599,7 @@ def generate_html(parsed_data, output_path, hide_buttons=False):
             ".css": "CSS"
         }
         extFullForm = ext_map.get(ext, ext.lstrip(".").title())
-        rendered = template.render(
+        return dict(
             data=all_data,
             tabs=all_tabs,
             html_mode=False,
@@ -1198,6 +610,26 @@ def generate_html(parsed_data, output_path, hide_buttons=False):
             hide_buttons=hide_buttons  # 🪄 pass it to the template
         )
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(rendered)
-        
+def render_block(name, context):
+    """Render a single named block of the doc template (used to stream the page section by section)."""
+    template = doc_template()
+    return "".join(template.blocks[name](template.new_context(context)))
+
+def section_entries(data):
+    """``(dom_id, entries)`` for each tab of one raw parse result, in the same order as its Document's sections.
+
+    ``entries`` are the dicts whose descriptions must be filled in before
+    the tab can be shown.
+    """
+    _, sources = section_sources(data)
+    plan = []
+    for kind, key, entries in sources:
+        if kind == "tags":
+            plan.append((f"tag-{key}", entries))
+        elif kind == "css":
+            plan.append(("tab-" + key.lower().replace(" ", "_"), entries))
+        elif kind == "classes":
+            plan.append(("classes", entries + [m for cls in entries for m in cls.get("methods", [])]))
+        else:
+            plan.append((key, entries))
+    return plan
@@ -1,15 +1,48 @@
 # parser/gemini_client.py
+import ast
 import os
+import json
+import time
+import socket
+import asyncio
+import threading
+import http.client
+import urllib.parse
 from dotenv import load_dotenv
-import google.generativeai as genai
+from parser.cancellation import GenerationCancelled
+from parser.log import get_logger
+from parser.metrics import GEMINI_SECONDS, GEMINI_BATCH_SIZE, ERRORS
 
 load_dotenv()
 
-# Configure Gemini
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-model = genai.GenerativeModel("models/gemini-2.0-flash-lite")
+# GEMINI_API_ENDPOINT points the client somewhere else, e.g. benchmarks/fake_gemini.py
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")
 
-def describe_snippet(snippets: list[str], types: list[str], generation_id=None, status=None, flags=None) -> list[str]:
+MODEL_NAME = "models/gemini-2.0-flash-lite"
+
+# 🦥 The SDK takes about half a second to import, so it's set up on the first describe instead of at startup
+model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    global model
+    if model is None:
+        with _model_lock:
+            if model is None:
+                import google.generativeai as genai
+
+                genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+                model = genai.GenerativeModel(MODEL_NAME)
+    return model
+
+# ⏱️ Upper bound for a single Gemini request
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "60"))
+# 🪦 Tighter bound for SDK calls made through the cancellable pool: one abandoned on cancel holds a pool thread this long
+GEMINI_CALL_TIMEOUT = float(os.getenv("GEMINI_CALL_TIMEOUT", "20"))
+
+log = get_logger("gemini")
+
+def build_prompt(snippets: list[str], types: list[str]) -> str:
     prompt_parts = [
         "You will be given a numbered list of code snippets with their type.",
         "Return a Python-style array (list) of simple, one-line descriptions, in the same order.",
@@ -21,36 +54,139 @@ def describe_snippet(snippets: list[str], types: list[str], generation_id=None,
     for i, (code, typ) in enumerate(zip(snippets, types), 1):
         prompt_parts.append(f"{i}. Type: {typ}\n{code}")
 
-    final_prompt = "\n\n".join(prompt_parts)
+    return "\n\n".join(prompt_parts)
+
+def parse_descriptions(text: str) -> list[str]:
+    raw = text.strip()
+
+    # 🧼 Remove code block formatting if present
+    if raw.startswith("```"):
+        raw = raw.strip("` \n")
+        if raw.startswith("python\n"):
+            raw = raw[7:]
+
+    # 🛡 Try parsing as Python list
+    parsed = ast.literal_eval(raw)
+
+    # ✅ Must be a list of strings
+    if not isinstance(parsed, list) or not all(isinstance(x, str) for x in parsed):
+        raise ValueError("Output was not a valid list of strings")
+
+    return parsed
+
+def generate_rest(prompt, timeout, token=None):
+    """One generateContent call to GEMINI_API_ENDPOINT over plain HTTP; returns the response text.
+
+    Cancelling ``token`` shuts the socket down, so the call ends right away
+    instead of keeping a thread busy until ``timeout``.
+    """
+    endpoint = urllib.parse.urlsplit(GEMINI_API_ENDPOINT if "://" in GEMINI_API_ENDPOINT else f"https://{GEMINI_API_ENDPOINT}")
+    connection_class = http.client.HTTPSConnection if endpoint.scheme == "https" else http.client.HTTPConnection
+    conn = connection_class(endpoint.netloc, timeout=timeout)
+    body = json.dumps({"contents": [{"role": "user", "parts": [{"text": prompt}]}]})
+    headers = {"Content-Type": "application/json", "x-goog-api-key": os.getenv("GEMINI_API_KEY") or "local"}
+
+    def abort():
+        # 🔌 Wakes the blocked send/recv below with an error
+        if conn.sock is not None:
+            try:
+                conn.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    if token:
+        token.add_callback(abort)
+    try:
+        conn.connect()
+        if token:
+            # A cancel that landed while connecting found no socket to shut down
+            token.raise_if_cancelled("describe")
+        conn.request("POST", f"{endpoint.path.rstrip('/')}/v1beta/{MODEL_NAME}:generateContent", body, headers)
+        response = conn.getresponse()
+        payload = json.loads(response.read() or b"{}")
+    except (OSError, http.client.HTTPException, ValueError):
+        if token:
+            token.raise_if_cancelled("describe")
+        raise
+    finally:
+        if token:
+            token.remove_callback(abort)
+        conn.close()
+
+    if response.status != 200:
+        raise RuntimeError(f"{response.status} {payload.get('error', {}).get('message', response.reason)}")
+    return payload["candidates"][0]["content"]["parts"][0]["text"]
+
+def request_timeout(timeout, ceiling=GEMINI_TIMEOUT):
+    # ``timeout`` from the caller (e.g. what's left of a deadline) can only shorten a request
+    return ceiling if timeout is None else min(ceiling, timeout)
+
+def describe_snippet(snippets: list[str], types: list[str], generation_id=None, status=None, token=None, timeout=None) -> list[str]:
+    final_prompt = build_prompt(snippets, types)
 
     try:
         # 🛡️ Optional cancellation check
-        if flags and generation_id and flags.get(generation_id) == "cancelled":
-            raise Exception("Generation cancelled")
+        if token:
+            token.raise_if_cancelled("describe")
 
         # 🌟 Mark status if applicable
         if status and generation_id:
             status[generation_id] = "generating_descriptions"
 
-        response = model.generate_content(final_prompt)
-        raw = response.text.strip()
+        started = time.perf_counter()
+        if GEMINI_API_ENDPOINT:
+            # 🔌 Plain HTTP on this thread; a cancel closes the connection instead of abandoning the call
+            text = generate_rest(final_prompt, request_timeout(timeout), token)
+        elif token:
+            # 🛑 Returns (by raising) as soon as the user cancels, even mid-request
+            text = token.call(get_model().generate_content, final_prompt,
+                              request_options={"timeout": request_timeout(timeout, min(GEMINI_TIMEOUT, GEMINI_CALL_TIMEOUT))}).text
+        else:
+            text = get_model().generate_content(final_prompt, request_options={"timeout": request_timeout(timeout)}).text
+        elapsed = time.perf_counter() - started
+        GEMINI_SECONDS.observe(elapsed)
+        GEMINI_BATCH_SIZE.observe(len(snippets))
+        log.sampled("gemini request", generation_id=generation_id, snippets=len(snippets), ms=round(elapsed * 1000, 1))
+
+        return parse_descriptions(text)
+
+    except GenerationCancelled:
+        raise
 
-        # 🧼 Remove code block formatting if present
-        if raw.startswith("```"):
-            raw = raw.strip("` \n")
-            if raw.startswith("python\n"):
-                raw = raw[7:]
+    except Exception as e:
+        log.warning("💥 gemini response error", generation_id=generation_id, error=str(e))
+        ERRORS.inc(stage="gemini")
+        return [f"Error: {e}"] * len(snippets)
+
+async def describe_snippet_async(snippets: list[str], types: list[str], generation_id=None, status=None, token=None, timeout=None) -> list[str]:
+    """Event-loop twin of describe_snippet; cancelling the token cancels the pending request task."""
+    final_prompt = build_prompt(snippets, types)
+
+    try:
+        if token:
+            token.raise_if_cancelled("describe")
+
+        if status and generation_id:
+            status[generation_id] = "generating_descriptions"
 
-        # 🛡 Try parsing as Python list
-        import ast
-        parsed = ast.literal_eval(raw)
+        started = time.perf_counter()
+        if GEMINI_API_ENDPOINT:
+            # No async HTTP client here, so the blocking call goes to a worker thread; a cancel closes its socket
+            request = asyncio.to_thread(generate_rest, final_prompt, request_timeout(timeout), token)
+        else:
+            request = get_model().generate_content_async(final_prompt, request_options={"timeout": request_timeout(timeout)})
+        response = await (token.call_async(request) if token else request)
+        elapsed = time.perf_counter() - started
+        GEMINI_SECONDS.observe(elapsed)
+        GEMINI_BATCH_SIZE.observe(len(snippets))
+        log.sampled("gemini request", generation_id=generation_id, snippets=len(snippets), ms=round(elapsed * 1000, 1))
 
-        # ✅ Must be a list of strings
-        if not isinstance(parsed, list) or not all(isinstance(x, str) for x in parsed):
-            raise ValueError("Output was not a valid list of strings")
+        return parse_descriptions(response if isinstance(response, str) else response.text)
 
-        return parsed
+    except GenerationCancelled:
+        raise
 
     except Exception as e:
-        print("💥 Gemini response error:", e)
-        return [f"Error: {e}"] * len(snippets)
\ No newline at end of file
+        log.warning("💥 gemini response error", generation_id=generation_id, error=str(e))
+        ERRORS.inc(stage="gemini")
+        return [f"Error: {e}"] * len(snippets)
@@ -0,0 +1,72 @@
+# parser/languages/__init__.py
+import importlib
+import threading
+
+# 🧩 Extension → extractor, imported on first use
+#
+# Every language lives in its own module, so a process only imports the parsers
+# (and their dependencies, like BeautifulSoup for HTML) that its uploads need.
+# Each extractor takes the file content plus an ``emit(snippet, type, entry, key)``
+# callback and returns the result dict; every emitted target gets its AI
+# description written back into ``entry[key]`` once described.
+
+
+class LanguageRegistry:
+    """Maps extensions to ``"module:function"`` extractors and imports each module the first time it's asked for."""
+
+    def __init__(self):
+        self._targets = {}
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def register(self, ext, target):
+        """Register an extractor for ``ext`` (".py"): a ``"module:function"`` path or the function itself."""
+        ext = ext.lower()
+        with self._lock:
+            self._targets[ext] = target
+            self._loaded.pop(ext, None)
+            if callable(target):
+                self._loaded[ext] = target
+
+    def get(self, ext, default=None):
+        extractor = self._loaded.get(ext)
+        if extractor is not None:
+            return extractor
+
+        target = self._targets.get(ext)
+        if target is None:
+            return default
+        with self._lock:
+            if ext not in self._loaded:
+                module_name, _, attr = target.partition(":")
+                self._loaded[ext] = getattr(importlib.import_module(module_name), attr)
+            return self._loaded[ext]
+
+    def __getitem__(self, ext):
+        extractor = self.get(ext)
+        if extractor is None:
+            raise KeyError(ext)
+        return extractor
+
+    def __contains__(self, ext):
+        return ext in self._targets
+
+    def __iter__(self):
+        return iter(list(self._targets))
+
+    def __len__(self):
+        return len(self._targets)
+
+    def loaded(self):
+        """Extensions whose extractor has been imported so far."""
+        return list(self._loaded)
+
+
+LANGUAGES = LanguageRegistry()
+LANGUAGES.register(".py", "parser.languages.python:extract_python")
+LANGUAGES.register(".java", "parser.languages.java:extract_java")
+LANGUAGES.register(".cpp", "parser.languages.cpp:extract_cpp")
+LANGUAGES.register(".js", "parser.languages.javascript:extract_js")
+LANGUAGES.register(".html", "parser.languages.html:extract_html")
+LANGUAGES.register(".htm", "parser.languages.html:extract_html")
+LANGUAGES.register(".css", "parser.languages.css:extract_css")
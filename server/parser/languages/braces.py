@@ -0,0 +1,31 @@
+# parser/languages/braces.py
+
+# 🧱 Bracket matching shared by the C-like parsers
+
+def extract_condition_block(text, start_pos):
+    """Extracts a condition from a starting '(' position, handling nested parentheses."""
+    count = 0
+    end_pos = start_pos
+    for i in range(start_pos, len(text)):
+        if text[i] == '(':
+            count += 1
+        elif text[i] == ')':
+            count -= 1
+            if count == 0:
+                end_pos = i
+                break
+    return text[start_pos + 1:end_pos].strip()
+
+def extract_brace_block(text, start_index):
+    """Extracts text within matching braces from start_index (which should be '{')"""
+    if text[start_index] != '{':
+        return None, -1
+    stack = 1
+    i = start_index + 1
+    while i < len(text) and stack > 0:
+        if text[i] == '{':
+            stack += 1
+        elif text[i] == '}':
+            stack -= 1
+        i += 1
+    return text[start_index:i], i  # block text, next index
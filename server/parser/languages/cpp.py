@@ -0,0 +1,176 @@
+# parser/languages/cpp.py
+import re
+
+# ⚙️ C++ parser
+def extract_cpp(content, emit):
+    # 📦 Classes
+    class_matches = re.findall(r'\bclass\s+(\w+)\s*{(.*?)};', content, re.DOTALL)
+    classes = []
+    for cls_name, cls_body in class_matches:
+        method_matches = re.findall(
+            r'(?:public|private|protected)?\s*(?:static\s+)?(?:[\w:<>\[\]]+\s+)+(\w+)\s*\(([^)]*)\)\s*{', cls_body)
+        methods = []
+        for method_name, params in method_matches:
+            param_list = [p.strip() for p in params.split(",") if p.strip()]
+            methods.append({
+                "name": method_name,
+                "params": param_list,
+                "docstring": None,
+                "returns": "Unknown"
+            })
+
+        entry = {
+            "name": cls_name,
+            "docstring": None,
+            "methods": methods
+        }
+        classes.append(entry)
+        emit(f"class {cls_name} {{ {cls_body} }}", "class", entry, "docstring")
+
+    # 🌐 Global Functions
+    function_list = []
+    seen_names = set()
+    func_matches = re.finditer(r'(?:[\w:<>\[\]]+\s+)+(\w+)\s*\(([^)]*)\)\s*{', content)
+
+    for match in func_matches:
+        name = match.group(1)
+        params = match.group(2)
+
+        if name in seen_names:
+            continue
+
+        param_list = [p.strip() for p in params.split(",") if p.strip()]
+        entry = {
+            "name": name,
+            "params": param_list,
+            "docstring": None,
+            "returns": "Unknown"
+        }
+
+        function_list.append(entry)
+        emit(f"{name}({', '.join(param_list)}) {{ ... }}", "function", entry, "docstring")
+        seen_names.add(name)
+
+    # 🔄 Control Flows
+    control_flows = {
+        "if": [],
+        "for": [],
+        "while": [],
+        "switch": [],
+        "try": []
+    }
+
+    def extract_condition_block(content, start_index):
+        open_parens = 0
+        condition = ""
+        i = start_index
+        while i < len(content):
+            ch = content[i]
+            condition += ch
+            if ch == '(':
+                open_parens += 1
+            elif ch == ')':
+                open_parens -= 1
+                if open_parens == 0:
+                    break
+            i += 1
+        return condition.strip("()")
+
+    for match in re.finditer(r'\bif\s*\(', content):
+        start = match.end() - 1
+        condition = extract_condition_block(content, start)
+        lineno = content[:match.start()].count('\n') + 1
+        entry = {
+            "condition": condition,
+            "lineno": lineno,
+            "description": None
+        }
+        control_flows["if"].append(entry)
+        emit(f"if ({condition}) {{ ... }}", "if statement", entry, "description")
+
+    for match in re.finditer(r'\bfor\s*\((.*?)\)', content):
+        condition = match.group(1)
+        lineno = content[:match.start()].count('\n') + 1
+        entry = {
+            "condition": condition,
+            "lineno": lineno,
+            "description": None
+        }
+        control_flows["for"].append(entry)
+        emit(f"for ({condition}) {{ ... }}", "for loop", entry, "description")
+
+    for match in re.finditer(r'\bwhile\s*\(', content):
+        start = match.end() - 1
+        condition = extract_condition_block(content, start)
+        lineno = content[:match.start()].count('\n') + 1
+        entry = {
+            "condition": condition,
+            "lineno": lineno,
+            "description": None
+        }
+        control_flows["while"].append(entry)
+        emit(f"while ({condition}) {{ ... }}", "while loop", entry, "description")
+
+    # Switch
+    switch_pattern = re.compile(r'\bswitch\s*\((.*?)\)\s*{(.*?)}', re.DOTALL)
+    for match in switch_pattern.finditer(content):
+        condition = match.group(1).strip()
+        body = match.group(2)
+
+        case_entries = []
+        case_pattern = re.compile(r'(case\s+.*?:|default\s*:)(.*?)(?=case\s+.*?:|default\s*:|$)', re.DOTALL)
+        for case_match in case_pattern.finditer(body):
+            case_label = case_match.group(1).strip().rstrip(":")
+            case_body = case_match.group(2).strip()
+            case_entries.append({
+                "pattern": case_label,
+                "statements": case_body
+            })
+
+        lineno = content[:match.start()].count('\n') + 1
+        control_flows["switch"].append({
+            "condition": condition,
+            "lineno": lineno,
+            "description": f"Switch statement with {len(case_entries)} case(s)",
+            "cases": case_entries
+        })
+
+    # Try-Catch
+    for match in re.finditer(r'\btry\s*{', content):
+        try_start = match.end() - 1
+        lineno = content[:match.start()].count('\n') + 1
+
+        def extract_brace_block(content, start_index):
+            open_braces = 0
+            i = start_index
+            while i < len(content):
+                if content[i] == '{':
+                    open_braces += 1
+                elif content[i] == '}':
+                    open_braces -= 1
+                    if open_braces == 0:
+                        break
+                i += 1
+            return content[start_index:i+1], i+1
+
+        _, next_index = extract_brace_block(content, try_start)
+
+        catch_match = re.search(
+            r'catch\s*\(\s*(?:const\s+)?[\w:<>]+(?:\s*&)?\s+(\w+)\s*\)',
+            content[next_index:]
+        )
+
+        caught_error = catch_match.group(1) if catch_match else "Unknown"
+        entry = {
+            "condition": caught_error,
+            "lineno": lineno,
+            "description": None
+        }
+        control_flows["try"].append(entry)
+        emit(f"try {{ ... }} catch({caught_error}) {{ ... }}", "try block", entry, "description")
+
+    return {
+        "classes": classes,
+        "functions": function_list,
+        "control_flows": control_flows
+    }
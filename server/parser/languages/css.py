@@ -0,0 +1,75 @@
+# parser/languages/css.py
+import re
+
+# 🎨 CSS parser
+def extract_css(content, emit):
+    class_rules = []
+    id_rules = []
+    tag_rules = []
+    media_rules = []
+
+    media_pattern = re.compile(r'@media\s*([^{]+)\{([\s\S]+?\})\s*\}', re.MULTILINE)
+    rule_pattern = re.compile(r'([^{]+)\s*{([^}]*)}', re.MULTILINE)
+
+    # 🌀 Parse @media queries
+    for match in media_pattern.finditer(content):
+        full_match = match.group(0)
+        condition = match.group(1).strip()
+        body = match.group(2).strip()
+        lineno = content[:match.start()].count('\n') + 1
+
+        nested_elements = []
+        for sel, props in rule_pattern.findall(body):
+            sel = sel.strip()
+            props = props.strip()
+            prop_lines = [line.strip() + ";" for line in props.split(";") if line.strip()]
+            nested_elements.append({
+                "selector": sel,
+                "properties": prop_lines
+            })
+
+        rule = {
+            "selector": f"@media {condition}",
+            "lineno": lineno,
+            "name": None,
+            "description": None,
+            "size": condition,
+            "elements": nested_elements  # A list of dicts
+        }
+
+        media_rules.append(rule)
+        emit(full_match, "CSS media query", rule, "description")
+
+    # 🌟 Parse non-media CSS rules
+    non_media_content = media_pattern.sub('', content)
+    for match in rule_pattern.finditer(non_media_content):
+        selector = match.group(1).strip()
+        body = match.group(2).strip()
+        lineno = content[:match.start()].count('\n') + 1
+
+        elements = [line.strip() + ";" for line in body.split(";") if line.strip()]
+
+        rule = {
+            "selector": selector,
+            "lineno": lineno,
+            "name": selector[1:] if selector.startswith((".", "#")) else selector,
+            "description": None,
+            "elements": elements
+        }
+
+        if selector.startswith("."):
+            class_rules.append(rule)
+        elif selector.startswith("#"):
+            id_rules.append(rule)
+        else:
+            tag_rules.append(rule)
+
+        emit(f"{selector} {{ {body} }}", "CSS rule", rule, "description")
+
+    # 🎁 Final grouped result
+    return {
+        "classes": class_rules,
+        "ids": id_rules,
+        "tags": tag_rules,
+        "media": media_rules
+    }
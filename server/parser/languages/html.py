@@ -0,0 +1,40 @@
+# parser/languages/html.py
+from collections import defaultdict
+
+from bs4 import BeautifulSoup
+
+# 🌐 HTML parser
+def extract_html(content, emit):
+    soup = BeautifulSoup(content, "html.parser")
+    tag_data = defaultdict(list)
+    target_tags = ["div", "p", "a", "ul", "li", "img", "section", "script", "link"]
+
+    for tag in soup.find_all(target_tags):
+        tag_str = str(tag)
+        tag_name = tag.name
+        lineno = content[:content.find(tag_str)].count('\n') + 1
+
+        tag_id = tag.get("id", "")
+        tag_class = " ".join(tag.get("class", []))
+
+        other_attrs = []
+        for attr, val in tag.attrs.items():
+            if attr not in ["id", "class"]:
+                val_str = val if isinstance(val, str) else " ".join(val)
+                other_attrs.append(f'{attr}="{val_str}"')
+
+        attr_string = " ".join(other_attrs) if other_attrs else "—"
+
+        entry = {
+            "lineno": lineno,
+            "id": tag_id,
+            "class": tag_class,
+            "attrs": attr_string,
+            "description": None
+        }
+        tag_data[tag_name].append(entry)
+        emit(tag_str, "HTML tag", entry, "description")
+
+    return {
+        "html_tags": tag_data
+    }
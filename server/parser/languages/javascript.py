@@ -0,0 +1,126 @@
+# parser/languages/javascript.py
+import re
+
+from parser.languages.braces import extract_condition_block
+
+# 🟨 JavaScript parser
+def extract_js(content, emit):
+    # 📦 Classes
+    class_matches = re.findall(r'class\s+(\w+)\s*{(.*?)}', content, re.DOTALL)
+    classes = []
+    for cls_name, cls_body in class_matches:
+        method_matches = re.findall(r'(\w+)\s*\(([^)]*)\)\s*{', cls_body)
+        methods = []
+        for method_name, params in method_matches:
+            param_list = [p.strip() for p in params.split(",") if p.strip()]
+            methods.append({
+                "name": method_name,
+                "params": param_list,
+                "docstring": None,
+                "returns": "Unknown"
+            })
+        class_entry = {
+            "name": cls_name,
+            "docstring": None,
+            "methods": methods
+        }
+        classes.append(class_entry)
+        emit(f"class {cls_name} {{\n{cls_body}\n}}", "class", class_entry, "docstring")
+
+    # 🌐 Global functions
+    functions = re.findall(r'function\s+(\w+)\s*\(([^)]*)\)', content)
+    function_list = []
+    seen_names = set()
+    for name, params in functions:
+        if name in seen_names:
+            continue
+        param_list = [p.strip() for p in params.split(",") if p.strip()]
+        fn_entry = {
+            "name": name,
+            "params": param_list,
+            "docstring": None,
+            "returns": "Unknown"
+        }
+        function_list.append(fn_entry)
+        seen_names.add(name)
+
+        emit(f"function {name}({params}) {{ ... }}", "function", fn_entry, "docstring")
+
+    # 🔄 Control Flow Statements
+    control_flows = { "if": [], "for": [], "while": [], "switch": [], "try": [] }
+
+    for match in re.finditer(r'\bif\s*\(', content):
+        start = match.end() - 1
+        condition = extract_condition_block(content, start)
+        lineno = content[:match.start()].count('\n') + 1
+        entry = {
+            "condition": condition,
+            "lineno": lineno,
+            "description": None
+        }
+        control_flows["if"].append(entry)
+        emit(f"if ({condition}) {{ ... }}", "if statement", entry, "description")
+
+    for match in re.finditer(r'\bfor\s*\(', content):
+        start = match.end() - 1
+        condition = extract_condition_block(content, start)
+        lineno = content[:match.start()].count('\n') + 1
+        entry = {
+            "condition": condition,
+            "lineno": lineno,
+            "description": None
+        }
+        control_flows["for"].append(entry)
+        emit("for(" + condition + ")", "for loop", entry, "description")
+
+    for match in re.finditer(r'\bwhile\s*\(', content):
+        start = match.end() - 1
+        condition = extract_condition_block(content, start)
+        lineno = content[:match.start()].count('\n') + 1
+        entry = {
+            "condition": condition,
+            "lineno": lineno,
+            "description": None
+        }
+        control_flows["while"].append(entry)
+        emit("while(" + condition + ")", "while loop", entry, "description")
+
+    switch_pattern = re.compile(r'\bswitch\s*\((.*?)\)\s*{(.*?)}', re.DOTALL)
+    for match in switch_pattern.finditer(content):
+        condition = match.group(1).strip()
+        body = match.group(2)
+        case_entries = []
+        case_pattern = re.compile(r'(case\s+.*?:|default\s*:)(.*?)(?=case\s+|default\s*:|$)', re.DOTALL)
+        for case_match in case_pattern.finditer(body):
+            case_label = case_match.group(1).strip().rstrip(":")
+            case_body = case_match.group(2).strip()
+            case_entries.append({
+                "pattern": case_label,
+                "statements": case_body
+            })
+
+        lineno = content[:match.start()].count('\n') + 1
+        control_flows["switch"].append({
+            "condition": condition,
+            "lineno": lineno,
+            "description": f"Switch statement with {len(case_entries)} case(s)",
+            "cases": case_entries
+        })
+
+    for match in re.finditer(r'\btry\s*{', content):
+        lineno = content[:match.start()].count('\n') + 1
+        catch_match = re.search(r'catch\s*\(\s*(\w+)\s*\)', content[match.end():])
+        caught_error = catch_match.group(1) if catch_match else "Unknown"
+        entry = {
+            "condition": caught_error,
+            "lineno": lineno,
+            "description": None
+        }
+        control_flows["try"].append(entry)
+        emit("try { ... } catch(" + caught_error + ")", "try block", entry, "description")
+
+    return {
+        "classes": classes,
+        "functions": function_list,
+        "control_flows": control_flows
+    }
@@ -0,0 +1,101 @@
+# parser/languages/python.py
+import ast
+
+# 🐍 Python parser
+def extract_python(content, emit):
+    tree = ast.parse(content)
+    attach_parents(tree)
+
+    result = {
+        "classes": [],
+        "functions": [],
+        "control_flows": {
+            "if": [], "for": [], "while": [], "try": [], "switch": [], "with": []
+        }
+    }
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ClassDef):
+            doc = ast.get_docstring(node)
+            entry = {"name": node.name, "docstring": doc, "methods": []}
+            if not doc:
+                emit(ast.unparse(node), "class", entry, "docstring")
+            result["classes"].append(entry)
+
+        elif isinstance(node, ast.FunctionDef):
+            doc = ast.get_docstring(node)
+            func_info = {
+                "name": node.name,
+                "params": [arg.arg for arg in node.args.args],
+                "docstring": doc,
+                "returns": getattr(node.returns, 'id', 'Unknown') if node.returns else "None"
+            }
+            if not doc:
+                emit(ast.unparse(node), "function", func_info, "docstring")
+            if isinstance(node.parent, ast.ClassDef):
+                for cls in result["classes"]:
+                    if cls["name"] == node.parent.name:
+                        cls["methods"].append(func_info)
+                        break
+            else:
+                result["functions"].append(func_info)
+
+        elif isinstance(node, ast.If):
+            entry = {
+                "condition": ast.unparse(node.test),
+                "lineno": node.lineno,
+                "description": None
+            }
+            result["control_flows"]["if"].append(entry)
+            emit(ast.unparse(node), "if statement", entry, "description")
+
+        elif isinstance(node, ast.For):
+            entry = {
+                "condition": f"{ast.unparse(node.target)} in {ast.unparse(node.iter)}",
+                "lineno": node.lineno,
+                "description": None
+            }
+            result["control_flows"]["for"].append(entry)
+            emit(ast.unparse(node), "for loop", entry, "description")
+
+        elif isinstance(node, ast.While):
+            entry = {
+                "condition": ast.unparse(node.test),
+                "lineno": node.lineno,
+                "description": None
+            }
+            result["control_flows"]["while"].append(entry)
+            emit(ast.unparse(node), "while loop", entry, "description")
+
+        elif isinstance(node, ast.Match):
+            case_entries = []
+            for case in node.cases:
+                pattern = "default" if isinstance(case.pattern, ast.MatchAs) and case.pattern.pattern is None else ast.unparse(case.pattern)
+                body = "\n".join(ast.unparse(stmt) for stmt in case.body)
+                case_entries.append({
+                    "pattern": pattern,
+                    "statements": body
+                })
+            result["control_flows"]["switch"].append({
+                "condition": ast.unparse(node.subject),
+                "lineno": node.lineno,
+                "description": f"Match statement with {len(node.cases)} case(s)",
+                "cases": case_entries
+            })
+
+        elif isinstance(node, ast.Try):
+            handlers = [h.name or "Exception" for h in node.handlers]
+            entry = {
+                "condition": ", ".join(handlers),
+                "lineno": node.lineno,
+                "description": None
+            }
+            result["control_flows"]["try"].append(entry)
+            emit(ast.unparse(node), "try block", entry, "description")
+
+    return result
+
+def attach_parents(node, parent=None):
+    for child in ast.iter_child_nodes(node):
+        child.parent = parent
+        attach_parents(child, child)
@@ -0,0 +1,116 @@
+# parser/log.py
+import os
+import json
+import time
+import random
+import logging
+from contextlib import contextmanager
+
+# 🪵 Leveled, structured logging
+#
+# Every line is an event name plus key=value fields, or one JSON object per line
+# with CODESCROLL_LOG_FORMAT=json. Events that fire per request or per batch go
+# through sampled(), so big docs don't turn into a wall of stdout.
+
+LOG_LEVEL = os.getenv("CODESCROLL_LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("CODESCROLL_LOG_FORMAT", "text")
+LOG_SAMPLE_RATE = float(os.getenv("CODESCROLL_LOG_SAMPLE_RATE", "0.01"))
+
+
+class StructuredFormatter(logging.Formatter):
+    def __init__(self, as_json=False):
+        super().__init__()
+        self.as_json = as_json
+
+    def format(self, record):
+        fields = getattr(record, "fields", {})
+        if self.as_json:
+            entry = {
+                "ts": round(record.created, 3),
+                "level": record.levelname.lower(),
+                "logger": record.name,
+                "event": record.getMessage(),
+                **fields,
+            }
+            if record.exc_info:
+                entry["exc"] = self.formatException(record.exc_info)
+            return json.dumps(entry, default=str, ensure_ascii=False)
+
+        line = f"{self.formatTime(record)} {record.levelname:<7} {record.name} {record.getMessage()}"
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+def configure():
+    root = logging.getLogger("codescroll")
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(StructuredFormatter(as_json=LOG_FORMAT == "json"))
+        root.addHandler(handler)
+        root.setLevel(LOG_LEVEL)
+        root.propagate = False
+    return root
+
+
+class Logger:
+    """``log.info("event", key=value, ...)`` on top of a stdlib logger under ``codescroll``."""
+
+    def __init__(self, name):
+        configure()
+        self._logger = logging.getLogger(f"codescroll.{name}")
+
+    def enabled(self, level):
+        return self._logger.isEnabledFor(level)
+
+    def log(self, level, event, exc_info=False, **fields):
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, event, exc_info=exc_info, extra={"fields": fields})
+
+    def debug(self, event, **fields):
+        self.log(logging.DEBUG, event, **fields)
+
+    def info(self, event, **fields):
+        self.log(logging.INFO, event, **fields)
+
+    def warning(self, event, **fields):
+        self.log(logging.WARNING, event, **fields)
+
+    def error(self, event, **fields):
+        self.log(logging.ERROR, event, **fields)
+
+    def exception(self, event, **fields):
+        # Only meaningful inside an ``except`` block: attaches the traceback
+        self.log(logging.ERROR, event, exc_info=True, **fields)
+
+    def sampled(self, event, rate=None, **fields):
+        """Hot-path event: every one at DEBUG, otherwise a random ``rate`` share of them at INFO."""
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self.debug(event, **fields)
+            return
+        rate = LOG_SAMPLE_RATE if rate is None else rate
+        if rate > 0 and random.random() < rate:
+            self.info(event, sample_rate=rate, **fields)
+
+    @contextmanager
+    def span(self, stage, **fields):
+        """Time a pipeline stage and log it with ``ms`` and ``outcome`` when it ends.
+
+        Yields the field dict, so the body can add what it only learns on the way
+        (sizes, counts).
+        """
+        started = time.perf_counter()
+        try:
+            yield fields
+        except BaseException as e:
+            ms = round((time.perf_counter() - started) * 1000, 1)
+            self.warning(stage, ms=ms, outcome="failed", error=type(e).__name__, **fields)
+            raise
+        ms = round((time.perf_counter() - started) * 1000, 1)
+        self.info(stage, ms=ms, outcome="ok", **fields)
+
+
+def get_logger(name):
+    return Logger(name)
@@ -0,0 +1,182 @@
+# parser/metrics.py
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# 📈 In-process metrics, served in the Prometheus text format from /metrics
+#
+# Updating an instrument is one lock and a couple of adds. Numbers other objects
+# already keep (cache hits, the admission queue) are read through callbacks at
+# scrape time instead of being mirrored here.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in pairs) + "}"
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if any(m.name == metric.name for m in self._metrics):
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.lines())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help, labels=(), registry=REGISTRY):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+        if registry is not None:
+            registry.register(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} takes labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def lines(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{format_labels(self.label_names, key)} {format_value(value)}" for key, value in values]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labels, registry)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (+Inf last), sum, count; made cumulative only when scraped
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def lines(self):
+        with self._lock:
+            values = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items())
+
+        lines = []
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                labels = format_labels(self.label_names, key, [("le", format_value(float(bound)))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class CallbackMetric(Metric):
+    """A counter or gauge whose values are read from ``read()`` (``{label values tuple: value}``) at scrape time."""
+
+    def __init__(self, kind, name, help, read, labels=(), registry=REGISTRY):
+        self.kind = kind
+        self.read = read
+        super().__init__(name, help, labels, registry)
+
+    def lines(self):
+        return [
+            f"{self.name}{format_labels(self.label_names, key)} {format_value(value)}"
+            for key, value in sorted(self.read().items())
+        ]
+
+
+# 📊 The pipeline's instruments
+
+PARSE_SECONDS = Histogram("codescroll_parse_seconds", "Time to extract symbols from one file.", ["language"])
+GEMINI_SECONDS = Histogram("codescroll_gemini_request_seconds", "Latency of one Gemini describe request.")
+GEMINI_BATCH_SIZE = Histogram(
+    "codescroll_gemini_batch_size", "Snippets sent in one Gemini request.", buckets=(1, 2, 3, 5, 10, 20, 50)
+)
+RENDER_SECONDS = Histogram("codescroll_render_seconds", "Time to render documentation.", ["format", "kind"])
+
+SNIPPETS_DESCRIBED = Counter("codescroll_snippets_described_total", "Snippets that got a description written back.")
+ERRORS = Counter("codescroll_errors_total", "Errors by pipeline stage.", ["stage"])
+GENERATIONS = Counter("codescroll_generations_total", "Finished generations by outcome (done, cancelled, failed).", ["outcome"])
+
+
+def render():
+    return REGISTRY.render()
@@ -0,0 +1,111 @@
+# parser/parse_cache.py
+import os
+import json
+import time
+import zlib
+import hashlib
+
+from parser.render_cache import file_digest, atomic_write
+from parser.log import get_logger
+
+log = get_logger("parse_cache")
+
+# 🔖 Bump when the shape of parse results changes
+PARSE_SCHEMA_VERSION = 1
+
+# ⌛ Seconds a result with failed or pending descriptions is served to callers that accept one
+PARTIAL_TTL = float(os.getenv("CODESCROLL_PARTIAL_TTL", "300"))
+
+# Anything that changes what a parse produces (extractors, the Gemini prompt) is part of the key
+_VERSIONED_SOURCES = ["file_parser.py", "gemini_client.py", "languages"]
+_parser_version = None
+
+def versioned_files(here):
+    for name in _VERSIONED_SOURCES:
+        path = os.path.join(here, name)
+        if os.path.isdir(path):
+            yield from (os.path.join(path, f) for f in sorted(os.listdir(path)) if f.endswith(".py"))
+        else:
+            yield path
+
+def parser_version():
+    global _parser_version
+    if _parser_version is None:
+        sha = hashlib.sha256(str(PARSE_SCHEMA_VERSION).encode("ascii"))
+        here = os.path.dirname(__file__)
+        for path in versioned_files(here):
+            sha.update(file_digest(path).encode("ascii"))
+        _parser_version = f"{PARSE_SCHEMA_VERSION}:{sha.hexdigest()[:16]}"
+    return _parser_version
+
+
+class ParseCache:
+    """Parse results keyed by source content hash + extension + parser version.
+
+    Callers pass the sha256 of the bytes they parsed (see file_parser.read_source)
+    rather than a path, so an entry can't end up under the hash of whatever the
+    file was replaced with in the meantime. Entries are minified JSON compressed
+    with zlib, sharded into sub-directories so no single directory grows huge.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def key_for(self, digest, ext):
+        parts = f"{digest}|{ext.lower()}|{parser_version()}"
+        return hashlib.sha256(parts.encode("utf-8")).hexdigest()
+
+    def path_for(self, digest, ext):
+        key = self.key_for(digest, ext)
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json.z")
+
+    def get(self, digest, ext, partial_ok=False):
+        """Cached parse result for the content with this sha256, or None.
+
+        Results stored as ``partial`` only count with ``partial_ok``, and only
+        for PARTIAL_TTL seconds after they were written.
+        """
+        cache_path = self.path_for(digest, ext)
+        try:
+            with open(cache_path, "rb") as f:
+                payload = json.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (zlib.error, ValueError) as e:
+            log.warning("💥 dropping corrupt parse cache entry", path=cache_path, error=str(e))
+            try:
+                os.remove(cache_path)
+            except FileNotFoundError:
+                pass  # Another reader already dropped it
+            self.misses += 1
+            return None
+
+        if payload.get("v") != parser_version():
+            self.misses += 1
+            return None
+        if payload.get("partial") and not (partial_ok and time.time() - payload.get("at", 0) <= PARTIAL_TTL):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return payload["data"]
+
+    def put(self, digest, ext, result, partial=False):
+        """Store a parse result; ``partial`` marks one with failed or pending descriptions (see get)."""
+        cache_path = self.path_for(digest, ext)
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        payload = {"v": parser_version(), "data": result}
+        if partial:
+            payload.update(partial=True, at=time.time())
+        blob = zlib.compress(json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8"), 6)
+
+        def write(tmp_path):
+            with open(tmp_path, "wb") as f:
+                f.write(blob)
+
+        atomic_write(cache_path, write)
+        return cache_path
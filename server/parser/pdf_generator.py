@@ -1,15 +1,19 @@
 from reportlab.lib.pagesizes import A4
 from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle,
+    SimpleDocTemplate, Paragraph, Spacer, Table, LongTable, TableStyle,
     PageBreak, Flowable
 )
 from reportlab.platypus.flowables import HRFlowable
 from reportlab.platypus.tableofcontents import TableOfContents
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import mm
+from reportlab.lib.units import mm, inch
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.lib import colors
 from datetime import datetime
+from pypdf import PdfWriter
+from parser.doc_model import build_document
 import html  # Make sure to import this to escape any special characters
+import io
 import re
 
 toc = TableOfContents()
@@ -18,6 +22,57 @@ toc.levelStyles = [
     ParagraphStyle(fontSize=12, name='TOCHeading2', leftIndent=40, firstLineIndent=-20, spaceBefore=5, leading=12),
 ]
 
+# 📐 Section tables get fixed column widths instead of reportlab measuring every cell.
+# Width is shared out by weight, so descriptions and CSS blocks get the most room.
+FRAME_WIDTH = A4[0] - 2 * inch  # SimpleDocTemplate's default 1" margins
+CELL_PADDING = 12  # 6pt left + 6pt right
+CELL_FONT = ("Helvetica", 10)
+COLUMN_WEIGHTS = {
+    "Line No.": 0.6,
+    "Returns": 0.8,
+    "Condition": 1.4,
+    "Caught error name": 1.4,
+    "Attributes": 1.4,
+    "Methods": 1.6,
+    "Cases": 1.8,
+    "Elements": 2.0,
+    "Description": 2.6,
+}
+
+# Rows per table. A table that spills over a page is re-measured for every page it
+# spans, so one huge table costs O(rows²); fixed-size chunks keep it linear.
+TABLE_CHUNK_ROWS = 100
+
+styles = getSampleStyleSheet()
+NORMAL = styles["Normal"]
+
+SECTION_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTNAME', (0, 1), (-1, -1), CELL_FONT[0]),
+    ('FONTSIZE', (0, 1), (-1, -1), CELL_FONT[1]),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+])
+
+TOC_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
+])
+
+def column_widths(headers):
+    weights = [COLUMN_WEIGHTS.get(header, 1.0) for header in headers]
+    total = sum(weights)
+    return [FRAME_WIDTH * weight / total for weight in weights]
+
 class AnchorHeading(Paragraph):
     def __init__(self, text, style, bookmark_name, level=0):
         self.bookmark_name = bookmark_name
@@ -55,197 +110,65 @@ def to_camel_case(text):
 def strip_emojis(text):
     return re.sub(r'[^\x00-\x7F]+', '', text)
 
-def remove_css_comments(value):
-    if isinstance(value, str):
-        return re.sub(r'/\*.*?\*/', '', value, flags=re.DOTALL).strip()
-    elif isinstance(value, list):
-        return [remove_css_comments(item) for item in value]
-    elif isinstance(value, dict):
-        return {k: remove_css_comments(v) for k, v in value.items()}
-    return value  # If it's not a str/list/dict, return as-is
-
-def clean_section_comments(section):
-    cleaned = {}
-    for key, value in section.items():
-        if isinstance(value, list):
-            cleaned[key] = [remove_css_comments(item) for item in value]
-        else:
-            cleaned[key] = remove_css_comments(value)
-    return cleaned
-
-def convert_to_pdf_format(doc_data, ext=None):
-    # Mapping of internal keys to display-friendly names
-    header_renames = {
-        "attrs": "Attributes",
-        "lineno": "Line No.",
-        "docstring": "Description",
-    }
-    print("doc_data: ", doc_data)
-    print("ext: ", ext)
-    
-    css_sections = {"css", "media", "ids", "classes"}
-    
-    styles = getSampleStyleSheet()
-    normal = styles["Normal"]
-
+def pdf_cell(field, value, width, normal=NORMAL):
+    """One table cell for a Document record field.
+
+    Text that fits on one line of a ``width``-wide column stays a plain string,
+    which reportlab draws without any paragraph layout; everything else wraps.
+    """
+    if field == "cases":
+        case_texts = [f"{case.pattern or '—'}:\n{case.statements or '—'}" for case in value or ()]
+        return Paragraph("<br/><br/>".join(html.escape(strip_emojis(line)) for line in case_texts), normal)
+
+    if field == "methods":
+        methods_text = "<br/><br/>".join(
+            f"{html.escape(m.name)}({', '.join(map(html.escape, m.params))})" +
+            (f" → {html.escape(m.returns)}" if m.returns and m.returns.lower() != "unknown" else "")
+            for m in value
+        )
+        return Paragraph(methods_text, normal)
+
+    if field == "elements":
+        # ✨ Format 'elements' into styled CSS-like block chunks
+        lines = []
+        for el in value:
+            if hasattr(el, "properties"):
+                lines.append(f"<b>{html.escape(el.selector)}</b> &#123;")
+                for prop in el.properties:
+                    lines.append(f"&nbsp;&nbsp;{html.escape(prop)}")
+                lines.append("&#125;<br/>")
+            else:
+                lines.append(html.escape(str(el)))
+        return Paragraph("<br/>".join(lines), normal)
+
+    text = strip_emojis(str(value))
+    if "\n" not in text and stringWidth(text, *CELL_FONT) <= width - CELL_PADDING:
+        return text
+    return Paragraph(html.escape(text), normal)
+
+def convert_to_pdf_format(documents):
+    """Sections of ``{"title", "headers", "items"}`` for generate_pdf, read straight off the Documents' tables."""
     converted = []
-
-    for section in doc_data:
-        section = clean_section_comments(section)
-        for title, content in section.items():
-            if title == "tags":
-                print(f"🔕 Skipping 'tags' section.")
-                continue  # Skip processing for 'tags'
-            if title.strip().lower() == "with":
-                continue
-
-            if isinstance(content, dict):  # Control flows or HTML tags
-                for keyword, items in content.items():
-                    print("keywords: ", keyword)
-                    if keyword.strip().lower() == "with":
-                        continue
-                    if keyword.strip().lower() == "switch" and ext == "Python":
-                        print("✨ Renaming 'switch' to 'match' in keyword")
-                        keyword = "Match"
-
-                    tag_name = keyword.strip().lower()
-
-                    if tag_name in ["link", "script"]:
-                        # Exclude 'id' and 'class'
-                        filtered_keys = [key for key in items[0].keys() if key not in ("id", "class")] if items else []
-                        headers = [header_renames.get(h, h.title()) for h in filtered_keys]
-                        rows = [
-                            [html.escape(strip_emojis(str(item.get(key, "")))) for key in filtered_keys]
-                            for item in items
-                        ]
-
-                    else:
-                        raw_keys = list(items[0].keys()) if items else ["Line", "Condition", "Description"]
-
-                        # 🎯 Special headers
-                        if tag_name == "try" and "condition" in raw_keys:
-                            header_renames["condition"] = "Caught error name"
-
-                        if tag_name == "switch" and "cases" in raw_keys:
-                            raw_keys.append("cases")
-                            header_renames["cases"] = "Cases"
-
-                        # Reordering: lineno first, description/docstring last
-                        first = [k for k in raw_keys if k == "lineno"]
-                        last = [k for k in raw_keys if k in ("docstring", "description")]
-                        middle = [k for k in raw_keys if k not in first + last + ["cases"]]
-                        ordered_keys = first + middle + (["cases"] if "cases" in raw_keys else []) + last
-
-                        headers = [header_renames.get(k, k.title()) for k in ordered_keys]
-
-                        rows = []
-                        for item in items:
-                            row = []
-                            for key in ordered_keys:
-                                if key == "cases":
-                                    case_texts = []
-                                    for case in item.get("cases", []):
-                                        label = case.get("pattern", "—")
-                                        body = case.get("statements", "—")
-                                        case_texts.append(f"{label}:\n{body}")
-                                    value = Paragraph("<br/><br/>".join(html.escape(strip_emojis(line)) for line in case_texts), normal)
-                                else:
-                                    value = html.escape(strip_emojis(str(item.get(key, "—"))))
-                                row.append(value)
-                            rows.append(row)
-
-                    converted.append({
-                        "title": f"{keyword.capitalize()} Tags" if 'tags' in title.lower() else f"{keyword.capitalize()} Statements",
-                        "headers": headers,
-                        "items": rows,
-                    })
-
-            elif isinstance(content, list):
-                raw_keys = list(content[0].keys()) if content else []
-                
-                # 🧙 If any item has 'elements', make sure to include it as a column
-                if any("elements" in item for item in content):
-                     if "elements" not in raw_keys:
-                        raw_keys.append("elements")
-                
-                if title.strip().lower() in ["classes", "ids", "media"]:
-                    raw_keys = [k for k in raw_keys if k.lower() != "selector"]
-
-                # Reorder for classes/functions
-                first = [k for k in raw_keys if k == "lineno"]
-                last = [k for k in raw_keys if k == "docstring"]
-                middle = [k for k in raw_keys if k not in first + last]
-
-                ordered_keys = first + middle + last
-                headers = [header_renames.get(k, k.title()) for k in ordered_keys]
-                
-                print ("headers: ", headers)
-                
-                # 🧙 Rename 'switch' to 'match' for Python files
-                if ext == ".py" and title.strip().lower() == "switch":
-                    print("🪄 Replacing 'switch' with 'match' in list section")
-                    title = "match"
-
-                items = []
-                for item in content:
-                    row = []
-                    for key in ordered_keys:
-                        if key == "methods":
-                            methods_text = "<br/><br/>".join(
-                                f"{html.escape(m['name'])}({', '.join(map(html.escape, m['params']))})" +
-                                (f" → {html.escape(m['returns'])}" if m['returns'] and m['returns'].lower() != "unknown" else "")
-                                for m in item["methods"]
-                            )
-                            value = Paragraph(methods_text, normal)
-                        else:
-                            print("Using else block!!!")
-                            cell_value = item.get(key, "")
-
-                            if title.strip().lower() in css_sections and key.lower() == "properties":
-                                # 🌸 Format CSS properties to be multiline and indented
-                                formatted = "<br/>".join(
-                                    f"&nbsp;&nbsp;{html.escape(line.strip())}"
-                                    for line in str(cell_value).split(";") if line.strip()
-                                )
-                                value = Paragraph(formatted, normal)
-
-                            elif key.lower() == "elements":
-                                print("elements is ",key)
-                                # ✨ Format 'elements' into styled CSS-like block chunks
-                                lines = []
-                                if isinstance(cell_value, list):
-                                    for el in cell_value:
-                                        if isinstance(el, dict) and "selector" in el and "properties" in el:
-                                            lines.append(f"<b>{html.escape(el['selector'])}</b> &#123;")
-                                            for prop in el["properties"]:
-                                                lines.append(f"&nbsp;&nbsp;{html.escape(prop.strip())}")
-                                            lines.append("&#125;<br/>")
-                                        else:
-                                            lines.append(html.escape(str(el).strip()))
-                                    formatted = "<br/>".join(lines)
-                                    value = Paragraph(formatted, normal)
-                                else:
-                                    value = Paragraph(html.escape(strip_emojis(str(cell_value))), normal)
-
-                            else:
-                                value = Paragraph(html.escape(strip_emojis(str(cell_value))), normal)
-
-                        row.append(value)
-                    items.append(row)
-
-                converted.append({
-                    "title": title.replace("_", " ").replace("-", " ").title() or "Untitled Section",
-                    "headers": headers,
-                    "items": items,
-                })
+    for doc in documents:
+        for section in doc.sections:
+            headers = [header for _, header in section.columns]
+            widths = column_widths(headers)
+            converted.append({
+                "title": section.title,
+                "headers": headers,
+                "items": [
+                    [pdf_cell(field, getattr(record, field), width) for (field, _), width in zip(section.columns, widths)]
+                    for record in section.records
+                ],
+            })
 
     return converted
 
-def generate_pdf(data, output_path, filename="Documentation"):
-    styles = getSampleStyleSheet()
+def generate_pdf(data, output_path, filename="Documentation", token=None, toc_page_numbers=False):
+    """Lay out the PDF in one pass; ``toc_page_numbers`` adds page numbers to the TOC at the cost of a multi-pass build."""
     h1 = styles["Heading1"]
-    normal = styles["Normal"]
-    
+    normal = NORMAL
+
     title_heading = ParagraphStyle(
         "TitleHeading",
         fontName="Helvetica-Bold",
@@ -275,12 +198,13 @@ def generate_pdf(data, output_path, filename="Documentation"):
     subtitle_style = ParagraphStyle("Subtitle", alignment=1, fontSize=16, textColor=colors.grey)
     date_style = ParagraphStyle("Date", alignment=1, fontSize=12, textColor=colors.darkgray)
 
-    toc_entries = []
-
     class MyDocTemplate(SimpleDocTemplate):
         def afterFlowable(self, flowable):
-            if isinstance(flowable, AnchorHeading):
-                toc_entries.append((0, flowable.getPlainText(), self.canv.getPageNumber(), flowable.bookmark_name))
+            # 🛑 Bail out of a long layout as soon as the generation is cancelled
+            if token:
+                token.raise_if_cancelled("PDF rendering")
+            if toc_page_numbers and isinstance(flowable, AnchorHeading):
+                self.notify("TOCEntry", (flowable.level, flowable.getPlainText(), self.page, flowable.bookmark_name))
 
     def add_page_number(canvas, doc):
         page_num_text = f"Page {doc.page}"
@@ -300,123 +224,78 @@ def generate_pdf(data, output_path, filename="Documentation"):
         elements.append(Paragraph("Generated by CodeScroll", bottom_credit_style))
         elements.append(PageBreak())
 
-    # === FIRST PASS (collect TOC entries) ===
-    doc = MyDocTemplate(output_path, pagesize=A4)
-    temp_elements = []
+    elements = []
 
     # Title Page
-    add_title_page(temp_elements)
-
-    # TOC Placeholder
-    temp_elements.append(Paragraph("Table of Contents", h1))
-    temp_elements.append(Spacer(1, 12))
-    temp_elements.append(Paragraph("TOC will be placed here.", normal))
-    temp_elements.append(PageBreak())
-
-    # Add section headings & content
+    add_title_page(elements)
+
+    elements.append(Paragraph("Table of Contents", h1))
+    elements.append(Spacer(1, 12))
+
+    if toc_page_numbers:
+        # 📑 Page numbers are only known after layout, so this path needs reportlab's multi-pass build
+        contents = TableOfContents()
+        contents.levelStyles = toc.levelStyles
+        elements.append(contents)
+    else:
+        # 📑 The TOC is just the section titles in order, so it comes straight from the data: one layout pass
+        toc_rows = [[Paragraph("Section", normal)]]
+        for section in data:
+            title = section.get("title", "Untitled Section").title()
+            link = f'<link href="#{to_camel_case(title)}">{title.title()}</link>'
+            toc_rows.append([Paragraph(link, normal)])
+
+        toc_table = Table(toc_rows, colWidths=[460])
+        toc_table.setStyle(TOC_TABLE_STYLE)
+        elements.append(toc_table)
+
+    elements.append(PageBreak())
+
+    # Section headings & content
     for section in data:
         title = section.get("title", "Untitled Section").title()
         anchor = to_camel_case(title)
 
-        temp_elements.append(AnchorHeading(title, h1, bookmark_name=anchor, level=0))
-        temp_elements.append(Spacer(1, 6))
+        elements.append(AnchorHeading(title, h1, bookmark_name=anchor, level=0))
+        elements.append(Spacer(1, 6))
 
         if not section["items"]:
-            temp_elements.append(Paragraph("No data available.", normal))
+            elements.append(Paragraph("No data available.", normal))
         else:
             headers = [Paragraph(str(h).title(), normal) for h in section["headers"]]
-            rows = [
-                [cell if isinstance(cell, Paragraph) else Paragraph(str(cell), normal) for cell in row]
-                for row in section["items"]
-            ]
-            
-            table_data = [headers] + rows
-
-            table = Table(table_data, repeatRows=1)
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.aliceblue),
-                ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.whitesmoke, colors.aliceblue]),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('LEFTPADDING', (0, 0), (-1, -1), 6),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-            ]))
-            temp_elements.append(table)
-
-        temp_elements.append(PageBreak())
-
-    # First pass: just collect TOC info
-    doc.build(temp_elements, onFirstPage=add_page_number, onLaterPages=add_page_number)
-
-    # === SECOND PASS (final document with actual TOC) ===
-    final_elements = []
+            widths = column_widths(section["headers"])
+            items = section["items"]
 
-    # Title Page
-    add_title_page(final_elements)
-
-    # Build TOC Table (no page numbers now)
-    final_elements.append(Paragraph("Table of Contents", h1))
-    final_elements.append(Spacer(1, 12))
-
-    toc_rows = [[Paragraph("Section", normal)]]
-    for level, title, page, anchor in toc_entries:
-        link = f'<link href="#{anchor}">{title.title()}</link>'
-        toc_rows.append([Paragraph(link, normal)])
-
-    toc_table = Table(toc_rows, colWidths=[460])
-    toc_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
-    ]))
-    final_elements.append(toc_table)
-    final_elements.append(PageBreak())
-
-    # Re-add content
-    for section in data:
-        title = section.get("title", "Untitled Section").title()
-        anchor = to_camel_case(title)
+            # 🧱 Long sections become a run of same-width tables, each repeating the header row
+            for start in range(0, len(items), TABLE_CHUNK_ROWS):
+                table = LongTable([headers] + items[start:start + TABLE_CHUNK_ROWS], colWidths=widths, repeatRows=1)
+                table.setStyle(SECTION_TABLE_STYLE)
+                elements.append(table)
 
-        final_elements.append(AnchorHeading(title, h1, bookmark_name=anchor, level=0))
-        final_elements.append(Spacer(1, 6))
+        elements.append(PageBreak())
 
-        if not section["items"]:
-            final_elements.append(Paragraph("No data available.", normal))
-        else:
-            headers = [Paragraph(str(h).title(), normal) for h in section["headers"]]
-            rows = [
-                [cell if isinstance(cell, Paragraph) else Paragraph(str(cell), normal) for cell in row]
-                for row in section["items"]
-            ]
-            table_data = [headers] + rows
-
-            table = Table(table_data, repeatRows=1)
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ]))
-            final_elements.append(table)
-
-        final_elements.append(PageBreak())
-
-    # Final PDF generation
-    final_doc = MyDocTemplate(output_path, pagesize=A4)
-    final_doc.title = "Documentation for " + filename
-    final_doc.author = "Document Generator"
-    final_doc.subject = "CodeScroll: Auto-generated code documentation"
-    final_doc.build(final_elements, onFirstPage=add_page_number, onLaterPages=add_page_number)
+    doc = MyDocTemplate(output_path, pagesize=A4)
+    doc.title = "Documentation for " + filename
+    doc.author = "Document Generator"
+    doc.subject = "CodeScroll: Auto-generated code documentation"
+    if toc_page_numbers:
+        doc.multiBuild(elements, onFirstPage=add_page_number, onLaterPages=add_page_number)
+    else:
+        doc.build(elements, onFirstPage=add_page_number, onLaterPages=add_page_number)
+
+def render_pdf_part(filename, parsed, ext, output_path):
+    """Render one file's parse result to ``output_path``; module-level so a process pool can run it."""
+    doc = build_document(filename, parsed, ext)
+    generate_pdf(convert_to_pdf_format([doc]), output_path, filename)
+
+def merge_pdfs(parts, title="Documentation"):
+    """Concatenate ``(name, path)`` PDFs into one in-memory file, with a top-level bookmark per part."""
+    writer = PdfWriter()
+    for name, path in parts:
+        writer.append(path, outline_item=name)
+    writer.add_metadata({"/Title": title, "/Subject": "CodeScroll: Auto-generated code documentation"})
+
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,138 @@
+# parser/pipeline.py
+import os
+import time
+import queue
+import threading
+
+# 🚰 Extraction → description, overlapped
+#
+# Extractors emit describe targets as they walk a file. Instead of collecting the
+# whole list first, a TargetStream runs the extractor on a producer thread that
+# feeds a bounded queue, and the describe loop drains it batch by batch. The first
+# Gemini request goes out while the rest of the file is still being parsed, and
+# once the queue is full the extractor waits, which caps how many snippet strings
+# are held at once. ``CODESCROLL_PIPELINE_DEPTH=0`` turns streaming off.
+
+PIPELINE_DEPTH = int(os.getenv("CODESCROLL_PIPELINE_DEPTH", "64"))
+
+# How often a blocked producer checks whether the consumer gave up
+_PUT_POLL_SECONDS = 0.1
+# How long close() waits for the producer to notice; an extractor that's stuck past this finishes unwatched
+CLOSE_TIMEOUT = 1.0
+
+_END = object()
+
+
+class PipelineClosed(Exception):
+    """Raised inside the extractor once nobody is reading its targets any more."""
+
+
+class TargetStream:
+    """Iterate ``(snippet, type, entry, key)`` targets while ``extract(emit)`` is still running.
+
+    ``keep(chunk)`` can drop targets before they're queued (returning the ones
+    still to describe), e.g. DescriptionCache.fill; it sees ``chunk_size``
+    targets at a time. ``on_done(count)`` is called on the producer thread with
+    the number of targets queued once extraction has finished.
+    """
+
+    def __init__(self, extract, depth=PIPELINE_DEPTH, keep=None, chunk_size=1, on_done=None):
+        self._queue = queue.Queue(maxsize=max(depth, 1))
+        self._closed = threading.Event()
+        self._keep = keep
+        self._chunk_size = max(chunk_size, 1) if keep else 1
+        self._chunk = []
+        self._on_done = on_done
+        self._result = None
+        self._error = None
+        self._extracted = False
+        self.queued = 0
+        self._thread = threading.Thread(target=self._run, args=(extract,), name="extract", daemon=True)
+        self._thread.start()
+
+    def __len__(self):
+        """Targets queued so far; final once extraction is done."""
+        return self.queued
+
+    @property
+    def total(self):
+        """How many targets there are in all, or None while extraction is still running."""
+        return self.queued if self._extracted else None
+
+    def __iter__(self):
+        while True:
+            item = self._queue.get()
+            if item is _END:
+                if self._error is not None:
+                    raise self._error
+                return
+            yield item
+
+    def _put(self, item):
+        # 🧯 Block while the queue is full (backpressure), but not past close()
+        while True:
+            if self._closed.is_set():
+                raise PipelineClosed()
+            try:
+                self._queue.put(item, timeout=_PUT_POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+
+    def _flush(self):
+        chunk, self._chunk = self._chunk, []
+        for target in (self._keep(chunk) if self._keep else chunk):
+            self._put(target)
+            self.queued += 1
+
+    def _emit(self, snippet, typ, entry, key):
+        # 🛑 Stop a CPU-bound extractor at its next target, not only when the queue is full
+        if self._closed.is_set():
+            raise PipelineClosed()
+        self._chunk.append((snippet, typ, entry, key))
+        if len(self._chunk) >= self._chunk_size:
+            self._flush()
+
+    def _run(self, extract):
+        try:
+            self._result = extract(self._emit)
+            self._flush()
+            self._extracted = True
+            if self._on_done:
+                self._on_done(self.queued)
+        except PipelineClosed:
+            return
+        except Exception as e:
+            self._error = e
+        try:
+            self._put(_END)
+        except PipelineClosed:
+            pass
+
+    def result(self):
+        """The extractor's return value, once every target has been read."""
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def close(self, timeout=CLOSE_TIMEOUT):
+        """Stop the producer (if it's still going) and drop whatever is queued.
+
+        Waits at most ``timeout`` seconds: the producer stops at its next
+        target, but an extractor busy in one long stretch without any is left
+        to run out on its own (it's a daemon thread and its output is dropped).
+        """
+        self._closed.set()
+        give_up_at = time.monotonic() + timeout
+        while self._thread.is_alive() and time.monotonic() < give_up_at:
+            try:
+                self._queue.get(timeout=_PUT_POLL_SECONDS)
+            except queue.Empty:
+                pass
+        # Don't keep snippet strings around for a consumer that's gone
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
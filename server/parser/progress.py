@@ -0,0 +1,182 @@
+# parser/progress.py
+import threading
+import time
+from contextlib import contextmanager
+
+# ⏱️ Per-generation timing and progress
+#
+# The status string ("generating:40") only covers the file being described right
+# now. GenerationProgress tracks every file of an upload, how long each pipeline
+# stage took, and an ETA from the snippets-per-second Gemini has actually managed.
+
+# How much a new batch moves the process-wide describe rate
+THROUGHPUT_SMOOTHING = 0.2
+
+
+class StageTimer:
+    """Wall time per named stage, added up across repeats (every file's parse goes into ``parse``)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._durations = {}
+        self._notes = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self._durations[stage] = self._durations.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def note(self, stage, description):
+        """Attach a short description to a stage (``cache`` → ``hit``), shown as ``desc`` in Server-Timing."""
+        with self._lock:
+            self._notes[stage] = description
+
+    def as_dict(self):
+        with self._lock:
+            return {stage: round(seconds * 1000, 1) for stage, seconds in self._durations.items()}
+
+    def server_timing(self):
+        """``Server-Timing`` header value, e.g. ``parse;dur=12.5, gemini;dur=840.2, total;dur=901.0``."""
+        with self._lock:
+            stages = dict(self._durations)
+            notes = dict(self._notes)
+        stages["total"] = time.perf_counter() - self.started
+
+        entries = []
+        for stage in dict.fromkeys([*stages, *notes]):
+            entry = stage
+            if stage in stages:
+                entry += f";dur={stages[stage] * 1000:.1f}"
+            if stage in notes:
+                entry += f';desc="{notes[stage]}"'
+            entries.append(entry)
+        return ", ".join(entries)
+
+
+class Throughput:
+    """Smoothed snippets-per-second of the describe loop, cooldowns included."""
+
+    def __init__(self, smoothing=THROUGHPUT_SMOOTHING):
+        self.smoothing = smoothing
+        self.rate = None
+        self._lock = threading.Lock()
+
+    def observe(self, snippets, seconds):
+        if seconds <= 0:
+            return
+        with self._lock:
+            rate = snippets / seconds
+            self.rate = rate if self.rate is None else self.rate + self.smoothing * (rate - self.rate)
+
+
+# 🌐 Shared by every generation, so a new upload gets an ETA before its first batch returns
+THROUGHPUT = Throughput()
+
+
+class GenerationProgress:
+    """Per-file and snippet-weighted progress plus stage timings for one upload."""
+
+    def __init__(self, filenames, throughput=THROUGHPUT):
+        self.timer = StageTimer()
+        self.throughput = throughput
+        self.files = {name: {"name": name, "status": "pending", "snippets": None, "described": 0, "pending": 0} for name in filenames}
+        self.current = None
+        self.stopped_at = None
+        self._own = Throughput()
+        self._lock = threading.Lock()
+
+    def stage(self, name):
+        return self.timer.stage(name)
+
+    def file_started(self, name):
+        with self._lock:
+            self.current = self.files.setdefault(name, {"name": name, "status": "pending", "snippets": None, "described": 0, "pending": 0})
+            self.current["status"] = "parsing"
+
+    def file_cached(self):
+        """The current file came out of the parse cache: nothing left to describe."""
+        with self._lock:
+            if self.current:
+                self.current.update(status="cached", snippets=0)
+
+    def file_targets(self, count):
+        with self._lock:
+            if self.current:
+                self.current.update(status="describing" if count else "parsed", snippets=count)
+
+    def snippets_described(self, count, seconds):
+        """``count`` more snippets of the current file are done, ``seconds`` after the previous batch."""
+        self.throughput.observe(count, seconds)
+        self._own.observe(count, seconds)
+        with self._lock:
+            if self.current:
+                self.current["described"] += count
+
+    def snippets_pending(self, count):
+        """``count`` snippets of the current file ran out of time and got placeholder descriptions."""
+        with self._lock:
+            if self.current:
+                self.current["pending"] += count
+
+    def file_done(self):
+        with self._lock:
+            if self.current and self.current["status"] != "cached":
+                self.current["status"] = "done"
+            self.current = None
+
+    def finished(self):
+        with self._lock:
+            for entry in self.files.values():
+                if entry["status"] not in ("cached", "done"):
+                    entry["status"] = "done"
+
+    def stop(self):
+        """Freeze ``elapsed_ms`` once the generation is over, however it ended."""
+        if self.stopped_at is None:
+            self.stopped_at = time.perf_counter()
+
+    def payload(self):
+        """Progress JSON: per-file counts, overall percent, ETA and stage timings (ms)."""
+        with self._lock:
+            files = [dict(entry) for entry in self.files.values()]
+
+        # Files not parsed yet are guessed at the average snippet count of the ones that are
+        known = [entry["snippets"] for entry in files if entry["snippets"] is not None and entry["status"] != "cached"]
+        pending = sum(1 for entry in files if entry["snippets"] is None)
+        average = sum(known) / len(known) if known else 0
+        total = sum(known) + pending * average
+        described = sum(entry["described"] for entry in files)
+
+        rate = self._own.rate or self.throughput.rate
+        remaining = max(total - described, 0)
+        if not files or all(entry["status"] in ("cached", "done") for entry in files):
+            percent, eta = 100, 0
+        else:
+            percent = int(described / total * 100) if total else 0
+            eta = round(remaining / rate, 1) if rate and (known or not pending) else None
+
+        for entry in files:
+            entry["percent"] = 100 if entry["status"] in ("cached", "done") else (
+                int(entry["described"] / entry["snippets"] * 100) if entry["snippets"] else 0
+            )
+
+        return {
+            "percent": percent,
+            "eta_seconds": eta,
+            "snippets": {"described": described, "pending": sum(entry["pending"] for entry in files), "total": round(total)},
+            "snippets_per_second": round(rate, 2) if rate else None,
+            "elapsed_ms": round(((self.stopped_at or time.perf_counter()) - self.timer.started) * 1000, 1),
+            "stages": self.timer.as_dict(),
+            "files": files,
+        }
+
+    def server_timing(self):
+        return self.timer.server_timing()
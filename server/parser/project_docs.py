@@ -0,0 +1,153 @@
+# parser/project_docs.py
+import os
+import re
+import json
+from urllib.parse import quote
+
+from parser.file_parser import template_env, generate_html, generate_split_html
+from parser.render_cache import atomic_write
+from parser.doc_model import Class, Function
+
+SEARCH_INDEX_VERSION = 1
+DESCRIPTION_PREVIEW_CHARS = 160
+
+LANGUAGES = {
+    ".py": "Python",
+    ".js": "JavaScript",
+    ".java": "Java",
+    ".cpp": "C++",
+    ".html": "HTML",
+    ".htm": "HTML",
+    ".css": "CSS"
+}
+
+# Too common in generated descriptions to be worth a posting list
+STOPWORDS = {
+    "the", "an", "and", "or", "of", "to", "in", "is", "it", "its", "for", "on", "by", "with", "as", "at",
+    "be", "this", "that", "are", "from", "if", "into", "which", "when", "then", "given", "returns", "function"
+}
+
+_CAMEL = re.compile(r"([a-z0-9])([A-Z])")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_SLUG_UNSAFE = re.compile(r"[./\\]")
+
+def tokenize(text):
+    """Split names and prose into lowercase search terms (``getUserName`` → get, user, name)."""
+    return [t for t in _NON_WORD.split(_CAMEL.sub(r"\1 \2", text or "").lower()) if len(t) > 1]
+
+def file_slug(position, filename):
+    # Flat, so "../../index.html" from a file page always reaches the index (CLI filenames carry directories)
+    return f"{position:04d}-" + _SLUG_UNSAFE.sub("_", filename)
+
+def describe(record):
+    description = record.docstring if isinstance(record, (Class, Function)) else record.description
+    if not isinstance(description, str) or description == "None":
+        return ""
+    return description
+
+def symbols_for(doc):
+    """Searchable symbols of one Document as ``(section_id, name, kind, description)``."""
+    symbols = []
+    for section in doc.sections:
+        for record in section.records:
+            if section.kind == "classes":
+                symbols.append(("classes", record.name or "", "class", describe(record)))
+                for method in record.methods:
+                    symbols.append(("classes", method.name or "", "method", describe(method)))
+            elif section.kind == "functions":
+                symbols.append(("functions", f"{record.name}()", "function", describe(record)))
+            elif section.kind == "statements":
+                name = f"{section.key} {record.condition or ''}".strip()
+                symbols.append((section.key, name, f"{section.key} line {record.lineno}", describe(record)))
+            elif section.kind == "tags":
+                name = f"<{section.key}>"
+                if record.id:
+                    name += f"#{record.id}"
+                css_class = getattr(record, "class")
+                if css_class:
+                    name += "." + ".".join(str(css_class).split())
+                symbols.append((f"tag-{section.key}", name, "tag", describe(record)))
+            else:
+                dom_id = "tab-" + section.key.lower().replace(" ", "_")
+                symbols.append((dom_id, record.selector or record.name or "", section.key, describe(record)))
+    return symbols
+
+def build_search_index(files):
+    """Compact inverted index over symbol names and descriptions.
+
+    ``files`` is a list of ``(filename, href, lang, symbols)``. Posting lists
+    hold sorted symbol ids stored as gaps, which keeps the JSON small.
+    """
+    index = {"v": SEARCH_INDEX_VERSION, "files": [], "symbols": [], "names": {}, "words": {}}
+
+    for file_index, (filename, href, lang, symbols) in enumerate(files):
+        index["files"].append({"name": filename, "href": href, "lang": lang})
+        for section, name, kind, description in symbols:
+            symbol_id = len(index["symbols"])
+            preview = description[:DESCRIPTION_PREVIEW_CHARS] + ("…" if len(description) > DESCRIPTION_PREVIEW_CHARS else "")
+            index["symbols"].append([file_index, section, name, kind, preview])
+
+            for term in set(tokenize(name)):
+                index["names"].setdefault(term, []).append(symbol_id)
+            for term in set(tokenize(description)) - STOPWORDS:
+                index["words"].setdefault(term, []).append(symbol_id)
+
+    # Ids were appended in increasing order, so the gaps are all positive
+    for field in ("names", "words"):
+        for term, ids in index[field].items():
+            index[field][term] = [ids[0]] + [b - a for a, b in zip(ids, ids[1:])]
+
+    return index
+
+def generate_project_docs(documents, output_dir, split_file=None, token=None, pages=None, generation_id=None):
+    """Write one doc page per file plus a searchable project index page (``index.html``).
+
+    ``split_file(doc)`` decides whether a file's page is written as a shell
+    with lazily loaded fragments (see generate_split_html). ``pages`` limits the
+    file pages written to those filenames (the index always covers every file),
+    for when only some files changed since the last call. ``generation_id`` is
+    the upload the pages' download buttons fetch from.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    files = []
+
+    for position, doc in enumerate(documents):
+        if token:
+            token.raise_if_cancelled("rendering")
+
+        slug = file_slug(position, doc.filename)
+        file_dir = os.path.join(output_dir, "files", slug)
+        # 🧭 Each file page links back up to the project index; unchanged pages stay as they are
+        if pages is None or doc.filename in pages:
+            if split_file and split_file(doc):
+                generate_split_html([doc], file_dir, hide_buttons=False, token=token, project_home="../../index.html",
+                                    generation_id=generation_id)
+            else:
+                os.makedirs(file_dir, exist_ok=True)
+                generate_html([doc], os.path.join(file_dir, "index.html"), hide_buttons=False, token=token,
+                              project_home="../../index.html", generation_id=generation_id)
+
+        href = f"files/{slug}/index.html?filename={quote(doc.filename)}"
+        files.append((doc.filename, href, LANGUAGES.get(doc.ext, doc.ext.lstrip(".").upper()), symbols_for(doc)))
+
+    index = build_search_index(files)
+
+    def write_index(tmp_path):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, separators=(",", ":"), ensure_ascii=False)
+
+    atomic_write(os.path.join(output_dir, "search-index.json"), write_index)
+
+    listing = [
+        {"name": name, "href": href, "lang": lang, "symbols": len(symbols)}
+        for name, href, lang, symbols in files
+    ]
+
+    def write_page(tmp_path):
+        page = template_env().get_template("project_index.html")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for chunk in page.generate(files=listing, symbol_count=len(index["symbols"])):
+                f.write(chunk)
+
+    # 🐚 Index page last, so it never links to pages that aren't written yet
+    atomic_write(os.path.join(output_dir, "index.html"), write_page)
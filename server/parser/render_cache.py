@@ -0,0 +1,141 @@
+# parser/render_cache.py
+import os
+import uuid
+import hashlib
+import threading
+
+TEMPLATE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "templates"))
+
+# 🔖 Bump when the cache layout or key recipe changes
+RENDER_CACHE_VERSION = 2
+
+# Returned by a render callback whose output is only good for this one request (see get_or_render)
+UNCACHED = object()
+
+_digest_memo = {}
+_digest_lock = threading.Lock()
+
+def file_digest(path):
+    """sha256 of a file's bytes, memoised on (path, size, mtime) so repeat lookups skip the read."""
+    stat = os.stat(path)
+    memo_key = (path, stat.st_size, stat.st_mtime_ns)
+    with _digest_lock:
+        cached = _digest_memo.get(memo_key)
+    if cached:
+        return cached
+
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+
+    with _digest_lock:
+        # Drop older entries for the same path so the memo can't grow without bound
+        for key in [k for k in _digest_memo if k[0] == path]:
+            del _digest_memo[key]
+        _digest_memo[memo_key] = digest
+    return digest
+
+def content_digest(data):
+    """sha256 of bytes already in memory (what file_digest would say about a file holding them)."""
+    return hashlib.sha256(data).hexdigest()
+
+def atomic_write(output_path, write):
+    """Call ``write(tmp_path)`` and move the result into place, so readers never see a half-written file."""
+    tmp_path = f"{output_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return output_path
+
+def template_version(fmt):
+    """Fingerprint of whatever produces the given output format; a change invalidates its cache entries.
+
+    Covers the renderer itself plus everything upstream of it: the parsers and
+    Gemini prompt (via the parse cache's version) and the document model.
+    """
+    # Imported here: parse_cache imports this module for file_digest
+    from parser.parse_cache import parser_version
+
+    here = os.path.dirname(__file__)
+    if fmt == "pdf":
+        source = os.path.join(here, "pdf_generator.py")
+    else:
+        source = os.path.join(TEMPLATE_DIR, "doc_template.html")
+    sha = hashlib.sha256(parser_version().encode("ascii"))
+    for path in (source, os.path.join(here, "doc_model.py")):
+        sha.update(file_digest(path).encode("ascii"))
+    return f"{RENDER_CACHE_VERSION}:{sha.hexdigest()[:16]}"
+
+
+class RenderCache:
+    """Rendered downloads on disk, keyed by content hash + format + template version.
+
+    Concurrent requests for the same key are coalesced: one thread renders,
+    the rest wait for it and then serve the same file.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+
+    def key_for(self, content_hash, fmt, *variant):
+        parts = [content_hash, fmt, template_version(fmt), *[str(v) for v in variant]]
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+    def path_for(self, key, fmt):
+        return os.path.join(self.cache_dir, f"{key}.{fmt}")
+
+    def get_or_render(self, key, fmt, render):
+        """Return the cached path for ``key``, calling ``render(tmp_path)`` at most once per miss.
+
+        If ``render`` returns UNCACHED the output goes to a one-off path instead,
+        so the next request for ``key`` renders again (the storage GC clears it up).
+        """
+        output_path = self.path_for(key, fmt)
+
+        while True:
+            if os.path.exists(output_path):
+                self.hits += 1
+                return output_path
+
+            with self._lock:
+                done = self._inflight.get(key)
+                leader = done is None
+                if leader:
+                    done = self._inflight[key] = threading.Event()
+
+            if not leader:
+                # 🧍 Someone else is already rendering this exact document
+                done.wait()
+                continue
+
+            try:
+                # Re-check: another leader may have finished between our stat and taking the lock
+                if not os.path.exists(output_path):
+                    self.misses += 1
+                    return self._render(key, fmt, output_path, render)
+                return output_path
+            finally:
+                with self._lock:
+                    del self._inflight[key]
+                done.set()
+
+    def _render(self, key, fmt, output_path, render):
+        tmp_path = f"{output_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            if render(tmp_path) is UNCACHED:
+                output_path = self.path_for(f"{key}.once-{uuid.uuid4().hex[:12]}", fmt)
+            os.replace(tmp_path, output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return output_path
@@ -0,0 +1,278 @@
+# parser/storage.py
+import os
+import time
+import shutil
+import threading
+from contextlib import contextmanager
+
+from parser.log import get_logger
+
+log = get_logger("storage")
+
+
+class StorageCollector:
+    """Background garbage collector for uploads, parse caches and generated docs.
+
+    Enforces a maximum age and a total-size quota over a set of directories,
+    evicting least-recently-used files first. Directories whose name starts
+    with one of ``units`` (e.g. a split doc's shell and its fragments) are
+    evicted whole or not at all, as recently used as their newest file.
+    Files pinned by in-flight jobs (and anything touched within the grace
+    period) are never evicted, and directories left empty are removed.
+    """
+
+    def __init__(self, roots, max_age_seconds, max_total_bytes, interval_seconds=600, grace_seconds=300, units=()):
+        self.roots = list(roots)
+        self.units = tuple(units)
+        self.max_age_seconds = max_age_seconds
+        self.max_total_bytes = max_total_bytes
+        self.interval_seconds = interval_seconds
+        self.grace_seconds = grace_seconds
+
+        self._lock = threading.Lock()
+        self._pins = {}
+        self._kept = set()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # 📊 Lifetime counters
+        self.runs = 0
+        self.files_evicted_total = 0
+        self.dirs_removed_total = 0
+        self.reclaimed_bytes_total = 0
+        self.stored_bytes = 0
+        self.stored_files = 0
+        self.last_run_seconds = None
+        self.last_run_at = None
+
+    # 📌 Pinning ------------------------------------------------------------
+
+    def pin(self, *paths):
+        with self._lock:
+            for path in paths:
+                path = os.path.abspath(path)
+                self._pins[path] = self._pins.get(path, 0) + 1
+
+    def unpin(self, *paths):
+        with self._lock:
+            for path in paths:
+                path = os.path.abspath(path)
+                count = self._pins.get(path, 0) - 1
+                if count > 0:
+                    self._pins[path] = count
+                else:
+                    self._pins.pop(path, None)
+
+    def keep(self, *dirs):
+        """Directories that must outlive being empty (e.g. a cache's own root), so prune leaves them be."""
+        with self._lock:
+            self._kept.update(os.path.abspath(path) for path in dirs)
+
+    @contextmanager
+    def in_use(self, *paths):
+        self.pin(*paths)
+        try:
+            yield
+        finally:
+            self.unpin(*paths)
+
+    def is_pinned(self, path):
+        # A pinned directory covers everything underneath it, and a directory with anything pinned inside is pinned too
+        path = os.path.abspath(path)
+        with self._lock:
+            return any(path == pin or path.startswith(pin + os.sep) or pin.startswith(path + os.sep) for pin in self._pins)
+
+    def touch(self, path):
+        """Mark a file as just used so LRU eviction keeps it around."""
+        try:
+            stat = os.stat(path)
+            os.utime(path, ns=(time.time_ns(), stat.st_mtime_ns))
+        except OSError:
+            pass
+
+    # 🧹 Collection ---------------------------------------------------------
+
+    def is_unit(self, name):
+        return bool(self.units) and name.startswith(self.units)
+
+    def walk(self, top):
+        """Files under ``top`` as ``(last_used, size, path)``, plus every directory below it."""
+        files, dirs = [], []
+        stack = [top]
+        while stack:
+            try:
+                entries = list(os.scandir(stack.pop()))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                        dirs.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        stat = entry.stat(follow_symlinks=False)
+                        files.append((max(stat.st_atime, stat.st_mtime), stat.st_size, entry.path))
+                except OSError:
+                    continue
+        return files, dirs
+
+    def scan(self):
+        """Eviction candidates as ``(last_used, size, path, file_count)`` plus the directories seen.
+
+        A unit directory is one candidate covering everything inside it.
+        """
+        items, dirs = [], []
+        stack = [root for root in self.roots if os.path.isdir(root)]
+        while stack:
+            try:
+                entries = list(os.scandir(stack.pop()))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append(entry.path)
+                        if not self.is_unit(entry.name):
+                            stack.append(entry.path)
+                            continue
+                        files, inner = self.walk(entry.path)
+                        dirs.extend(inner)
+                        if files:
+                            last_used = max(used for used, _, _ in files)
+                            items.append((last_used, sum(size for _, size, _ in files), entry.path, len(files)))
+                    elif entry.is_file(follow_symlinks=False):
+                        stat = entry.stat(follow_symlinks=False)
+                        items.append((max(stat.st_atime, stat.st_mtime), stat.st_size, entry.path, 1))
+                except OSError:
+                    continue
+        return items, dirs
+
+    def remove(self, path):
+        """Delete a file or a whole unit directory; False if it couldn't be."""
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            log.warning("💥 storage gc could not remove file", path=path, error=str(e))
+            return False
+        return True
+
+    def prune(self, dirs, now, emptied=()):
+        """Remove empty directories, deepest first; returns how many.
+
+        A directory is left for the grace period after it last changed, unless
+        this pass is what changed it (``emptied``: parents of what was evicted).
+        """
+        emptied = set(emptied)
+        removed = 0
+        for path in sorted(dirs, key=len, reverse=True):
+            try:
+                fresh = now - os.stat(path).st_mtime < self.grace_seconds
+                if (fresh and path not in emptied) or self.is_pinned(path):
+                    continue
+                with self._lock:
+                    if os.path.abspath(path) in self._kept:
+                        continue
+                os.rmdir(path)  # Fails (harmlessly) if anything is in it
+            except OSError:
+                continue
+            removed += 1
+            emptied.add(os.path.dirname(path))
+        return removed
+
+    def collect(self):
+        """Run one collection pass; returns the number of bytes reclaimed."""
+        started = time.monotonic()
+        now = time.time()
+        items, dirs = self.scan()
+        total = sum(size for _, size, _, _ in items)
+        stored_files = sum(count for _, _, _, count in items)
+
+        evicted = 0
+        reclaimed = 0
+        emptied = set()
+
+        # Oldest first, so age eviction and the size quota both walk in LRU order
+        for last_used, size, path, count in sorted(items):
+            idle = now - last_used
+            too_old = self.max_age_seconds and idle > self.max_age_seconds
+            over_quota = self.max_total_bytes and total > self.max_total_bytes
+            if not (too_old or over_quota):
+                break
+            if idle < self.grace_seconds or self.is_pinned(path):
+                continue
+            if not self.remove(path):
+                continue
+            total -= size
+            evicted += count
+            reclaimed += size
+            emptied.add(os.path.dirname(path))
+
+        # 🗑️ Split docs, uploads and cache shards leave their directories behind
+        removed_dirs = self.prune(dirs, now, emptied)
+
+        with self._lock:
+            self.runs += 1
+            self.files_evicted_total += evicted
+            self.dirs_removed_total += removed_dirs
+            self.reclaimed_bytes_total += reclaimed
+            self.stored_bytes = total
+            self.stored_files = stored_files - evicted
+            self.last_run_seconds = time.monotonic() - started
+            self.last_run_at = now
+
+        if evicted:
+            log.info("🧹 storage gc evicted files", files=evicted, bytes=reclaimed)
+        return reclaimed
+
+    def stats(self):
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "files_evicted_total": self.files_evicted_total,
+                "dirs_removed_total": self.dirs_removed_total,
+                "reclaimed_bytes_total": self.reclaimed_bytes_total,
+                "stored_bytes": self.stored_bytes,
+                "stored_files": self.stored_files,
+                "pinned_files": len(self._pins),
+                "max_total_bytes": self.max_total_bytes,
+                "max_age_seconds": self.max_age_seconds,
+                "last_run_seconds": self.last_run_seconds,
+                "last_run_at": self.last_run_at,
+            }
+
+    # 🔁 Background thread --------------------------------------------------
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="storage-gc", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.collect()
+            except Exception as e:
+                log.exception("💥 storage gc run failed")
+            self._stop.wait(self.interval_seconds)
+
+
+def collector_from_env(roots, units=()):
+    """Build a collector from CODESCROLL_STORAGE_* environment settings."""
+    return StorageCollector(
+        roots,
+        units=units,
+        max_age_seconds=float(os.getenv("CODESCROLL_STORAGE_MAX_AGE_HOURS", "72")) * 3600,
+        max_total_bytes=int(float(os.getenv("CODESCROLL_STORAGE_MAX_MB", "1024")) * 1024 * 1024),
+        interval_seconds=float(os.getenv("CODESCROLL_STORAGE_GC_INTERVAL", "600")),
+        grace_seconds=float(os.getenv("CODESCROLL_STORAGE_GRACE_SECONDS", "300")),
+    )
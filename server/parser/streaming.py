@@ -0,0 +1,188 @@
+# parser/streaming.py
+import asyncio
+import threading
+from collections import Counter
+
+from parser.file_parser import build_template_context, render_block, page_sections, section_entries
+from parser.doc_model import build_document, build_section, section_sources
+
+
+class SectionFeed:
+    """Append-only list of HTML chunks for one generation, readable while it's still being written.
+
+    Every reader replays from the start, so a client that connects late still
+    gets the full page.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._cond = threading.Condition()
+        self._waiters = []
+        self.closed = False
+        self.streaming = False  # True once a SectionStreamer is feeding it section by section
+
+    def _notify(self):
+        self._cond.notify_all()
+        for wake in list(self._waiters):
+            wake()
+
+    def publish(self, chunk):
+        with self._cond:
+            if self.closed:
+                return
+            self._chunks.append(chunk)
+            self._notify()
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._notify()
+
+    def __iter__(self):
+        index = 0
+        while True:
+            with self._cond:
+                while index >= len(self._chunks) and not self.closed:
+                    self._cond.wait(1.0)
+                chunks = self._chunks[index:]
+                done = self.closed
+            index += len(chunks)
+            yield from chunks
+            if done and index >= len(self._chunks):
+                return
+
+    async def iter_async(self):
+        loop = asyncio.get_running_loop()
+        arrived = asyncio.Event()
+        wake = lambda: loop.call_soon_threadsafe(arrived.set)
+        with self._cond:
+            self._waiters.append(wake)
+        try:
+            index = 0
+            while True:
+                with self._cond:
+                    chunks = self._chunks[index:]
+                    done = self.closed
+                    arrived.clear()
+                index += len(chunks)
+                for chunk in chunks:
+                    yield chunk
+                if done and index >= len(self._chunks):
+                    return
+                if not chunks:
+                    await arrived.wait()
+        finally:
+            with self._cond:
+                self._waiters.remove(wake)
+
+
+class SectionStreamer:
+    """Publishes the page shell, then each tab section the moment all of its entries are described.
+
+    Plugged into parse_file_by_type as its ``listener``. The Document is built
+    once; a section's records are rebuilt from the raw entries only when it
+    goes out, and readiness is tracked with a per-section count of entries
+    still waiting, so a batch costs only as much as the targets in it.
+    """
+
+    def __init__(self, feed, filename, ext, hide_buttons=False, generation_id=None):
+        self.feed = feed
+        self.filename = filename
+        self.ext = ext
+        self.hide_buttons = hide_buttons
+        self.generation_id = generation_id
+        self.result = None
+        self.document = None
+        self.sources = []
+        self.dom_ids = []
+        self.unsent = set()      # Section positions not published yet
+        self.ready = []          # ...of which every entry is described
+        self.outstanding = []    # Per section, entries still waiting on a target
+        self.waiting = Counter() # Per entry id, targets not described yet
+        self.sections_of = {}    # Entry id -> positions of the sections it's in
+
+    def context(self):
+        context = build_template_context([self.document], self.hide_buttons)
+        return {**context, "generation_id": self.generation_id}
+
+    def start(self, result, targets):
+        """Called once extraction is done; returns the targets reordered section by section."""
+        self.result = result
+        _, self.sources = section_sources(result)
+        self.document = build_document(self.filename, result, self.ext)
+        sections = section_entries(result)
+        self.dom_ids = [dom_id for dom_id, _ in sections]
+        self.feed.streaming = True
+
+        # Describe in tab order so sections complete one after another instead of all at the end
+        rank = {}
+        for position, (_, entries) in enumerate(sections):
+            for entry in entries:
+                rank.setdefault(id(entry), position)
+        targets = sorted(targets, key=lambda t: rank.get(id(t[2]), len(sections)))
+
+        # 🧮 Count once what each section is waiting for; batch_done only counts down
+        self.waiting = Counter(id(entry) for _, _, entry, _ in targets)
+        self.outstanding = [0] * len(sections)
+        self.sections_of = {}
+        for position, (_, entries) in enumerate(sections):
+            for entry in entries:
+                if id(entry) in self.waiting:
+                    self.sections_of.setdefault(id(entry), []).append(position)
+                    self.outstanding[position] += 1
+        self.unsent = set(range(len(sections)))
+        self.ready = [position for position, count in enumerate(self.outstanding) if count == 0]
+
+        context = self.context()
+        self.feed.publish(render_block("page_head", context))
+        self.feed.publish(render_block(self.shell_block(), context))
+        self.publish_ready()
+        return targets
+
+    def shell_block(self):
+        if "html_tags" in self.result:
+            return "html_shell"
+        if all(key in self.result for key in ("classes", "ids", "media")):
+            return "css_shell"
+        return "code_shell"
+
+    def batch_done(self, batch):
+        for _, _, entry, _ in batch:
+            key = id(entry)
+            self.waiting[key] -= 1
+            if self.waiting[key] > 0:
+                continue
+            del self.waiting[key]
+            for position in self.sections_of.pop(key, ()):
+                self.outstanding[position] -= 1
+                if self.outstanding[position] == 0:
+                    self.ready.append(position)
+        self.publish_ready()
+
+    def publish_ready(self):
+        self.publish([position for position in self.ready if position in self.unsent])
+        self.ready = []
+
+    def publish(self, positions):
+        if not positions:
+            return
+        # Pick up the descriptions written since start() for just these sections
+        for position in positions:
+            kind, key, entries = self.sources[position]
+            self.document.sections[position] = build_section(kind, key, entries, self.ext)
+            self.unsent.discard(position)
+        context = self.context()
+        blocks = {dom_id: (block, block_vars) for dom_id, block, block_vars, _, _, _ in page_sections(context)}
+        for position in sorted(positions):
+            dom_id = self.dom_ids[position]
+            if dom_id not in blocks:
+                continue
+            block, block_vars = blocks[dom_id]
+            html = render_block(block, {**context, **block_vars})
+            self.feed.publish(html + f"<script>sectionArrived({dom_id!r})</script>\n")
+
+    def finish(self):
+        # Whatever is still unsent goes out as it is (e.g. after a failed describe)
+        self.publish(sorted(self.unsent))
+        self.feed.publish(render_block("page_tail", self.context()))
+        self.feed.close()
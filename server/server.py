@@ -1,123 +1,187 @@
-from flask import Flask, request, send_file, jsonify
+from flask import Flask, request, send_file, jsonify, Response, stream_with_context, redirect
 from flask_cors import CORS
-from parser.file_parser import parse_file_by_type, generate_html
+from parser.file_parser import parse_file_by_type, read_source
 import os
 from werkzeug.utils import secure_filename
-from fastapi.responses import FileResponse
-from jinja2 import Environment, FileSystemLoader
-import traceback
-import asyncio
-import json
-from parser.pdf_generator import convert_to_pdf_format, generate_pdf
-from threading import Lock
+from werkzeug.security import safe_join
+import shutil
+from parser.cancellation import GenerationCancelled
+from parser.doc_model import build_document
+from parser.admission import AdmissionRejected
+from parser.metrics import GENERATIONS, ERRORS, render as render_metrics
+from parser.progress import StageTimer
+from parser.budget import generation_deadline
+from state import (
+    generation_status, generation_tokens, get_token, get_extension, progress_payload, track_progress,
+    render_download, render_merged_pdf, prerender_downloads, write_upload, upload_path_for, find_upload, storage, parse_cache, description_cache, admission, client_id_for, ALLOWED_ORIGINS, EXPOSED_HEADERS, TIMING_ALLOW_ORIGIN, DOC_FOLDER,
+    open_stream, stream_for, section_streamer, finish_stream, write_docs, split_dir_for, log
+)
 import uuid
-import time
 
 app = Flask(__name__)
-CORS(app, resources={r"/*": {"origins": [
-    "https://codescroll-document-generator-tech-dragoness-projects.vercel.app"
-]}})
+CORS(app, resources={r"/*": {"origins": ALLOWED_ORIGINS}}, expose_headers=EXPOSED_HEADERS)
 
-generation_status = {}
-generation_flags = {}
-generation_lock = Lock()
-
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DOC_FOLDER = os.path.join(BASE_DIR, "server/static/generated_docs")
-UPLOAD_FOLDER = os.path.join(BASE_DIR, "server/static/uploads")
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(DOC_FOLDER, exist_ok=True)
-
-def get_extension(filename):
-    return os.path.splitext(filename)[1].lower()
+def with_server_timing(response, timing):
+    # ⏱️ Stage breakdown for the browser's network panel
+    response.headers["Server-Timing"] = timing.server_timing()
+    response.headers["Timing-Allow-Origin"] = TIMING_ALLOW_ORIGIN
+    return response
 
 @app.route("/upload", methods=["POST"])
 def upload():
+    # 🚦 Turn away over-limit clients before reading the upload body
+    try:
+        ticket = admission.admit(client_id_for(request.remote_addr, request.headers.get("X-Forwarded-For")))
+    except AdmissionRejected as e:
+        response = jsonify({"success": False, "error": str(e)})
+        response.status_code = 429
+        response.headers["Retry-After"] = str(e.retry_after)
+        return response
+
+    # 🧯 Until the try below owns them, a failure here must still give back the slot, pin and feed
+    pinned = []
+    feed = None
     try:
         files = request.files.getlist("files")
-        parsed_data = []
+        documents = []
+        uploads = []
 
         # 🌟 Unique ID for tracking this generation
         generation_id = request.form.get("generation_id") or str(uuid.uuid4())
+        token = get_token(generation_id)
+        generation_status[generation_id] = "queued"
+        html_path = os.path.join(DOC_FOLDER, f"documentation_{generation_id}.html")
+
+        # 📌 Keep the GC away from everything this generation is still using
+        pinned.append(html_path)
+        storage.pin(html_path)
+
+        # 🌊 Readers of /docs/stream/<generation_id> get sections as soon as they're described
+        feed = open_stream(generation_id)
+        streamer = section_streamer(feed, files, generation_id)
+        progress = track_progress(generation_id, [secure_filename(file.filename) for file in files])
+        # ⏳ Optional time budget for the whole generation, queueing included
+        deadline = generation_deadline(request.form.get("deadline", type=float))
+    except BaseException:
+        ticket.release()
+        storage.unpin(*pinned)
+        if feed is not None:
+            feed.close()
+        raise
+
+    try:
+        with progress.stage("queue"):
+            ticket.wait_for_slot(token)
         generation_status[generation_id] = "processing"
-        generation_flags[generation_id] = "active"
-        
+
         batch_size = request.form.get("batch_size", type=int) or 5  # Default to 5 if not sent
 
         for file in files:
             # 🛑 Check before starting this file
-            if generation_flags.get(generation_id) == "cancelled":
-                raise Exception("Generation cancelled by user before parsing")
+            token.raise_if_cancelled("parsing")
 
             filename = secure_filename(file.filename)
             file_ext = get_extension(filename)
-            file_path = os.path.join(UPLOAD_FOLDER, filename)
-            file.save(file_path)
+            file_path = upload_path_for(generation_id, filename)
+            pinned.append(file_path)
+            storage.pin(file_path)
+            progress.file_started(filename)
+            with progress.stage("save"):
+                data = file.read()
+                write_upload(file_path, data)
+            # 📖 Parsed and cache-keyed from the bytes in hand, not from whatever file_path holds by the time we're done
+            source = read_source(file_path, data)
 
             parsed = parse_file_by_type(
                 file_path,
                 generation_id=generation_id,
                 status=generation_status,
-                flags=generation_flags,
-                batch_size=batch_size
+                token=token,
+                batch_size=batch_size,
+                cache=parse_cache,
+                descriptions=description_cache,
+                listener=streamer,
+                progress=progress,
+                deadline=deadline,
+                source=source
             )
-            
-            # 🛑 Check again after parsing (if user cancelled mid-descriptions)
-            if generation_flags.get(generation_id) == "cancelled":
-                raise Exception("Generation cancelled by user during parsing")
+            progress.file_done()
 
             if parsed:
-                parsed_data.append((filename, parsed, file_ext))
-
-        # 🛑 Final pre-check before generating doc
-        if generation_flags[generation_id] == "cancelled":
-            raise Exception("Generation cancelled before HTML creation")
-
-        html_filename = f"documentation_{generation_id}.html"
-        html_path = os.path.join(DOC_FOLDER, html_filename)
-
-        generate_html(parsed_data, html_path, hide_buttons=False)
-
+                # 🧱 Normalized once here, then shared by every renderer
+                documents.append(build_document(filename, parsed, file_ext))
+                uploads.append((file_path, filename))
+                cache_path = parse_cache.path_for(source[1], file_ext)
+                pinned.append(cache_path)
+                storage.pin(cache_path)
+
+        # 🧩 Projects get per-file pages + a search index, big files a shell + lazily loaded fragments
+        with progress.stage("render"):
+            doc_url = write_docs(generation_id, documents, html_path, layout=request.form.get("layout"), token=token)
+            finish_stream(feed, streamer, html_path, doc_url)
+
+        progress.finished()
         generation_status[generation_id] = "done"
+        GENERATIONS.inc(outcome="done")
+        prerender_downloads(uploads)
 
-        return jsonify({
+        return with_server_timing(jsonify({
             "success": True,
-            "htmlPath": f"/docs/{html_filename}",  # Use correct route
+            "htmlPath": doc_url,  # Use correct route
             "generation_id": generation_id
-        })
+        }), progress)
+
+    except GenerationCancelled as e:
+        generation_status[generation_id] = "cancelled"
+        GENERATIONS.inc(outcome="cancelled")
+        # 💣 Drop any partial doc for this generation
+        try:
+            os.remove(html_path)
+        except FileNotFoundError:
+            pass
+        shutil.rmtree(split_dir_for(generation_id), ignore_errors=True)
+        return with_server_timing(jsonify({"success": False, "error": str(e)}), progress), 500
 
     except Exception as e:
-        print("🐍 Backend Error:", traceback.format_exc(), flush=True)
+        log.exception("🐍 upload failed", generation_id=generation_id)
         generation_status[generation_id] = "cancelled"
-        return jsonify({"success": False, "error": str(e)}), 500
-    
+        GENERATIONS.inc(outcome="failed")
+        ERRORS.inc(stage="upload")
+        return with_server_timing(jsonify({"success": False, "error": str(e)}), progress), 500
+
+    finally:
+        ticket.release()
+        progress.stop()
+        storage.unpin(*pinned)
+        feed.close()  # Cancelled or failed: end the live page where it stopped
+        # ⏱️ Report how long the worker hung on after the user hit cancel
+        latency = token.mark_released()
+        if latency is not None:
+            log.info("🛑 generation released after cancel", generation_id=generation_id, ms=round(latency * 1000))
+
 @app.route("/generate-id")
 def generate_id():
     generation_id = str(uuid.uuid4())
     generation_status[generation_id] = "starting"
-    generation_flags[generation_id] = "active"
-    return jsonify({"generation_id": generation_id})
+    get_token(generation_id)
+    # Registered now, so a reader can open the stream before the upload lands
+    open_stream(generation_id)
+    return jsonify({"generation_id": generation_id, "streamPath": f"/docs/stream/{generation_id}"})
     
 @app.route("/generation-progress/<generation_id>")
 def generation_progress(generation_id):
-    return jsonify({
-        "status": generation_status.get(generation_id, "unknown")
-    })
+    return jsonify(progress_payload(generation_id))
     
 @app.route("/cancel-generation", methods=["POST"])
 def cancel_generation():
     generation_id = request.json.get("generation_id")
 
-    if generation_id in generation_flags:
-        generation_flags[generation_id] = "cancelled"
+    token = generation_tokens.get(generation_id)
+    if token:
+        # 🔔 Wakes rate-limit sleeps and abandons the in-flight Gemini call
+        token.cancel()
         generation_status[generation_id] = "cancelled"  # Also update status
 
-        # 💣 Optionally delete any partial docs
-        try:
-            os.remove(os.path.join(DOC_FOLDER, "documentation.html"))
-        except FileNotFoundError:
-            pass
-
         return jsonify({"success": True})
 
     return jsonify({"success": False, "error": "Generation ID not found"}), 404
@@ -125,76 +189,107 @@ def cancel_generation():
 @app.route("/docs/<filename>", methods=["GET"])
 def docs(filename):
     html_path = os.path.join(DOC_FOLDER, filename)
-    print(f"📦 Fetching HTML from: {html_path}")
+    log.sampled("📦 docs fetch", path=html_path)
 
     if os.path.exists(html_path):
+        storage.touch(html_path)
         return send_file(html_path)
     return "No documentation generated yet.", 404
 
+@app.route("/docs/stream/<generation_id>", methods=["GET"])
+def docs_stream(generation_id):
+    feed = stream_for(generation_id)
+    if feed is None:
+        # 📄 Nothing live any more: fall back to the finished doc
+        if os.path.isdir(split_dir_for(secure_filename(generation_id))):
+            return redirect(f"/docs/split/{secure_filename(generation_id)}/index.html")
+        return docs(f"documentation_{secure_filename(generation_id)}.html")
+
+    response = Response(stream_with_context(iter(feed)), mimetype="text/html")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"  # Don't let a reverse proxy hold chunks back
+    return response
+
+@app.route("/docs/split/<generation_id>/<path:name>", methods=["GET"])
+def docs_split(generation_id, name):
+    split_dir = split_dir_for(secure_filename(generation_id))
+    path = safe_join(split_dir, name)
+
+    if path and os.path.isfile(path):
+        storage.touch(path)
+        return send_file(path)
+    return "No documentation generated yet.", 404
+
+@app.route("/metrics")
+def metrics():
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/storage-stats")
+def storage_stats():
+    return jsonify(storage.stats())
+
 @app.route("/download-html")
 def download_html():
-    filename = request.args.get("filename")
-    file_path = os.path.join(UPLOAD_FOLDER, filename)
+    # 🪪 Looked up under the generation that uploaded it, never just by name
+    filename = secure_filename(request.args.get("filename", ""))
+    file_path = find_upload(request.args.get("generation_id"), filename)
 
-    if not os.path.exists(file_path):
+    if file_path is None:
         return "File not found", 404
 
-    file_ext = os.path.splitext(filename)[1]
-    cache_path = file_path + ".docjson"
+    # 🗃️ Repeat downloads of the same content come straight from the render cache
+    timing = StageTimer()
+    output_path = render_download(file_path, filename, "html", timing=timing)
+    if output_path is None:
+        return "Could not parse the file", 400
 
-    if os.path.exists(cache_path):
-        with open(cache_path, "r", encoding="utf-8") as f:
-            parsed = json.load(f)
-    else:
-        parsed = parse_file_by_type(file_path)
-        if not parsed:
-            return "Could not parse the file", 400
-
-    parsed_data = [(filename, parsed, file_ext)]
-    temp_output_path = os.path.join(DOC_FOLDER, "temp_download.html")
-    generate_html(parsed_data, temp_output_path, hide_buttons=True)
-
-    if os.path.exists(temp_output_path):
-        return send_file(temp_output_path, as_attachment=True, download_name="documentation.html")
-    return "HTML file not found", 404
+    return with_server_timing(send_file(output_path, as_attachment=True, download_name="documentation.html"), timing)
 
 @app.route("/download-pdf", methods=["GET"])
 def download_pdf():
     try:
-        filename = request.args.get("filename")
-        if not filename:
+        filenames = request.args.getlist("filename")
+        if not filenames:
             return jsonify({"success": False, "error": "No filename provided"}), 400
-        
-        ext = request.args.get("ext", None)
 
-        file_path = os.path.join(UPLOAD_FOLDER, filename)
-        if not os.path.isfile(file_path):
+        generation_id = request.args.get("generation_id")
+        if len(filenames) > 1:
+            return download_merged_pdf(generation_id, filenames)
+
+        filename = secure_filename(filenames[0])
+        file_path = find_upload(generation_id, filename)
+        if file_path is None:
             return jsonify({"success": False, "error": "File not found"}), 404
 
-        cache_path = file_path + ".docjson"
+        timing = StageTimer()
+        output_path = render_download(file_path, filename, "pdf", timing=timing)
+        if output_path is None:
+            return jsonify({"success": False, "error": "Unsupported or empty file"}), 400
 
-        if os.path.exists(cache_path):
-            with open(cache_path, "r", encoding="utf-8") as f:
-                parsed = json.load(f)
-        else:
-            parsed = parse_file_by_type(file_path)
-            if not parsed:
-                return jsonify({"success": False, "error": "Unsupported or empty file"}), 400
+        return with_server_timing(
+            send_file(output_path, as_attachment=True, mimetype='application/pdf', download_name="documentation.pdf"), timing
+        )
 
-            with open(cache_path, "w", encoding="utf-8") as f:
-                json.dump(parsed, f, indent=2)
+    except Exception as e:
+        log.exception("🐍 pdf download failed")
+        ERRORS.inc(stage="download")
+        return jsonify({"success": False, "error": str(e)}), 500
 
-        parsed_data = [(filename, parsed)]  # ✅ Only this file
-        formatted_data = convert_to_pdf_format([parsed], ext=ext)  # 🎯 Just the current one
+def download_merged_pdf(generation_id, filenames):
+    # 📚 ?filename=a.py&filename=b.js → one PDF with a part per file, sent from memory
+    uploads = []
+    for filename in map(secure_filename, filenames):
+        file_path = find_upload(generation_id, filename)
+        if file_path is None:
+            return jsonify({"success": False, "error": f"File not found: {filename}"}), 404
+        uploads.append((file_path, filename))
 
-        output_path = os.path.join(DOC_FOLDER, "documentation.pdf")
-        generate_pdf(formatted_data, output_path, filename)
+    timing = StageTimer()
+    buffer = render_merged_pdf(uploads, timing=timing)
+    if buffer is None:
+        return jsonify({"success": False, "error": "Unsupported or empty files"}), 400
 
-        return send_file(output_path, as_attachment=True, mimetype='application/pdf')
+    return with_server_timing(send_file(buffer, as_attachment=True, mimetype='application/pdf', download_name="documentation.pdf"), timing)
 
-    except Exception as e:
-        print("🐍 PDF Generation Error:", traceback.format_exc())
-        return jsonify({"success": False, "error": str(e)}), 500
-    
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 4000)), debug=True)
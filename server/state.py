@@ -0,0 +1,368 @@
+# state.py — generation bookkeeping shared by the Flask app (server.py) and the ASGI app (asgi.py)
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from threading import Lock
+from werkzeug.utils import secure_filename
+from parser.cancellation import CancellationToken
+from parser.file_parser import parse_file_by_type, read_source, generate_html, generate_split_html
+from parser.doc_model import build_document
+from parser.project_docs import generate_project_docs
+from parser.render_cache import RenderCache, UNCACHED, atomic_write
+from parser.description_cache import DescriptionCache, count_unfinished
+from parser.parse_cache import ParseCache
+from parser.storage import collector_from_env
+from parser.admission import controller_from_env
+from parser.streaming import SectionFeed, SectionStreamer
+from parser.progress import GenerationProgress, StageTimer
+from parser.log import get_logger
+from parser.metrics import CallbackMetric, RENDER_SECONDS, ERRORS
+
+log = get_logger("server")
+
+generation_status = {}
+generation_lock = Lock()
+
+# 📊 Per-upload progress for /generation-progress; stopped ones are evicted oldest first
+generation_progress = OrderedDict()
+MAX_PROGRESS = int(os.getenv("CODESCROLL_MAX_PROGRESS", "256"))
+
+# 🛑 Cancel tokens; finished generations (and IDs that never got an upload) are evicted oldest first
+generation_tokens = OrderedDict()
+MAX_TOKENS = int(os.getenv("CODESCROLL_MAX_TOKENS", "1024"))
+
+# 🌊 Live doc pages for /docs/stream/<generation_id>, oldest finished ones evicted first
+generation_streams = OrderedDict()
+MAX_STREAMS = int(os.getenv("CODESCROLL_MAX_STREAMS", "64"))
+
+ALLOWED_ORIGINS = [
+    "https://codescroll-document-generator-tech-dragoness-projects.vercel.app"
+]
+# 🔓 Response headers the frontend may read cross-origin (CORS hides anything not safelisted)
+EXPOSED_HEADERS = ["Retry-After", "Server-Timing"]
+# ⏱️ Lets those origins see Server-Timing entries in the browser's Resource Timing too
+TIMING_ALLOW_ORIGIN = ", ".join(ALLOWED_ORIGINS)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DOC_FOLDER = os.path.join(BASE_DIR, "server/static/generated_docs")
+UPLOAD_FOLDER = os.path.join(BASE_DIR, "server/static/uploads")
+os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+os.makedirs(DOC_FOLDER, exist_ok=True)
+
+# 🧩 Docs with at least this many rows are written as a shell + lazily loaded fragments
+SPLIT_MIN_ROWS = int(os.getenv("CODESCROLL_SPLIT_MIN_ROWS", "500"))
+
+# 🏭 PDF layout is CPU-bound, so it runs in worker processes instead of holding the GIL
+PDF_WORKERS = int(os.getenv("CODESCROLL_PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+_pdf_pool = None
+
+# 🔮 Render the download variants in the background right after an upload, so the first click is a cache hit
+PRERENDER_DOWNLOADS = os.getenv("CODESCROLL_PRERENDER", "0") == "1"
+_prerender_pool = None
+
+render_cache = RenderCache(os.path.join(DOC_FOLDER, "render_cache"))
+parse_cache = ParseCache(os.path.join(UPLOAD_FOLDER, "parse_cache"))
+
+# 🧬 Per-snippet descriptions, so re-parsing a file only sends Gemini what failed or ran out of time last go
+DESCRIPTIONS_DIR = os.path.join(UPLOAD_FOLDER, "descriptions")
+description_cache = DescriptionCache(os.path.join(DESCRIPTIONS_DIR, "descriptions.sqlite"))
+
+# 🧹 Age/size quota over everything we write to disk; set CODESCROLL_STORAGE_GC=0 to disable
+# A generation's split doc (shell + fragments) and its uploads are only any use whole
+storage = collector_from_env([UPLOAD_FOLDER, DOC_FOLDER], units=("documentation_", "upload_"))
+# The SQLite file (and its -wal/-shm) is open for the life of the process
+storage.pin(DESCRIPTIONS_DIR)
+# The caches create their roots once, at startup
+storage.keep(render_cache.cache_dir, parse_cache.cache_dir)
+if os.getenv("CODESCROLL_STORAGE_GC", "1") != "0":
+    storage.start()
+
+# 🚦 Per-client and global limits on how many generations can be started
+admission = controller_from_env()
+
+# 📈 Read straight off the caches and the admission controller when /metrics is scraped
+CallbackMetric("counter", "codescroll_cache_hits_total", "Cache hits by cache.",
+               lambda: {("parse",): parse_cache.hits, ("render",): render_cache.hits, ("description",): description_cache.hits},
+               labels=["cache"])
+CallbackMetric("counter", "codescroll_cache_misses_total", "Cache misses by cache.",
+               lambda: {("parse",): parse_cache.misses, ("render",): render_cache.misses, ("description",): description_cache.misses},
+               labels=["cache"])
+CallbackMetric("gauge", "codescroll_active_generations", "Generations currently running.", lambda: {(): admission.active})
+CallbackMetric("gauge", "codescroll_queue_depth", "Generations admitted and waiting for a slot.", lambda: {(): admission.pending})
+CallbackMetric("counter", "codescroll_admission_rejected_total", "Uploads turned away by admission control.",
+               lambda: {(): admission.rejected_total})
+CallbackMetric("counter", "codescroll_storage_reclaimed_bytes_total", "Bytes freed by storage GC.",
+               lambda: {(): storage.reclaimed_bytes_total})
+CallbackMetric("counter", "codescroll_storage_evicted_files_total", "Files removed by storage GC.",
+               lambda: {(): storage.files_evicted_total})
+CallbackMetric("counter", "codescroll_storage_gc_runs_total", "Storage GC passes.", lambda: {(): storage.runs})
+CallbackMetric("gauge", "codescroll_storage_bytes", "Bytes on disk as of the last storage GC pass.",
+               lambda: {(): storage.stored_bytes})
+TRUST_PROXY = os.getenv("CODESCROLL_TRUST_PROXY", "0") == "1"
+
+def client_id_for(remote_addr, forwarded_for=None):
+    """Who to rate-limit: the first X-Forwarded-For hop behind a trusted proxy, else the peer address."""
+    if TRUST_PROXY and forwarded_for:
+        return forwarded_for.split(",")[0].strip()
+    return remote_addr or "unknown"
+
+def get_extension(filename):
+    return os.path.splitext(filename)[1].lower()
+
+def upload_dir_for(generation_id):
+    return os.path.join(UPLOAD_FOLDER, f"upload_{secure_filename(generation_id)}")
+
+def upload_path_for(generation_id, filename):
+    """Where a generation keeps an uploaded file; per generation, so two users' ``main.py`` never share a path."""
+    return os.path.join(upload_dir_for(generation_id), secure_filename(filename))
+
+def find_upload(generation_id, filename):
+    """Path of ``filename`` as uploaded in ``generation_id``, or None if that generation has no such file."""
+    if not generation_id or not filename:
+        return None
+    path = upload_path_for(generation_id, filename)
+    return path if os.path.isfile(path) else None
+
+def write_upload(file_path, data):
+    """Save an upload's bytes in one step, so nobody reads a half-written file."""
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+    def write(tmp_path):
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+
+    atomic_write(file_path, write)
+
+def evict_finished(entries, limit, finished):
+    """Drop the oldest entries ``finished(generation_id, entry)`` says are done until ``entries`` fits ``limit``.
+
+    Call with generation_lock held; entries still in use are never dropped, so the dict can stay over the limit.
+    """
+    while len(entries) > limit:
+        oldest = next((gid for gid, entry in entries.items() if finished(gid, entry)), None)
+        if oldest is None:
+            break
+        del entries[oldest]
+
+def token_finished(generation_id, token):
+    # Released by its upload, or handed out by /generate-id and never used
+    return token.released_at is not None or generation_status.get(generation_id) == "starting"
+
+def get_token(generation_id):
+    with generation_lock:
+        token = generation_tokens.get(generation_id)
+        if token is None:
+            # Make room first, so the token being handed out can't be the one evicted
+            evict_finished(generation_tokens, MAX_TOKENS - 1, token_finished)
+            token = generation_tokens[generation_id] = CancellationToken(generation_id)
+        return token
+
+def track_progress(generation_id, filenames):
+    """Start per-file progress and stage timings for an upload (replaces any earlier run under the same ID)."""
+    progress = GenerationProgress(filenames)
+    with generation_lock:
+        generation_progress.pop(generation_id, None)
+        evict_finished(generation_progress, MAX_PROGRESS - 1, lambda gid, p: p.stopped_at is not None)
+        generation_progress[generation_id] = progress
+    return progress
+
+def progress_payload(generation_id):
+    progress = {
+        "status": generation_status.get(generation_id, "unknown")
+    }
+
+    # 📊 Per-file counts, snippet-weighted percent, ETA and stage timings, next to the plain status
+    tracked = generation_progress.get(generation_id)
+    if tracked:
+        progress.update(tracked.payload())
+
+    token = generation_tokens.get(generation_id)
+    if token and token.release_latency is not None:
+        progress["cancel_release_ms"] = round(token.release_latency * 1000)
+
+    return progress
+
+def stream_finished(generation_id, feed):
+    # Closed by its generation, or opened by /generate-id and never uploaded to
+    return feed.closed or generation_status.get(generation_id) == "starting"
+
+def open_stream(generation_id):
+    """The live page feed for a generation, registered by /generate-id (or the upload, for a client that skipped it)."""
+    with generation_lock:
+        feed = generation_streams.get(generation_id)
+        if feed is None:
+            # Make room first, so the feed being opened can't be the one evicted
+            evict_finished(generation_streams, MAX_STREAMS - 1, stream_finished)
+            feed = generation_streams[generation_id] = SectionFeed()
+        return feed
+
+def stream_for(generation_id):
+    """Feed to stream for a reader, or None if open_stream never registered it (or it finished and was evicted)."""
+    return generation_streams.get(generation_id)
+
+def section_streamer(feed, files, generation_id):
+    # Only a single-file page has sections we can send early; multi-file pages go out whole at the end
+    if len(files) != 1:
+        return None
+    filename = secure_filename(files[0].filename)
+    return SectionStreamer(feed, filename, get_extension(filename), generation_id=generation_id)
+
+def finish_stream(feed, streamer, html_path, doc_url=None):
+    """Close out a generation's live page: the remaining sections, or the whole finished doc if nothing streamed."""
+    if feed.closed:
+        return
+    if streamer and feed.streaming:
+        streamer.finish()
+        return
+    if os.path.exists(html_path):
+        with open(html_path, "r", encoding="utf-8") as f:
+            for chunk in iter(lambda: f.read(64 * 1024), ""):
+                feed.publish(chunk)
+    elif doc_url:
+        # Split docs load their fragments relative to the shell, so send the reader there
+        feed.publish(f'<!DOCTYPE html><meta http-equiv="refresh" content="0; url={doc_url}">')
+    feed.close()
+
+def split_dir_for(generation_id):
+    return os.path.join(DOC_FOLDER, f"documentation_{generation_id}")
+
+def wants_split(layout, documents):
+    """Whether to write a split doc; an explicit ``layout`` ("single"/"split") from the upload wins over size."""
+    if layout in ("single", "split"):
+        return layout == "split"
+    return sum(doc.row_count() for doc in documents) >= SPLIT_MIN_ROWS
+
+def write_docs(generation_id, documents, html_path, layout=None, token=None):
+    """Render an upload's documentation and return the URL to open.
+
+    Several files get a page each plus a searchable project index, one big
+    file gets a split page, anything else a single HTML page.
+    """
+    with log.span("render_html", generation_id=generation_id, files=len(documents)) as span, \
+            RENDER_SECONDS.time(format="html", kind="page"):
+        if len(documents) > 1 or wants_split(layout, documents):
+            doc_dir = split_dir_for(generation_id)
+            with storage.in_use(doc_dir):
+                if len(documents) > 1:
+                    span["layout"] = "project"
+                    split_file = lambda doc: wants_split(layout, [doc])
+                    generate_project_docs(documents, doc_dir, split_file=split_file, token=token, generation_id=generation_id)
+                else:
+                    span["layout"] = "split"
+                    generate_split_html(documents, doc_dir, hide_buttons=False, token=token, generation_id=generation_id)
+            return f"/docs/split/{generation_id}/index.html"
+
+        span["layout"] = "single"
+        generate_html(documents, html_path, hide_buttons=False, token=token, generation_id=generation_id)
+        return f"/docs/{os.path.basename(html_path)}"
+
+def pdf_pool():
+    global _pdf_pool
+    with generation_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+        return _pdf_pool
+
+def prerender_pool():
+    global _prerender_pool
+    with generation_lock:
+        if _prerender_pool is None:
+            # One at a time: this is spare-capacity work and shouldn't crowd out real requests
+            _prerender_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prerender")
+        return _prerender_pool
+
+def prerender_downloads(uploads):
+    """Queue background renders of the HTML and PDF downloads for ``(file_path, filename)`` uploads."""
+    if not PRERENDER_DOWNLOADS:
+        return
+    for file_path, filename in uploads:
+        for fmt in ("html", "pdf"):
+            prerender_pool().submit(prerender, file_path, filename, fmt)
+
+def prerender(file_path, filename, fmt):
+    try:
+        render_download(file_path, filename, fmt)
+    except FileNotFoundError:
+        pass  # Replaced or collected before we got to it; the click will render it
+    except Exception:
+        log.exception("💥 pre-render failed", file=filename, fmt=fmt)
+        ERRORS.inc(stage="prerender")
+
+def load_or_parse(file_path, source):
+    # parse_file_by_type serves (and fills) the versioned parse cache, keyed on the digest in ``source``.
+    # 🩹 A recent partial result is good enough for a download; past that, only its missing descriptions are redone
+    parsed = parse_file_by_type(file_path, cache=parse_cache, source=source, descriptions=description_cache, partial_ok=True)
+    if parsed:
+        storage.touch(parse_cache.path_for(source[1], get_extension(file_path)))
+    return parsed
+
+def render_download(file_path, filename, fmt, timing=None):
+    """Path of the rendered ``html``/``pdf`` download for an uploaded file, served from the render cache.
+
+    Returns None if the file can't be parsed. A ``timing`` StageTimer gets the
+    parse/render stages and whether the cache had it.
+    """
+    timing = timing or StageTimer()
+    # 📖 One read: the key and the render both come from these bytes, whatever happens to file_path meanwhile
+    source = read_source(file_path)
+    key = render_cache.key_for(source[1], fmt, filename)
+
+    rendered = False
+
+    def render(output_path):
+        nonlocal rendered
+        rendered = True
+        timing.note("cache", "miss")
+        with timing.stage("parse"):
+            parsed = load_or_parse(file_path, source)
+        if not parsed:
+            raise UnparseableFile(filename)
+
+        with log.span(f"render_{fmt}", file=filename), RENDER_SECONDS.time(format=fmt, kind="download"), \
+                timing.stage("render"):
+            if fmt == "pdf":
+                # 📄 reportlab is only imported once someone actually wants a PDF
+                from parser.pdf_generator import render_pdf_part
+                pdf_pool().submit(render_pdf_part, filename, parsed, get_extension(filename), output_path).result()
+            else:
+                generate_html([build_document(filename, parsed, get_extension(filename))], output_path, hide_buttons=True)
+
+        # 🚧 Failed or pending descriptions would stick around as long as the render does
+        if count_unfinished(parsed):
+            timing.note("cache", "skip")
+            return UNCACHED
+
+    try:
+        with storage.in_use(file_path, parse_cache.path_for(source[1], get_extension(filename))):
+            output_path = render_cache.get_or_render(key, fmt, render)
+    except UnparseableFile:
+        return None
+    if not rendered:
+        timing.note("cache", "hit")
+
+    storage.touch(output_path)
+    return output_path
+
+def render_merged_pdf(uploads, timing=None):
+    """One PDF for several uploaded files, as an in-memory buffer.
+
+    ``uploads`` is a list of ``(file_path, filename)``. Each file's part renders
+    in parallel through the same cache as single-file downloads, then the parts
+    are merged in order. Files that can't be parsed are left out; returns None
+    if that's all of them.
+    """
+    timing = timing or StageTimer()
+    with ThreadPoolExecutor(max_workers=PDF_WORKERS) as threads, timing.stage("render"):
+        paths = list(threads.map(lambda upload: render_download(upload[0], upload[1], "pdf"), uploads))
+
+    parts = [(filename, path) for (_, filename), path in zip(uploads, paths) if path]
+    if not parts:
+        return None
+    # 📌 Don't let the GC drop a cached part halfway through the merge
+    from parser.pdf_generator import merge_pdfs
+    with storage.in_use(*[path for _, path in parts]), log.span("merge_pdf", files=len(parts)), \
+            RENDER_SECONDS.time(format="pdf", kind="merge"), timing.stage("merge"):
+        return merge_pdfs(parts, title="Documentation for " + ", ".join(name for name, _ in parts))
+
+class UnparseableFile(Exception):
+    pass
@@ -0,0 +1,6 @@
+# tests/conftest.py
+import os
+import sys
+
+# 🧪 Tests import the server modules the same way the app does (run pytest from server/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
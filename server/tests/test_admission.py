@@ -0,0 +1,108 @@
+# tests/test_admission.py
+import threading
+import time
+
+import pytest
+
+from parser.admission import AdmissionController, AdmissionRejected, TokenBucket
+
+
+def controller(max_active=1, max_pending=5, client_rate=100, client_burst=100, global_rate=100, global_burst=100):
+    return AdmissionController(client_rate, client_burst, global_rate, global_burst, max_active, max_pending)
+
+def wait_in_thread(ticket, order):
+    def run():
+        ticket.wait_for_slot()
+        order.append(ticket.client_id)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+def wait_until(condition, timeout=2.0):
+    give_up_at = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < give_up_at, "timed out"
+        time.sleep(0.01)
+
+
+def test_token_bucket_says_how_long_until_the_next_token():
+    bucket = TokenBucket(rate_per_second=0.5, capacity=1)
+    now = bucket.updated
+
+    assert bucket.try_take(now) == 0
+    assert bucket.try_take(now) == pytest.approx(2.0)
+    assert bucket.try_take(now + 1) == pytest.approx(1.0)
+    assert bucket.try_take(now + 2) == 0
+
+def test_client_rate_limit_retry_after():
+    admission = controller(client_rate=1 / 60, client_burst=1)
+    admission.admit("a")
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        admission.admit("a")
+
+    assert rejected.value.retry_after == 60
+    # Other clients have buckets of their own
+    admission.admit("b")
+
+def test_global_rate_limit_gives_the_client_token_back():
+    admission = controller(client_burst=2, client_rate=1 / 60, global_rate=1 / 30, global_burst=1)
+    admission.admit("a")
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        admission.admit("b")
+    assert rejected.value.retry_after == 30
+
+    admission.global_bucket.tokens = 1
+    admission.admit("a")
+
+def test_full_queue_is_rejected():
+    admission = controller(max_active=1, max_pending=1)
+    admission.admit("a")
+    admission.admit("b")
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        admission.admit("c")
+
+    assert rejected.value.retry_after == 30  # Nothing has finished yet to measure a drain rate from
+    assert admission.rejected_total == 1
+
+def test_slots_go_out_in_admission_order():
+    admission = controller()
+    running = admission.admit("first")
+    running.wait_for_slot()
+    second, third = admission.admit("second"), admission.admit("third")
+
+    order = []
+    # The later ticket starts waiting first, but mustn't jump the queue
+    threads = [wait_in_thread(third, order)]
+    time.sleep(0.05)
+    threads.append(wait_in_thread(second, order))
+    time.sleep(0.05)
+    assert order == []
+
+    running.release()
+    wait_until(lambda: order == ["second"])
+    assert not third.active
+
+    second.release()
+    wait_until(lambda: order == ["second", "third"])
+    for thread in threads:
+        thread.join(1)
+
+def test_releasing_a_queued_ticket_frees_its_place():
+    admission = controller()
+    running = admission.admit("first")
+    running.wait_for_slot()
+    gave_up, next_up = admission.admit("gave-up"), admission.admit("next")
+
+    gave_up.release()
+    gave_up.release()
+    assert admission.pending == 1
+
+    order = []
+    thread = wait_in_thread(next_up, order)
+    running.release()
+    wait_until(lambda: order == ["next"])
+    thread.join(1)
+    assert (admission.active, admission.pending) == (1, 0)
@@ -0,0 +1,84 @@
+# tests/test_budget.py
+import time
+
+import parser.file_parser as file_parser
+from parser.budget import Deadline, PENDING_NOTE, count_pending, is_pending, placeholder, rank
+from parser.file_parser import describe_targets
+
+
+def function(name, params=(), body="pass"):
+    snippet = f"def {name}({', '.join(params)}):\n    {body}\n"
+    return (snippet, "function", {"name": name, "params": list(params), "returns": "None", "docstring": None}, "docstring")
+
+def if_statement(condition):
+    return (f"if {condition}:\n    pass\n", "if statement", {"condition": condition, "description": None}, "description")
+
+def describe_all(snippets, types, **_):
+    return ["Described by Gemini."] * len(snippets)
+
+
+def test_zero_deadline_never_expires():
+    deadline = Deadline(0)
+
+    assert not deadline and not deadline.expired()
+    assert deadline.remaining() == float("inf")
+
+def test_deadline_expires():
+    deadline = Deadline(0.05)
+    assert deadline and deadline.remaining() <= 0.05
+
+    time.sleep(0.06)
+    assert deadline.expired() and deadline.remaining() == 0
+
+def test_rank_puts_public_api_first():
+    guard, private, public = if_statement("x"), function("_helper"), function("handle")
+
+    assert rank([guard, private, public]) == [public, private, guard]
+
+def test_placeholder_is_built_from_structure():
+    snippet, typ, entry, _ = function("parse", ["path", "strict"])
+
+    text = placeholder(snippet, typ, entry)
+
+    assert text == f"Function `parse(path, strict)`. {PENDING_NOTE}"
+    assert is_pending(text)
+
+def test_expired_deadline_fills_everything_with_placeholders(monkeypatch):
+    monkeypatch.setattr(file_parser, "DESCRIBE_COOLDOWN", 0)
+    targets = [function(f"f{n}") for n in range(7)]
+    calls, batches = [], []
+
+    deadline = Deadline(0.01)
+    time.sleep(0.02)
+    pending = describe_targets(targets, batch_size=3, deadline=deadline, on_batch=batches.append,
+                               describe=lambda *a, **kw: calls.append(a) or describe_all(*a, **kw))
+
+    assert pending == 7 and calls == []
+    assert all(is_pending(entry[key]) for _, _, entry, key in targets)
+    # Placeholders still go through on_batch, so streaming sections and the description cache see them
+    assert sum(len(batch) for batch in batches) == 7
+
+def test_request_gets_the_remaining_budget_and_is_cut_off(monkeypatch):
+    monkeypatch.setattr(file_parser, "DESCRIBE_COOLDOWN", 0)
+    targets = [function(f"f{n}") for n in range(6)]
+    timeouts = []
+
+    def slow(snippets, types, timeout=None, **_):
+        timeouts.append(timeout)
+        if len(timeouts) == 1:
+            return describe_all(snippets, types)
+        # Second request outlives the deadline, the way a timed-out HTTP call does
+        time.sleep(timeout)
+        return ["Error: request timed out"] * len(snippets)
+
+    deadline = Deadline(0.3)
+    status = {}
+    pending = describe_targets(targets, generation_id="g", status=status, batch_size=2, deadline=deadline, describe=slow)
+
+    assert 0 < timeouts[0] <= 0.3
+    assert len(timeouts) == 2
+    assert pending == 4
+    described = [entry["docstring"] for _, _, entry, _ in targets]
+    assert described[:2] == ["Described by Gemini."] * 2
+    assert count_pending({"functions": [entry for _, _, entry, _ in targets]}) == 4
+    assert status["g"] == "generating:100"
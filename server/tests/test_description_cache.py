@@ -0,0 +1,73 @@
+# tests/test_description_cache.py
+import parser.file_parser as file_parser
+from parser.budget import PENDING_NOTE
+from parser.description_cache import DescriptionCache
+from parser.file_parser import parse_file_by_type
+from parser.parse_cache import ParseCache
+
+SOURCE = '''def first():
+    return 1
+
+def second():
+    return 2
+
+def third():
+    return 3
+'''
+
+
+def target(snippet, name="f"):
+    return (snippet, "function", {"name": name, "docstring": None}, "docstring")
+
+
+def test_fill_writes_cached_descriptions_and_returns_the_rest(tmp_path):
+    cache = DescriptionCache(str(tmp_path / "descriptions.sqlite"))
+    described = target("def f(): pass")
+    described[2]["docstring"] = "Does nothing."
+    cache.store([described])
+
+    again, fresh = target("def f(): pass"), target("def g(): pass", "g")
+
+    assert cache.fill([again, fresh]) == [fresh]
+    assert again[2]["docstring"] == "Does nothing."
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_failed_and_pending_descriptions_are_not_stored(tmp_path):
+    cache = DescriptionCache(str(tmp_path / "descriptions.sqlite"))
+    failed, pending = target("def f(): pass"), target("def g(): pass", "g")
+    failed[2]["docstring"] = "Error: 429 Too Many Requests"
+    pending[2]["docstring"] = f"Function `g()`. {PENDING_NOTE}"
+    cache.store([failed, pending])
+
+    assert len(cache.fill([target("def f(): pass"), target("def g(): pass", "g")])) == 2
+    assert cache.failures == 1
+
+
+def test_reparse_only_describes_what_failed(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_parser, "DESCRIBE_COOLDOWN", 0)
+    path = tmp_path / "funcs.py"
+    path.write_text(SOURCE)
+    parse_cache = ParseCache(str(tmp_path / "parse_cache"))
+    descriptions = DescriptionCache(str(tmp_path / "descriptions.sqlite"))
+    sent = []
+    failing = {"second"}
+
+    def describe(snippets, types, **_):
+        sent.append(list(snippets))
+        return ["Error: boom" if any(name in s for name in failing) else f"Describes {s.split('(')[0]}." for s in snippets]
+
+    parse_file_by_type(str(path), cache=parse_cache, descriptions=descriptions, describe=describe)
+    assert len(sent[0]) == 3
+
+    # 🧩 Partial: served to callers that accept one, re-parsed for everyone else
+    digest = file_parser.read_source(str(path))[1]
+    assert parse_cache.get(digest, ".py", partial_ok=True) is not None
+    assert parse_cache.get(digest, ".py") is None
+
+    sent.clear()
+    failing.clear()
+    result = parse_file_by_type(str(path), cache=parse_cache, descriptions=descriptions, describe=describe)
+
+    assert len(sent) == 1 and len(sent[0]) == 1 and "second" in sent[0][0]
+    assert [fn["docstring"] for fn in result["functions"]] == ["Describes def first.", "Describes def second.", "Describes def third."]
+    assert parse_cache.get(digest, ".py") == result
@@ -0,0 +1,63 @@
+# tests/test_parse_cache.py
+import os
+import zlib
+
+import parser.parse_cache as parse_cache
+from parser.parse_cache import ParseCache
+from parser.render_cache import content_digest
+
+RESULT = {"functions": [{"name": "f", "params": [], "returns": "None", "docstring": "Does f."}]}
+DIGEST = content_digest(b"def f(): pass\n")
+
+
+def test_hit_after_put(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    assert cache.get(DIGEST, ".py") is None
+
+    cache.put(DIGEST, ".py", RESULT)
+
+    assert cache.get(DIGEST, ".py") == RESULT
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_parser_version_change_is_a_miss(tmp_path, monkeypatch):
+    cache = ParseCache(str(tmp_path))
+    cache.put(DIGEST, ".py", RESULT)
+
+    monkeypatch.setattr(parse_cache, "_parser_version", "0:changed")
+
+    assert cache.get(DIGEST, ".py") is None
+    assert cache.misses == 1
+
+def test_key_covers_content_and_extension(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    cache.put(DIGEST, ".py", RESULT)
+
+    assert cache.get(content_digest(b"def g(): pass\n"), ".py") is None
+    assert cache.get(DIGEST, ".js") is None
+    assert cache.get(DIGEST, ".PY") == RESULT
+
+def test_partial_result_only_for_partial_ok_within_ttl(tmp_path, monkeypatch):
+    cache = ParseCache(str(tmp_path))
+    cache.put(DIGEST, ".py", RESULT, partial=True)
+
+    assert cache.get(DIGEST, ".py") is None
+    assert cache.get(DIGEST, ".py", partial_ok=True) == RESULT
+
+    monkeypatch.setattr(parse_cache, "PARTIAL_TTL", -1)
+    assert cache.get(DIGEST, ".py", partial_ok=True) is None
+
+def test_complete_result_replaces_partial(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    cache.put(DIGEST, ".py", {"functions": []}, partial=True)
+    cache.put(DIGEST, ".py", RESULT)
+
+    assert cache.get(DIGEST, ".py") == RESULT
+
+def test_corrupt_entry_is_dropped(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    path = cache.put(DIGEST, ".py", RESULT)
+    with open(path, "wb") as f:
+        f.write(zlib.compress(b"{not json"))
+
+    assert cache.get(DIGEST, ".py") is None
+    assert not os.path.exists(path)
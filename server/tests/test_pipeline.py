@@ -0,0 +1,136 @@
+# tests/test_pipeline.py
+import threading
+import time
+
+import pytest
+
+import parser.file_parser as file_parser
+from parser.file_parser import describe_targets, report_progress
+from parser.pipeline import TargetStream
+from parser.progress import GenerationProgress, Throughput
+
+
+def emit_numbers(count, result="done"):
+    def extract(emit):
+        for n in range(count):
+            emit(f"snippet {n}", "function", {"name": f"f{n}"}, "docstring")
+        return result
+    return extract
+
+
+def test_stream_yields_every_target_then_the_result():
+    stream = TargetStream(emit_numbers(10), depth=2)
+
+    assert [entry["name"] for _, _, entry, _ in stream] == [f"f{n}" for n in range(10)]
+    assert stream.result() == "done"
+    assert stream.total == len(stream) == 10
+
+def test_total_is_unknown_while_extraction_runs():
+    more = threading.Event()
+
+    def extract(emit):
+        emit("a", "function", {}, "docstring")
+        more.wait(2)
+        emit("b", "function", {}, "docstring")
+
+    stream = TargetStream(extract, depth=4)
+    targets = iter(stream)
+    next(targets)
+    assert stream.total is None
+
+    more.set()
+    assert len(list(targets)) == 1
+    assert stream.total == 2
+
+def test_keep_drops_targets_before_they_are_queued():
+    stream = TargetStream(emit_numbers(10), keep=lambda chunk: [t for t in chunk if int(t[2]["name"][1:]) % 2 == 0], chunk_size=3)
+
+    assert len(list(stream)) == 5
+    assert stream.total == 5
+
+def test_extractor_errors_reach_the_reader():
+    def extract(emit):
+        emit("a", "function", {}, "docstring")
+        raise ValueError("bad syntax")
+
+    with pytest.raises(ValueError):
+        list(TargetStream(extract))
+
+def test_close_stops_a_producer_blocked_on_a_full_queue():
+    emitted = []
+
+    def extract(emit):
+        while True:
+            emit("x", "function", {}, "docstring")
+            emitted.append(1)
+
+    stream = TargetStream(extract, depth=2)
+    next(iter(stream))
+    stream.close()
+
+    count = len(emitted)
+    time.sleep(0.3)
+    assert len(emitted) == count
+
+def test_close_stops_a_busy_extractor_at_its_next_target():
+    emitted = []
+
+    def extract(emit):
+        # Never blocks on the queue: only the closed check in emit can stop it
+        for n in range(1000):
+            time.sleep(0.01)
+            emit("x", "function", {}, "docstring")
+            emitted.append(n)
+
+    stream = TargetStream(extract, depth=10000)
+    time.sleep(0.05)
+    stream.close()
+
+    count = len(emitted)
+    time.sleep(0.2)
+    assert len(emitted) <= count + 1
+
+def test_close_is_bounded_when_the_extractor_never_emits():
+    stream = TargetStream(lambda emit: time.sleep(2))
+
+    started = time.monotonic()
+    stream.close(timeout=0.2)
+
+    assert time.monotonic() - started < 1.0
+
+
+def test_report_progress_is_indeterminate_until_the_total_is_known():
+    status = {}
+
+    report_progress(status, "g", 3, None)
+    assert status["g"] == "generating:extracting"
+
+    report_progress(status, "g", 3, 4)
+    assert status["g"] == "generating:75"
+
+def test_describing_a_stream_ends_at_100(monkeypatch):
+    monkeypatch.setattr(file_parser, "DESCRIBE_COOLDOWN", 0)
+    status = {}
+    stream = TargetStream(emit_numbers(7), depth=2)
+
+    describe_targets(stream, generation_id="g", status=status, batch_size=3,
+                     describe=lambda snippets, types, **_: [f"Describes {s}." for s in snippets])
+
+    assert status["g"] == "generating:100"
+    assert stream.result() == "done"
+
+def test_generation_progress_is_snippet_weighted():
+    progress = GenerationProgress(["a.py", "b.py"], throughput=Throughput())
+    progress.file_started("a.py")
+    progress.file_targets(10)
+    progress.snippets_described(5, 1.0)
+
+    payload = progress.payload()
+    # b.py isn't parsed yet, so it's guessed at a.py's 10 snippets
+    assert payload["percent"] == 25
+    assert payload["snippets"] == {"described": 5, "pending": 0, "total": 20}
+    assert payload["eta_seconds"] == 3.0
+
+    progress.file_done()
+    progress.finished()
+    assert progress.payload()["percent"] == 100
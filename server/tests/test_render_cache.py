@@ -0,0 +1,88 @@
+# tests/test_render_cache.py
+import os
+import threading
+import time
+
+import pytest
+
+from parser.render_cache import RenderCache, UNCACHED
+
+
+def writer(calls, content=b"%PDF", delay=0.0):
+    def render(tmp_path):
+        calls.append(tmp_path)
+        time.sleep(delay)
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+    return render
+
+
+def test_concurrent_misses_render_once(tmp_path):
+    cache = RenderCache(str(tmp_path))
+    key = cache.key_for("abc123", "pdf")
+    calls, paths = [], []
+    start = threading.Barrier(8)
+
+    def download():
+        start.wait()
+        paths.append(cache.get_or_render(key, "pdf", writer(calls, delay=0.2)))
+
+    threads = [threading.Thread(target=download) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert paths == [cache.path_for(key, "pdf")] * 8
+    assert (cache.misses, cache.hits) == (1, 7)
+
+def test_hit_does_not_render(tmp_path):
+    cache = RenderCache(str(tmp_path))
+    key = cache.key_for("abc123", "md")
+    calls = []
+
+    first = cache.get_or_render(key, "md", writer(calls))
+    second = cache.get_or_render(key, "md", writer(calls))
+
+    assert first == second and len(calls) == 1
+    with open(first, "rb") as f:
+        assert f.read() == b"%PDF"
+
+def test_uncached_render_goes_to_a_one_off_path(tmp_path):
+    cache = RenderCache(str(tmp_path))
+    key = cache.key_for("abc123", "pdf")
+    calls = []
+
+    def incomplete(tmp_path):
+        writer(calls)(tmp_path)
+        return UNCACHED
+
+    first = cache.get_or_render(key, "pdf", incomplete)
+    second = cache.get_or_render(key, "pdf", incomplete)
+
+    assert len(calls) == 2
+    assert first != second and os.path.exists(first) and os.path.exists(second)
+    assert not os.path.exists(cache.path_for(key, "pdf"))
+
+def test_failed_render_leaves_nothing_behind(tmp_path):
+    cache = RenderCache(str(tmp_path))
+    key = cache.key_for("abc123", "pdf")
+
+    def broken(tmp_path):
+        with open(tmp_path, "wb") as f:
+            f.write(b"half")
+        raise RuntimeError("reportlab fell over")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_render(key, "pdf", broken)
+
+    assert os.listdir(tmp_path) == []
+    calls = []
+    cache.get_or_render(key, "pdf", writer(calls))
+    assert len(calls) == 1
+
+def test_key_changes_with_variant(tmp_path):
+    cache = RenderCache(str(tmp_path))
+    assert cache.key_for("abc123", "pdf") != cache.key_for("abc123", "pdf", "merged")
+    assert cache.key_for("abc123", "pdf") != cache.key_for("abc123", "md")
@@ -0,0 +1,112 @@
+# tests/test_storage.py
+import os
+import time
+
+from parser.storage import StorageCollector
+
+
+def make_file(root, name, size=100, age=0):
+    path = os.path.join(root, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    used = time.time() - age
+    os.utime(path, (used, used))
+    return path
+
+def age_dir(path, age):
+    used = time.time() - age
+    os.utime(path, (used, used))
+
+def collector(root, max_age=0, max_bytes=0, grace=5, units=()):
+    return StorageCollector([str(root)], max_age_seconds=max_age, max_total_bytes=max_bytes, grace_seconds=grace, units=units)
+
+
+def test_quota_evicts_least_recently_used_first(tmp_path):
+    oldest = make_file(tmp_path, "a.pdf", age=1000)
+    older = make_file(tmp_path, "b.pdf", age=900)
+    newest = make_file(tmp_path, "c.pdf", age=800)
+
+    gc = collector(tmp_path, max_bytes=250)
+    assert gc.collect() == 100
+
+    assert not os.path.exists(oldest)
+    assert os.path.exists(older) and os.path.exists(newest)
+    assert gc.stats()["stored_bytes"] == 200
+
+def test_touch_moves_a_file_to_the_back(tmp_path):
+    first = make_file(tmp_path, "a.pdf", age=1000)
+    second = make_file(tmp_path, "b.pdf", age=900)
+
+    gc = collector(tmp_path, max_bytes=150)
+    gc.touch(first)
+    gc.collect()
+
+    assert os.path.exists(first)
+    assert not os.path.exists(second)
+
+def test_pinned_and_recent_files_are_skipped(tmp_path):
+    pinned = make_file(tmp_path, "pinned.pdf", age=1000)
+    old = make_file(tmp_path, "old.pdf", age=900)
+    fresh = make_file(tmp_path, "fresh.pdf", age=1)
+
+    gc = collector(tmp_path, max_age=10, grace=60)
+    with gc.in_use(pinned):
+        gc.collect()
+        assert os.path.exists(pinned)
+
+    assert not os.path.exists(old)
+    assert os.path.exists(fresh)
+
+    gc.collect()
+    assert not os.path.exists(pinned)
+
+def test_pinned_directory_covers_its_files(tmp_path):
+    inside = make_file(tmp_path, "job/input.py", age=1000)
+
+    gc = collector(tmp_path, max_age=10)
+    with gc.in_use(os.path.join(tmp_path, "job")):
+        gc.collect()
+
+    assert os.path.exists(inside)
+
+def test_unit_directory_is_evicted_whole_or_not_at_all(tmp_path):
+    stale = [make_file(tmp_path, f"documentation_a/{name}", age=1000) for name in ("index.html", "part-1.html")]
+    mixed = [make_file(tmp_path, "documentation_b/index.html", age=1000), make_file(tmp_path, "documentation_b/part-1.html", age=1)]
+
+    gc = collector(tmp_path, max_age=10, grace=60, units=("documentation_",))
+    gc.collect()
+
+    assert not os.path.exists(os.path.join(tmp_path, "documentation_a"))
+    assert all(os.path.exists(path) for path in mixed)
+    assert gc.stats()["files_evicted_total"] == len(stale)
+
+def test_unit_directory_with_a_pin_inside_is_kept(tmp_path):
+    shell = make_file(tmp_path, "documentation_a/index.html", age=1000)
+    fragment = make_file(tmp_path, "documentation_a/part-1.html", age=1000)
+
+    gc = collector(tmp_path, max_age=10, units=("documentation_",))
+    with gc.in_use(fragment):
+        gc.collect()
+
+    assert os.path.exists(shell) and os.path.exists(fragment)
+
+def test_empty_directories_are_pruned_but_kept_roots_stay(tmp_path):
+    make_file(tmp_path, "parse_cache/ab/entry.json.z", age=1000)
+    os.makedirs(os.path.join(tmp_path, "parse_cache", "cd"))
+    age_dir(os.path.join(tmp_path, "parse_cache", "cd"), 1000)
+
+    gc = collector(tmp_path, max_age=10)
+    gc.keep(os.path.join(tmp_path, "parse_cache"))
+    gc.collect()
+
+    assert os.listdir(os.path.join(tmp_path, "parse_cache")) == []
+    assert gc.stats()["dirs_removed_total"] == 2
+
+def test_recent_empty_directory_is_left_for_the_grace_period(tmp_path):
+    # Created by an upload that hasn't written its file yet
+    os.makedirs(os.path.join(tmp_path, "upload_x"))
+
+    collector(tmp_path, max_age=10, grace=60).collect()
+
+    assert os.path.isdir(os.path.join(tmp_path, "upload_x"))
@@ -73,7 +73,10 @@ export default function App() {
         setProgressPercent(0);
         setAiProgressPercent(null);
 
-        if (result?.error === "Generation cancelled by user") {
+        if (response.status === 429) {
+          const retryAfter = response.headers.get("Retry-After");
+          alert(`🚦 ${result?.error || "Server is busy"}. Please try again in ${retryAfter || "a few"} seconds.`);
+        } else if (result?.error === "Generation cancelled by user") {
           alert("❌ You cancelled the generation.");
         } else {
           console.error("Backend error:", result?.error || "Unknown error");
@@ -113,7 +116,10 @@ export default function App() {
         const data = await res.json();
         const status = data.status;
 
-        if (status.startsWith("generating:")) {
+        if (status === "generating:extracting") {
+          // 🚰 Describing has started but the file is still being parsed, so there's no total yet
+          setLoadingStage("Generating AI descriptions...");
+        } else if (status.startsWith("generating:")) {
           const percent = parseInt(status.split(":")[1]);
           setLoadingStage("Generating AI descriptions...");
           setAiProgressPercent(percent);